@@ -0,0 +1,161 @@
+"""
+Benchmark Ortak Araçları
+Zamanlama (timeit benzeri kalibrasyon + tekrar), bellek ölçümü ve JSON
+sonuç dosyası yardımcıları. Cihaz ve sunucu benchmark'ları aynı modül
+isimlerini (wire_protocol) kullandığı için ayrı process'lerde çalışır; bu
+modül iki tarafta da import edilebilir (sadece standart kütüphane).
+"""
+
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Varsayılan ölçüm ayarları (quick modda azaltılır)
+REPEAT = 7
+MIN_TIME_S = 0.2
+QUICK_REPEAT = 3
+QUICK_MIN_TIME_S = 0.05
+
+
+class Bench:
+    def __init__(self, quick=False):
+        """
+        Benchmark sonuç toplayıcı
+
+        Args:
+            quick: True ise daha az tekrar ve kısa ölçüm (duman testi, CI)
+        """
+        self.quick = quick
+        self.repeat = QUICK_REPEAT if quick else REPEAT
+        self.min_time_s = QUICK_MIN_TIME_S if quick else MIN_TIME_S
+        self.results = {}
+
+    def time(self, name, func, ops_per_call=1, **params):
+        """
+        func'ı kalibre edilmiş döngüde ölç, işlem başına süreyi kaydet
+
+        Args:
+            name: Sonuç anahtarı (örn. 'device.predict.json')
+            func: Argümansız fonksiyon
+            ops_per_call: Bir func çağrısındaki işlem sayısı (sonuç işlem başına)
+            params: Sonuca eklenen parametreler (örn. devices=100)
+
+        Returns:
+            dict: median_us, min_us, mean_us, stdev_us, ops_per_s, number, repeat
+        """
+        # Çağrı sayısını bir ölçüm en az min_time_s sürecek şekilde seç
+        number = 1
+        while True:
+            elapsed = _timed_loop(func, number)
+            if elapsed >= self.min_time_s:
+                break
+            number = max(number * 2, int(number * self.min_time_s / max(elapsed, 1e-9) * 1.2))
+
+        samples = [_timed_loop(func, number) / (number * ops_per_call) * 1e6
+                   for _ in range(self.repeat)]
+        median_us = statistics.median(samples)
+        result = dict(params)
+        result.update({
+            'median_us': median_us,
+            'min_us': min(samples),
+            'mean_us': statistics.mean(samples),
+            'stdev_us': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+            'ops_per_s': 1e6 / median_us if median_us else None,
+            'number': number * ops_per_call,
+            'repeat': self.repeat,
+        })
+        self.results[name] = result
+        print(f"{name:<48} {median_us:12.2f} us/op  {result['ops_per_s']:12.0f} op/s")
+        return result
+
+    def memory(self, name, func, **params):
+        """
+        func'ın süresini ve tepe bellek kullanımını (tracemalloc) ölç
+
+        Returns:
+            dict: median_ms, min_ms, peak_kib (en büyük tepe), repeat
+        """
+        durations = []
+        peaks = []
+        for _ in range(self.repeat):
+            gc.collect()
+            tracemalloc.start()
+            start = time.perf_counter()
+            func()
+            durations.append((time.perf_counter() - start) * 1000)
+            peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+            tracemalloc.stop()
+        # tracemalloc ölçümü yavaşlatır, süre ayrıca izlemesiz ölçülür
+        plain = []
+        for _ in range(self.repeat):
+            gc.collect()
+            start = time.perf_counter()
+            func()
+            plain.append((time.perf_counter() - start) * 1000)
+        result = dict(params)
+        result.update({
+            'median_ms': statistics.median(plain),
+            'min_ms': min(plain),
+            'traced_median_ms': statistics.median(durations),
+            'peak_kib': max(peaks),
+            'repeat': self.repeat,
+        })
+        self.results[name] = result
+        print(f"{name:<48} {result['median_ms']:12.2f} ms      {result['peak_kib']:12.0f} KiB tepe")
+        return result
+
+    def write(self, path):
+        """Sonuçları JSON dosyasına yaz"""
+        with open(path, 'w') as f:
+            json.dump(self.results, f, indent=2, sort_keys=True)
+
+
+def _timed_loop(func, number):
+    """func'ı number kez çağır, GC kapalıyken geçen süre (timeit gibi)"""
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _git(*args):
+    """git çıktısı (git yoksa veya komut başarısızsa None)"""
+    try:
+        result = subprocess.run(['git'] + list(args), cwd=REPO_DIR, capture_output=True,
+                                text=True, timeout=10)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout.strip()
+
+
+def environment():
+    """Karşılaştırma için çalıştırma ortamı (commit, Python, platform)"""
+    status = _git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': _git('rev-parse', 'HEAD') or None,
+        'commit_subject': _git('log', '-1', '--format=%s') or None,
+        'dirty': bool(status) if status is not None else None,
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'time': datetime.now().isoformat(timespec='seconds'),
+    }
@@ -0,0 +1,263 @@
+"""
+Cihaz Tarafı Benchmark'ları
+LoPy4 modülleri host uyumluluk katmanıyla (simulator/host_shims.py)
+CPython'da değiştirilmeden ölçülür:
+
+    - MLScheduler tahmin süresi (model backend'i başına)
+    - Model yükleme süresi ve tepe bellek (model_micropython.json ve
+      model_exporter.py ile üretilen diğer formatlar)
+    - ChannelMonitor.get_features maliyeti (geçmiş uzunluğuna göre)
+    - get_optimal_delay uçtan uca (özellik + önbellekli tahmin)
+
+Sonuçlar ana makine CPU'sunda ölçülür; cihazdaki mutlak süreleri değil,
+commit'ler arası göreli değişimi gösterir.
+
+Kullanım:
+    python bench_device.py [--quick] [--output sonuc.json]
+"""
+
+import contextlib
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'simulator'))
+
+import host_shims
+host_shims.install()
+
+import ml_scheduler
+from channel_monitor import ChannelMonitor
+from ml_scheduler import MLScheduler
+from scan_cache import ScanCache
+from bench_common import Bench, REPO_DIR
+
+JSON_MODEL_PATH = os.path.join(host_shims.LOPY4_DIR, 'models', 'model_micropython.json')
+EXPORTER_PATH = os.path.join(REPO_DIR, 'server', 'model_exporter.py')
+
+# Model backend'leri ('json': load_json_model'in derlediği düz diziler,
+# 'flash': aynı .bin dosyası MODEL_FORMAT = 'flash' ile lazy okunur)
+BACKENDS = ('json', 'bin', 'flash', 'py', 'lut')
+
+# Backend -> model dosyası (json dışındakiler geçici dizine aktarılır)
+MODEL_FILES = {
+    'bin': 'model_micropython.bin',
+    'flash': 'model_micropython.bin',
+    'py': 'model_compiled.py',
+    'lut': 'model_delay.lut',
+}
+
+# Tekrarlanabilirlik için sabit tohum ve girdi sayıları
+SEED = 1
+N_VECTORS = 256
+HISTORY_LENGTHS = (0, 10, 100, 1000)
+SCAN_NETWORKS = 5
+
+
+class FixedWLAN:
+    """Her taramada aynı ağ listesini döndüren WLAN (ölçüm tekrarlanabilir olsun)"""
+
+    def __init__(self, networks):
+        self.networks = networks
+
+    def isconnected(self):
+        return True
+
+    def scan(self):
+        return list(self.networks)
+
+
+@contextlib.contextmanager
+def frozen_ticks():
+    """
+    time.ticks_ms'i sabitle: ölçüm boyunca pencereler (RSSI, aktivite)
+    boşalmaz ve tarama önbelleği eskimez, her çağrı aynı durumu görür
+    """
+    original = time.ticks_ms
+    now = original()
+    time.ticks_ms = lambda: now
+    try:
+        yield
+    finally:
+        time.ticks_ms = original
+
+
+@contextlib.contextmanager
+def model_format(fmt):
+    """ml_scheduler.MODEL_FORMAT'ı geçici olarak değiştir ('.bin' -> bin/flash seçimi)"""
+    original = ml_scheduler.MODEL_FORMAT
+    ml_scheduler.MODEL_FORMAT = 'flash' if fmt == 'flash' else 'json'
+    try:
+        yield
+    finally:
+        ml_scheduler.MODEL_FORMAT = original
+
+
+@contextlib.contextmanager
+def quiet():
+    """Model yükleme çıktılarını bastır"""
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def export_models(model_dir):
+    """JSON modeli model_exporter.py ile bin / py / lut formatlarına aktar"""
+    paths = {'json': JSON_MODEL_PATH}
+    for backend, name in MODEL_FILES.items():
+        path = os.path.join(model_dir, name)
+        if not os.path.exists(path):
+            subprocess.run([sys.executable, EXPORTER_PATH, JSON_MODEL_PATH, '-o', path],
+                           cwd=os.path.dirname(EXPORTER_PATH), check=True,
+                           stdout=subprocess.DEVNULL)
+        paths[backend] = path
+    return paths
+
+
+def create_scheduler(backend, model_path, channel_monitor=None):
+    """
+    Backend'e göre MLScheduler oluştur (özellik isimleri lopy4/models'ten okunur)
+    """
+    cwd = os.getcwd()
+    os.chdir(host_shims.LOPY4_DIR)
+    try:
+        with model_format(backend), quiet():
+            scheduler = MLScheduler(0, channel_monitor, model_path)
+    finally:
+        os.chdir(cwd)
+    if not scheduler.model_loaded:
+        raise RuntimeError(f"Model yuklenemedi: {backend} ({model_path})")
+    return scheduler
+
+
+def feature_vectors(count, seed=SEED):
+    """Gerçekçi aralıklarda sabit tohumlu özellik vektörleri (model_features.pkl sırası)"""
+    rng = random.Random(seed)
+    return [[float(rng.randint(-95, -40)),    # rssi
+             rng.random(),                    # channel_occupancy
+             rng.random() * 0.5,              # collision_rate
+             float(rng.randint(0, 15)),       # neighbor_count
+             rng.uniform(-10.0, 10.0),        # trend_rssi
+             float(rng.randint(0, 5000)),     # inter_arrival_time
+             float(rng.randint(0, 5000)),     # data_age
+             float(rng.randint(1, 3)),        # priority
+             float(rng.randint(0, 23))]       # hour
+            for _ in range(count)]
+
+
+def create_monitor(history):
+    """
+    history kadar RSSI, iletim ve kanal aktivitesi kaydı olan ChannelMonitor
+    (iletim geçmişi collision_window ile, diğerleri sabit kapasiteyle sınırlı)
+    """
+    networks = [(b'n%d' % i, bytes([0, 0, 0, 0, 0, i]), 3, 6, -60 - i)
+                for i in range(SCAN_NETWORKS)]
+    scan_cache = ScanCache(wlan=FixedWLAN(networks))
+    monitor = ChannelMonitor(0, collision_window=max(history, 1), scan_cache=scan_cache)
+    for i in range(history):
+        monitor.record_rssi(-60 - i % 20)
+        monitor.record_transmission(i % 4 != 0, 100 + i % 500)
+        monitor.record_channel_activity()
+    return monitor
+
+
+def bench_predict(bench, paths, vectors):
+    """Backend başına _model_predict (önbelleksiz, vektör başına süre)"""
+    for backend in BACKENDS:
+        scheduler = create_scheduler(backend, paths[backend])
+        predict = scheduler._model_predict
+        mean_prediction = sum(predict(v) for v in vectors) / len(vectors)
+
+        def run():
+            for vector in vectors:
+                predict(vector)
+
+        bench.time(f'device.predict.{backend}', run, ops_per_call=len(vectors),
+                   backend=backend, vectors=len(vectors), mean_prediction=mean_prediction)
+        if scheduler.flash_model is not None:
+            scheduler.flash_model.close()
+
+    # Tahmin önbelleği isabet yolu (aynı kovaya düşen vektör)
+    scheduler = create_scheduler('json', paths['json'])
+    vector = vectors[0]
+    scheduler._cached_model_predict(vector)
+    bench.time('device.predict_cached.hit', lambda: scheduler._cached_model_predict(vector),
+               backend='json')
+
+
+def bench_load(bench, paths):
+    """Backend başına model yükleme süresi ve tepe bellek (tracemalloc)"""
+    scheduler = create_scheduler('json', paths['json'])
+    for backend in BACKENDS:
+        path = paths[backend]
+
+        def load():
+            if backend == 'py':
+                # Modül önbelleğinden dönmesin, her seferinde import edilsin
+                sys.modules.pop(os.path.splitext(MODEL_FILES['py'])[0], None)
+            with model_format(backend), quiet():
+                scheduler.load_model(path)
+
+        bench.memory(f'device.load.{backend}', load, backend=backend,
+                     file_bytes=os.path.getsize(path))
+        if not scheduler.model_loaded:
+            raise RuntimeError(f"Model yuklenemedi: {backend} ({path})")
+    scheduler._reset_model()
+
+
+def bench_features(bench):
+    """ChannelMonitor.get_features geçmiş uzunluğuna göre"""
+    with frozen_ticks():
+        for history in HISTORY_LENGTHS:
+            monitor = create_monitor(history)
+            monitor.get_features()
+            bench.time(f'device.get_features.h{history}', monitor.get_features,
+                       history=history)
+
+
+def bench_optimal_delay(bench, paths):
+    """get_optimal_delay uçtan uca (özellikler + önbellekli JSON model tahmini)"""
+    rng = random.Random(SEED)
+    requests = [(rng.randint(0, 5000), rng.randint(1, 3)) for _ in range(N_VECTORS)]
+    with frozen_ticks():
+        monitor = create_monitor(100)
+        scheduler = create_scheduler('json', paths['json'], monitor)
+        get_optimal_delay = scheduler.get_optimal_delay
+
+        def run():
+            for data_age, priority in requests:
+                get_optimal_delay(data_age, priority)
+
+        run()
+        scheduler.clear_prediction_cache()
+        result = bench.time('device.get_optimal_delay', run, ops_per_call=len(requests),
+                            backend='json', history=100)
+        result['cache_hit_rate'] = scheduler.get_cache_stats().get('hit_rate')
+
+
+def run_all(bench, model_dir):
+    """Tüm cihaz benchmark'larını çalıştır"""
+    paths = export_models(model_dir)
+    vectors = feature_vectors(N_VECTORS)
+    bench_predict(bench, paths, vectors)
+    bench_load(bench, paths)
+    bench_features(bench)
+    bench_optimal_delay(bench, paths)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="LoPy4 cihaz modulu benchmark'lari")
+    parser.add_argument('--quick', action='store_true', help="Az tekrarli kisa olcum")
+    parser.add_argument('-o', '--output', default=None, help="Sonuclari JSON dosyasina yaz")
+    args = parser.parse_args()
+
+    bench = Bench(quick=args.quick)
+    with tempfile.TemporaryDirectory(prefix='bench_models_') as model_dir:
+        run_all(bench, model_dir)
+    if args.output:
+        bench.write(args.output)
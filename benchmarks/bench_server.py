@@ -0,0 +1,184 @@
+"""
+Sunucu Tarafı Benchmark'ları
+server/ modülleri doğrudan ölçülür:
+
+    - DataCollector._process_packet (çözme + çarpışma tespiti + kayıt kuyruğu
+      + ACK) aktif cihaz sayısına göre
+    - DataCollector._save_to_csv depolama modu başına (csv, columnar, sqlite)
+
+Aynı process'te event loop çalışmaz: paket ölçümünde satırlar kayıt
+kuyruğunda birikir ve her turda boşaltılır (yazma _save_to_csv ölçümünde),
+ACK'lar gerçek UDP soketiyle 127.0.0.1'e gönderilir.
+
+Kullanım:
+    python bench_server.py [--quick] [--output sonuc.json]
+"""
+
+import asyncio
+import json
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), 'server'))
+
+from data_collector import DataCollector, STORAGE_BACKENDS
+from wire_protocol import DATA_HEADER_FORMAT, WIRE_MAGIC, WIRE_VERSION, TYPE_DATA, RATE_SCALE
+from bench_common import Bench
+
+# Tekrarlanabilirlik için sabit tohum ve girdi sayıları
+SEED = 1
+DEVICE_COUNTS = (1, 10, 100, 1000)
+PACKETS_PER_CALL = 2000
+JSON_DEVICES = 100
+ROWS_PER_CALL = 1000
+
+
+def packet_fields(rng, device_id, seq):
+    """Tek paketin alanları (cihazın gönderdiği değer aralıklarında)"""
+    return {
+        'device_id': device_id,
+        'seq': seq & 0xFFFF,
+        'timestamp': rng.randint(0, 2 ** 31),
+        'data_age': rng.randint(0, 5000),
+        'priority': rng.randint(1, 3),
+        'delay_used': rng.choice((0, 100, 200, 500, 1000, 2000, 5000)),
+        'rssi': rng.randint(-95, -40),
+        'channel_occupancy': round(rng.random(), 4),
+        'collision_rate': round(rng.random() * 0.5, 4),
+        'neighbor_count': rng.randint(0, 15),
+    }
+
+
+def encode_binary(fields):
+    """DataSender ikili formatı (TLV sensör verisi yok)"""
+    return struct.pack(DATA_HEADER_FORMAT, WIRE_MAGIC, WIRE_VERSION, TYPE_DATA,
+                       fields['device_id'], fields['seq'], fields['timestamp'],
+                       fields['data_age'], fields['priority'], fields['delay_used'],
+                       fields['rssi'], int(fields['channel_occupancy'] * RATE_SCALE),
+                       int(fields['collision_rate'] * RATE_SCALE), fields['neighbor_count'])
+
+
+def build_packets(devices, count, wire_format='bin', seed=SEED):
+    """Cihazlar arasında sırayla dağıtılmış count paket"""
+    rng = random.Random(seed)
+    packets = []
+    for i in range(count):
+        fields = packet_fields(rng, 1 + i % devices, i // devices)
+        if wire_format == 'json':
+            packets.append(json.dumps(fields).encode('utf-8'))
+        else:
+            packets.append(encode_binary(fields))
+    return packets
+
+
+def build_rows(count, seed=SEED):
+    """_record_packet'in ürettiği biçimde CSV satırları"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        fields = packet_fields(rng, 1 + i % 100, i)
+        success = rng.random() > 0.3
+        rows.append([datetime.now().isoformat(), fields['device_id'], fields['data_age'],
+                     fields['priority'], fields['rssi'], fields['channel_occupancy'],
+                     fields['collision_rate'], fields['neighbor_count'],
+                     1 if success else 0, fields['delay_used'], 0 if success else 1])
+    return rows
+
+
+def create_collector(data_dir, storage='csv'):
+    """Konsol çıktısı /dev/null'a giden, geçici dizine yazan DataCollector"""
+    collector = DataCollector(host='127.0.0.1', port=0,
+                              data_file=os.path.join(data_dir, 'collected_data.csv'),
+                              storage=storage)
+    collector.console.stream = open(os.devnull, 'w')
+    return collector
+
+
+def close_collector(collector):
+    collector._close_storage()
+    collector.console.close()
+    collector.console.stream.close()
+    if collector.socket is not None:
+        collector.socket.close()
+
+
+def bench_process_packet(bench, data_dir):
+    """_process_packet aktif cihaz sayısına göre (ikili; 100 cihazda JSON da)"""
+    cases = [(devices, 'bin') for devices in DEVICE_COUNTS] + [(JSON_DEVICES, 'json')]
+    for devices, wire_format in cases:
+        collector = create_collector(data_dir)
+        collector.socket = collector._create_socket()
+        collector.persist_queue = asyncio.Queue()
+        process_packet = collector._process_packet
+        drain_queue = collector._drain_queue
+        persist_queue = collector.persist_queue
+        packets = build_packets(devices, PACKETS_PER_CALL, wire_format)
+        addr = ('127.0.0.1', 0)
+
+        def run():
+            for data in packets:
+                process_packet(data, addr)
+            drain_queue(persist_queue)
+
+        try:
+            result = bench.time(f'server.process_packet.{wire_format}.d{devices}', run,
+                                ops_per_call=len(packets), devices=devices,
+                                wire_format=wire_format)
+            stats = collector.stats
+            result['collision_ratio'] = stats['collisions_detected'] / max(stats['total_received'], 1)
+            errors = stats['decode_errors'] + stats['processing_errors']
+            if errors:
+                raise RuntimeError(f"Paket isleme hatasi: {errors}")
+        finally:
+            close_collector(collector)
+
+
+def bench_save(bench, data_dir):
+    """_save_to_csv depolama modu başına (tamponlu yazıcı, kapanış hariç)"""
+    rows = build_rows(ROWS_PER_CALL)
+    for storage in STORAGE_BACKENDS:
+        storage_dir = os.path.join(data_dir, storage)
+        os.makedirs(storage_dir)
+        collector = create_collector(storage_dir, storage)
+        save_to_csv = collector._save_to_csv
+
+        def run():
+            for row in rows:
+                save_to_csv(row)
+
+        try:
+            bench.time(f'server.save_to_csv.{storage}', run, ops_per_call=len(rows),
+                       storage=storage, buffer_rows=collector.csv_buffer_rows)
+            start = time.perf_counter()
+            collector._close_storage()
+            bench.results[f'server.save_to_csv.{storage}']['close_ms'] = \
+                (time.perf_counter() - start) * 1000
+        finally:
+            close_collector(collector)
+
+
+def run_all(bench, data_dir):
+    """Tüm sunucu benchmark'larını çalıştır"""
+    bench_process_packet(bench, data_dir)
+    bench_save(bench, data_dir)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sunucu (DataCollector) benchmark'lari")
+    parser.add_argument('--quick', action='store_true', help="Az tekrarli kisa olcum")
+    parser.add_argument('-o', '--output', default=None, help="Sonuclari JSON dosyasina yaz")
+    args = parser.parse_args()
+
+    bench = Bench(quick=args.quick)
+    with tempfile.TemporaryDirectory(prefix='bench_server_') as data_dir:
+        run_all(bench, data_dir)
+    if args.output:
+        bench.write(args.output)
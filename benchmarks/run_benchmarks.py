@@ -0,0 +1,151 @@
+"""
+Benchmark Çalıştırıcı
+Cihaz ve sunucu benchmark'larını ayrı process'lerde çalıştırır (iki taraf
+aynı isimli modüller kullanır, örn. wire_protocol), sonuçları commit ve
+ortam bilgisiyle tek JSON dosyasında birleştirir ve iki sonuç dosyasını
+karşılaştırır.
+
+Sonuç dosyası:
+    {"meta": {"commit": ..., "python": ..., "quick": ...},
+     "benchmarks": {"device.predict.json": {"median_us": ..., ...}, ...}}
+
+Kullanım:
+    python run_benchmarks.py run -o sonuc.json [--quick] [--only device|server]
+    python run_benchmarks.py compare eski.json yeni.json [--threshold 0.10]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from bench_common import environment
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SUITES = {
+    'device': os.path.join(BENCH_DIR, 'bench_device.py'),
+    'server': os.path.join(BENCH_DIR, 'bench_server.py'),
+}
+
+# Karşılaştırılan ölçüler (hepsinde düşük değer daha iyi)
+COMPARE_METRICS = ('median_us', 'median_ms', 'peak_kib')
+
+# Varsayılan gerileme eşiği (göreli artış)
+DEFAULT_THRESHOLD = 0.10
+
+
+def run_suites(names, quick=False):
+    """
+    Benchmark betiklerini ayrı process'lerde çalıştır
+
+    Returns:
+        dict: Birleştirilmiş sonuç ({'meta': ..., 'benchmarks': ...})
+    """
+    benchmarks = {}
+    with tempfile.TemporaryDirectory(prefix='bench_') as tmp_dir:
+        for name in names:
+            output = os.path.join(tmp_dir, f'{name}.json')
+            command = [sys.executable, SUITES[name], '--output', output]
+            if quick:
+                command.append('--quick')
+            print(f"=== {name} ===")
+            subprocess.run(command, cwd=BENCH_DIR, check=True)
+            with open(output) as f:
+                benchmarks.update(json.load(f))
+
+    meta = environment()
+    meta['quick'] = quick
+    meta['suites'] = list(names)
+    return {'meta': meta, 'benchmarks': benchmarks}
+
+
+def compare_results(old, new, threshold=DEFAULT_THRESHOLD):
+    """
+    İki sonuç dosyasını karşılaştır
+
+    Returns:
+        list: [(benchmark, ölçü, eski, yeni, göreli değişim, durum), ...]
+            durum: 'gerileme', 'iyilesme', '' veya 'yeni' / 'kaldirildi'
+    """
+    rows = []
+    old_benchmarks = old['benchmarks']
+    new_benchmarks = new['benchmarks']
+    for name in sorted(set(old_benchmarks) | set(new_benchmarks)):
+        if name not in old_benchmarks:
+            rows.append((name, '', None, None, None, 'yeni'))
+            continue
+        if name not in new_benchmarks:
+            rows.append((name, '', None, None, None, 'kaldirildi'))
+            continue
+        for metric in COMPARE_METRICS:
+            old_value = old_benchmarks[name].get(metric)
+            new_value = new_benchmarks[name].get(metric)
+            if old_value is None or new_value is None:
+                continue
+            change = (new_value - old_value) / old_value if old_value else 0.0
+            status = ''
+            if change > threshold:
+                status = 'gerileme'
+            elif change < -threshold:
+                status = 'iyilesme'
+            rows.append((name, metric, old_value, new_value, change, status))
+    return rows
+
+
+def print_comparison(old, new, rows):
+    """Karşılaştırma tablosunu yazdır"""
+    def describe(meta):
+        commit = (meta.get('commit') or '?')[:10]
+        dirty = ' (degisiklik var)' if meta.get('dirty') else ''
+        quick = ' [quick]' if meta.get('quick') else ''
+        return f"{commit}{dirty}{quick} - {meta.get('time')}"
+
+    print(f"Eski: {describe(old['meta'])}")
+    print(f"Yeni: {describe(new['meta'])}")
+    for key in ('python', 'platform'):
+        if old['meta'].get(key) != new['meta'].get(key):
+            print(f"UYARI: Farkli {key}: {old['meta'].get(key)} -> {new['meta'].get(key)}")
+    print()
+    print(f"{'Benchmark':<40} {'Olcu':<10} {'Eski':>12} {'Yeni':>12} {'Degisim':>9}")
+    for name, metric, old_value, new_value, change, status in rows:
+        if change is None:
+            print(f"{name:<40} {'':<10} {'':>12} {'':>12} {'':>9}  {status}")
+            continue
+        print(f"{name:<40} {metric:<10} {old_value:12.2f} {new_value:12.2f} "
+              f"{change * 100:+8.1f}%  {status}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark calistirici")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    run_parser = subparsers.add_parser('run', help="Benchmark'lari calistir, sonuclari JSON'a yaz")
+    run_parser.add_argument('-o', '--output', required=True, help="Sonuc JSON dosyasi")
+    run_parser.add_argument('--quick', action='store_true', help="Az tekrarli kisa olcum")
+    run_parser.add_argument('--only', choices=sorted(SUITES), action='append', default=None,
+                            help="Sadece bu grup (tekrarlanabilir)")
+    compare_parser = subparsers.add_parser('compare', help="Iki sonuc dosyasini karsilastir")
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                                help="Gerileme esigi (goreli, varsayilan 0.10 = %%10)")
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run_suites(args.only or list(SUITES), args.quick)
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Sonuclar yazildi: {args.output} ({len(results['benchmarks'])} benchmark)")
+    else:
+        with open(args.old) as f:
+            old = json.load(f)
+        with open(args.new) as f:
+            new = json.load(f)
+        rows = compare_results(old, new, args.threshold)
+        print_comparison(old, new, rows)
+        regressions = [row for row in rows if row[5] == 'gerileme']
+        if regressions:
+            print(f"\n{len(regressions)} gerileme (esik %{args.threshold * 100:.0f})")
+            sys.exit(1)
@@ -0,0 +1,65 @@
+"""
+uasyncio / asyncio Uyumluluk Katmanı
+Cihazda uasyncio, bilgisayarda (simülasyon / test) CPython asyncio kullanılır
+"""
+
+# MicroPython'da uasyncio, CPython'da asyncio
+try:
+    import uasyncio as asyncio
+    IS_UASYNCIO = True
+except ImportError:
+    IS_UASYNCIO = False
+    try:
+        import asyncio
+    except ImportError:
+        asyncio = None
+
+
+async def sleep_ms(ms):
+    """Milisaniye bekle (event loop bloklanmaz)"""
+    if hasattr(asyncio, 'sleep_ms'):
+        await asyncio.sleep_ms(ms)
+    else:
+        await asyncio.sleep(ms / 1000)
+
+
+async def wait_for_ms(coro, timeout_ms):
+    """
+    Coroutine'i zaman aşımı ile bekle
+
+    Raises:
+        asyncio.TimeoutError: Süre dolarsa (coroutine iptal edilir)
+    """
+    if hasattr(asyncio, 'wait_for_ms'):
+        return await asyncio.wait_for_ms(coro, timeout_ms)
+    return await asyncio.wait_for(coro, timeout_ms / 1000)
+
+
+async def recv_datagram(sock, size=1024):
+    """
+    UDP datagramı bekle (soket okunabilir olana kadar uyur, polling yok)
+    Soket non-blocking olmalıdır: sock.setblocking(False)
+
+    Returns:
+        bytes: Alınan datagram
+    """
+    if IS_UASYNCIO:
+        # uasyncio Stream, soketi poll kuyruğuna ekler; okunabilir olunca read() çağrılır
+        return await asyncio.StreamReader(sock).read(size)
+    return await asyncio.get_running_loop().sock_recv(sock, size)
+
+
+def create_task(coro):
+    """Coroutine'i çalışan event loop'a görev olarak ekle"""
+    if hasattr(asyncio, 'create_task'):
+        return asyncio.create_task(coro)
+    # Eski uasyncio (v2) sürümleri
+    return asyncio.get_event_loop().create_task(coro)
+
+
+def run(coro):
+    """Event loop'u başlat ve coroutine bitene kadar çalıştır"""
+    if hasattr(asyncio, 'run'):
+        return asyncio.run(coro)
+    # Eski uasyncio (v2) sürümleri
+    return asyncio.get_event_loop().run_until_complete(coro)
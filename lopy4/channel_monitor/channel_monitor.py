@@ -4,29 +4,156 @@ RSSI, kanal doluluk oranı ve çarpışma tespiti
 """
 
 import time
+import profiler
+from scan_cache import ScanCache
+# Arka plan tarama görevi için uasyncio (CPython'da asyncio)
+from async_compat import asyncio, sleep_ms, create_task
+
+# MicroPython'da array modülü bazı portlarda uarray adıyla gelir
+try:
+    from array import array
+except ImportError:
+    from uarray import array
+
+# Tipli geçmiş dizileri için typecode'lar
+TIMESTAMP_TYPE = 'l'  # ticks_ms zaman damgaları
+RSSI_TYPE = 'h'       # RSSI (dBm, tam sayı)
+FLAG_TYPE = 'b'       # Başarı / aktivite bayrakları (0/1)
+WAIT_TYPE = 'f'       # Bekleme süreleri (ms)
+
+# Yayınlanan özellikler (latest_features) yeni kayıt gelmediyse en fazla bu
+# kadar süre yeniden kullanılır (zaman pencereli özellikler için üst sınır)
+FEATURES_MAX_AGE_MS = 500
 
 # Basit deque implementasyonu (MicroPython uyumlu)
+# Sabit kapasiteli dairesel tampon: ekleme ve tahliye O(1), eleman başına allocation yok
 class SimpleDeque:
-    def __init__(self, maxlen=100):
+    def __init__(self, maxlen=100, track_sum=False, typecode=None):
+        """
+        Args:
+            maxlen: Kapasite
+            track_sum: Sayısal elemanların toplamını tut (mean() için)
+            typecode: array typecode'u (örn. 'l', 'h', 'f'); None ise
+                      herhangi bir nesne tutan liste kullanılır
+        """
         self.maxlen = maxlen
-        self.items = []
+        if typecode is None:
+            self.items = [None] * maxlen
+        else:
+            self.items = array(typecode, [0] * maxlen)
+        self.typecode = typecode
+        self.head = 0    # En eski elemanın indeksi
+        self.length = 0
+        # Sayısal elemanlar için toplam (append/tahliyede güncellenir)
+        self.track_sum = track_sum
+        self.total = 0
     
     def append(self, item):
-        self.items.append(item)
-        if len(self.items) > self.maxlen:
-            self.items.pop(0)
+        """
+        Eleman ekle
+        
+        Returns:
+            Kapasite aşıldıysa tahliye edilen en eski eleman, yoksa None
+        """
+        evicted = None
+        if self.length == self.maxlen:
+            # Dolu: en eski elemanın üzerine yaz
+            index = self.head
+            evicted = self.items[index]
+            if self.track_sum:
+                self.total -= evicted
+            self.head = (self.head + 1) % self.maxlen
+        else:
+            index = (self.head + self.length) % self.maxlen
+            self.length += 1
+        
+        self.items[index] = item
+        if self.track_sum:
+            # Tipli dizide saklanan (yuvarlanmış) değer toplanır, tahliyede birebir düşülür
+            self.total += self.items[index]
+        return evicted
+    
+    def popleft(self):
+        """En eski elemanı çıkar ve döndür"""
+        if self.length == 0:
+            raise IndexError("pop from empty deque")
+        item = self.items[self.head]
+        if self.typecode is None:
+            self.items[self.head] = None
+        if self.track_sum:
+            self.total -= item
+        self.head = (self.head + 1) % self.maxlen
+        self.length -= 1
+        return item
+    
+    def mean(self):
+        """Elemanların ortalaması (track_sum gerekir), boşsa None"""
+        if self.length == 0:
+            return None
+        return self.total / self.length
     
     def __len__(self):
-        return len(self.items)
+        return self.length
     
     def __iter__(self):
-        return iter(self.items)
+        items = self.items
+        maxlen = self.maxlen
+        for i in range(self.length):
+            yield items[(self.head + i) % maxlen]
     
     def __getitem__(self, index):
-        return self.items[index]
+        if not isinstance(index, int):
+            # Dilim (örn. rssi_history[-5:]): sadece istenen elemanlar listelenir
+            try:
+                start, stop, step = index.indices(self.length)
+            except AttributeError:
+                # slice.indices olmayan MicroPython portları: tüm halka listelenir
+                return [item for item in self][index]
+            items = self.items
+            head = self.head
+            maxlen = self.maxlen
+            return [items[(head + i) % maxlen] for i in range(start, stop, step)]
+        if index < 0:
+            index += self.length
+        if index < 0 or index >= self.length:
+            raise IndexError("deque index out of range")
+        return self.items[(self.head + index) % self.maxlen]
+
+class SlidingWindow:
+    """
+    Zaman penceresi içindeki değerlerin toplamı ve sayısı
+    Zaman damgaları monoton arttığı için pencere dışına çıkanlar baştan
+    düşülür (head pointer); her sorgu amortize O(1)
+    """
+    def __init__(self, window_ms, maxlen=100, typecode=WAIT_TYPE):
+        self.window_ms = window_ms
+        self.values = SimpleDeque(maxlen=maxlen, track_sum=True, typecode=typecode)
+        self.timestamps = SimpleDeque(maxlen=maxlen, typecode=TIMESTAMP_TYPE)
+    
+    def append(self, timestamp, value=1):
+        """Değer ekle (kapasite aşılırsa en eski değer toplamdan düşülür)"""
+        self.values.append(value)
+        self.timestamps.append(timestamp)
+    
+    def expire(self, current_time):
+        """Pencere dışına çıkan değerleri baştan düş"""
+        while (len(self.timestamps) > 0 and
+               time.ticks_diff(current_time, self.timestamps[0]) > self.window_ms):
+            self.timestamps.popleft()
+            self.values.popleft()
+    
+    def count(self, current_time):
+        """Penceredeki değer sayısı"""
+        self.expire(current_time)
+        return len(self.values)
+    
+    def mean(self, current_time):
+        """Penceredeki değerlerin ortalaması, boşsa None"""
+        self.expire(current_time)
+        return self.values.mean()
 
 class ChannelMonitor:
-    def __init__(self, device_id, window_size_ms=1000, collision_window=10):
+    def __init__(self, device_id, window_size_ms=1000, collision_window=10, scan_cache=None):
         """
         Kanal durumu izleyici
         
@@ -34,33 +161,55 @@ class ChannelMonitor:
             device_id: Cihaz ID
             window_size_ms: İzleme penceresi (ms)
             collision_window: Çarpışma tespiti için pencere boyutu
+            scan_cache: Paylaşılan ScanCache (None ise ilk taramada oluşturulur)
         """
         self.device_id = device_id
         self.window_size_ms = window_size_ms
         self.collision_window = collision_window
         
-        # RSSI geçmişi
-        self.rssi_history = SimpleDeque(maxlen=100)
-        self.rssi_timestamps = SimpleDeque(maxlen=100)
+        # RSSI geçmişi (toplam append'te güncellenir, ortalama O(1))
+        self.rssi_history = SimpleDeque(maxlen=100, track_sum=True, typecode=RSSI_TYPE)
+        self.rssi_timestamps = SimpleDeque(maxlen=100, typecode=TIMESTAMP_TYPE)
+        # Zaman pencereli RSSI ortalamaları (window_ms -> SlidingWindow)
+        self.rssi_windows = {}
         
-        # İletim geçmişi (başarılı/başarısız)
-        self.transmission_history = SimpleDeque(maxlen=collision_window)
+        # İletim geçmişi (başarı bayrağı 1/0, zaman damgası, bekleme süresi)
+        # Başarılı sayısı toplamda tutulur: başarısız = uzunluk - toplam
+        self.transmission_history = SimpleDeque(maxlen=collision_window, track_sum=True,
+                                                typecode=FLAG_TYPE)
+        self.transmission_timestamps = SimpleDeque(maxlen=collision_window, typecode=TIMESTAMP_TYPE)
+        self.transmission_wait_times = SimpleDeque(maxlen=collision_window, typecode=WAIT_TYPE)
         
         # Kanal kullanım geçmişi
-        self.channel_activity = SimpleDeque(maxlen=100)
-        self.channel_timestamps = SimpleDeque(maxlen=100)
+        self.channel_activity = SimpleDeque(maxlen=100, typecode=FLAG_TYPE)
+        self.channel_timestamps = SimpleDeque(maxlen=100, typecode=TIMESTAMP_TYPE)
+        # Son window_size_ms içindeki kendi aktivitelerimiz
+        self.activity_window = SlidingWindow(window_size_ms, maxlen=100, typecode=FLAG_TYPE)
         
         # Son başarılı iletim zamanı
         self.last_successful_transmission = None
         
         # Ortalama bekleme süreleri
-        self.wait_times = SimpleDeque(maxlen=50)
+        self.wait_times = SimpleDeque(maxlen=50, track_sum=True, typecode=WAIT_TYPE)
         
         # WiFi scanning sonuçları (gerçek neighbor count ve channel occupancy için)
         self.scan_results = SimpleDeque(maxlen=20)  # Son 20 scan sonucu
-        self.scan_timestamps = SimpleDeque(maxlen=20)
+        self.scan_timestamps = SimpleDeque(maxlen=20, typecode=TIMESTAMP_TYPE)
         self.last_scan_time = None
+        self.last_scan_count = 0  # Geçmişe eklenen son ScanCache taraması
         self.scan_interval_ms = 5000  # 5 saniyede bir scan yap
+        # Paylaşılan tarama önbelleği (WiFiManager / DataSender ile aynı anlık görüntü)
+        self.scan_cache = scan_cache
+        
+        # Arka plan tarama görevi (run_background_scan) ve yayınlanan son özellikler
+        self.background_scan = False
+        self.background_task = None
+        self.latest_features = None
+        self.latest_features_time = None
+        # Her kayıtta (RSSI, iletim, aktivite, yeni tarama) artar; yayınlanan
+        # özellikler farklı sürümdeyse eskimiştir
+        self.record_version = 0
+        self.latest_features_version = -1
         
     def start(self):
         """İzlemeyi başlat"""
@@ -74,8 +223,13 @@ class ChannelMonitor:
             rssi_value: RSSI değeri (dBm)
         """
         current_time = time.ticks_ms()
+        # Tipli geçmiş tam sayı dBm tutar
+        rssi_value = int(rssi_value)
+        self.record_version += 1
         self.rssi_history.append(rssi_value)
         self.rssi_timestamps.append(current_time)
+        for window in self.rssi_windows.values():
+            window.append(current_time, rssi_value)
     
     def get_current_rssi(self):
         """
@@ -102,18 +256,23 @@ class ChannelMonitor:
             return None
         
         if window_ms is None:
-            return sum(self.rssi_history) / len(self.rssi_history)
+            return self.rssi_history.mean()
         
         current_time = time.ticks_ms()
-        rssi_values = []
-        
-        for i, timestamp in enumerate(self.rssi_timestamps):
-            if time.ticks_diff(current_time, timestamp) <= window_ms:
-                rssi_values.append(self.rssi_history[i])
-        
-        if len(rssi_values) > 0:
-            return sum(rssi_values) / len(rssi_values)
-        return None
+        return self._get_rssi_window(window_ms).mean(current_time)
+    
+    def _get_rssi_window(self, window_ms):
+        """
+        window_ms için RSSI penceresini döndür
+        İlk sorguda mevcut geçmişten bir kez doldurulur, sonra record_rssi ile güncellenir
+        """
+        window = self.rssi_windows.get(window_ms)
+        if window is None:
+            window = SlidingWindow(window_ms, maxlen=self.rssi_history.maxlen, typecode=RSSI_TYPE)
+            for i in range(len(self.rssi_history)):
+                window.append(self.rssi_timestamps[i], self.rssi_history[i])
+            self.rssi_windows[window_ms] = window
+        return window
     
     def record_transmission(self, success, wait_time_ms=0):
         """
@@ -123,14 +282,14 @@ class ChannelMonitor:
             success: İletim başarılı ise True
             wait_time_ms: Bekleme süresi (ms)
         """
-        self.transmission_history.append({
-            'success': success,
-            'timestamp': time.ticks_ms(),
-            'wait_time': wait_time_ms
-        })
+        current_time = time.ticks_ms()
+        self.record_version += 1
+        self.transmission_history.append(1 if success else 0)
+        self.transmission_timestamps.append(current_time)
+        self.transmission_wait_times.append(wait_time_ms)
         
         if success:
-            self.last_successful_transmission = time.ticks_ms()
+            self.last_successful_transmission = current_time
         
         if wait_time_ms > 0:
             self.wait_times.append(wait_time_ms)
@@ -145,39 +304,46 @@ class ChannelMonitor:
         if len(self.transmission_history) == 0:
             return 0.0
         
-        failed_count = sum(1 for t in self.transmission_history if not t['success'])
+        failed_count = len(self.transmission_history) - self.transmission_history.total
         return failed_count / len(self.transmission_history)
     
-    def scan_wifi_networks(self):
+    def scan_wifi_networks(self, force=False):
         """
         WiFi ağlarını tara ve sonuçları kaydet
         (Gerçek neighbor count ve channel occupancy için)
+        Tarama paylaşılan ScanCache üzerinden yapılır
+        
+        Args:
+            force: True ise TTL'ye bakmadan yeni tarama yap (arka plan görevi)
         
         Returns:
             list: Taranan ağların listesi [(ssid, bssid, channel, rssi, ...), ...]
         """
-        try:
-            import network
-            wlan = network.WLAN()
-            
-            # Eğer bağlı değilse veya scan yapamıyorsa None dön
-            if not wlan.isconnected():
-                return []
-            
-            # WiFi ağlarını tara
-            # Pycom LoPy4 için: wlan.scan() kullanılır
-            # Sonuç formatı: (ssid, bssid, channel, rssi, authmode, hidden)
-            networks = wlan.scan()
-            
-            current_time = time.ticks_ms()
+        start = profiler.ticks()
+        if self.scan_cache is None:
+            self.scan_cache = ScanCache(ttl_ms=self.scan_interval_ms)
+        
+        if force:
+            self.scan_cache.scan()
+        # Önbellek TTL dolmuşsa ve bu döngüde taranmamışsa tarar, yoksa
+        # mevcut anlık görüntüyü döndürür
+        networks = self.scan_cache.get_networks()
+        
+        # Yeni anlık görüntüyü geçmişe ekle
+        if self.scan_cache.scan_count != self.last_scan_count:
+            self.last_scan_count = self.scan_cache.scan_count
+            self.last_scan_time = self.scan_cache.snapshot_time
+            self.record_version += 1
             self.scan_results.append(networks)
-            self.scan_timestamps.append(current_time)
-            self.last_scan_time = current_time
-            
-            return networks
-        except Exception as e:
-            print("WiFi scan hatasi:", e)
-            return []
+            self.scan_timestamps.append(self.last_scan_time)
+        
+        profiler.record(profiler.STAGE_SCAN, start)
+        return networks
+    
+    def _refresh_scan(self):
+        """Gerekirse tara (arka plan görevi çalışıyorsa gönderim yolunda taramaz)"""
+        if not self.background_scan:
+            self.scan_wifi_networks()
     
     def get_channel_occupancy_rate(self):
         """
@@ -188,16 +354,13 @@ class ChannelMonitor:
         """
         current_time = time.ticks_ms()
         
-        # Eğer son scan çok eskiyse yeni scan yap
-        if (self.last_scan_time is None or 
-            time.ticks_diff(current_time, self.last_scan_time) > self.scan_interval_ms):
-            self.scan_wifi_networks()
+        # Anlık görüntü eskiyse ScanCache yeni scan yapar
+        self._refresh_scan()
         
         # Son scan sonuçlarını kullan
         if len(self.scan_results) == 0:
             # Fallback: Kendi aktivitelerine göre tahmin
-            activity_count = sum(1 for ts in self.channel_timestamps 
-                                if time.ticks_diff(current_time, ts) <= self.window_size_ms)
+            activity_count = self.activity_window.count(current_time)
             max_expected = self.window_size_ms / 100
             if max_expected > 0:
                 return min(activity_count / max_expected, 1.0)
@@ -215,8 +378,7 @@ class ChannelMonitor:
         occupancy = min(network_count / 10.0, 1.0)
         
         # Ayrıca kendi aktivitelerimizi de ekle
-        own_activity = sum(1 for ts in self.channel_timestamps 
-                          if time.ticks_diff(current_time, ts) <= self.window_size_ms)
+        own_activity = self.activity_window.count(current_time)
         own_activity_rate = min(own_activity / 10.0, 1.0)  # Son 1 saniyede max 10 aktivite
         
         # İkisini birleştir (ağırlıklı ortalama)
@@ -225,8 +387,10 @@ class ChannelMonitor:
     def record_channel_activity(self):
         """Kanal aktivitesini kaydet"""
         current_time = time.ticks_ms()
+        self.record_version += 1
         self.channel_activity.append(1)
         self.channel_timestamps.append(current_time)
+        self.activity_window.append(current_time)
     
     def get_last_successful_transmission_time(self):
         """
@@ -245,7 +409,7 @@ class ChannelMonitor:
             float: Ortalama bekleme süresi (ms)
         """
         if len(self.wait_times) > 0:
-            return sum(self.wait_times) / len(self.wait_times)
+            return self.wait_times.mean()
         return 0.0
     
     def get_neighbor_count(self):
@@ -255,12 +419,8 @@ class ChannelMonitor:
         Returns:
             int: Gerçek komşu sayısı (taranan ağ sayısı)
         """
-        current_time = time.ticks_ms()
-        
-        # Eğer son scan çok eskiyse yeni scan yap
-        if (self.last_scan_time is None or 
-            time.ticks_diff(current_time, self.last_scan_time) > self.scan_interval_ms):
-            self.scan_wifi_networks()
+        # Anlık görüntü eskiyse ScanCache yeni scan yapar
+        self._refresh_scan()
         
         # Son scan sonuçlarından neighbor count al
         if len(self.scan_results) > 0:
@@ -314,13 +474,12 @@ class ChannelMonitor:
         Returns:
             dict: Özellik sözlüğü (None değerler varsayılanlarla değiştirilir)
         """
-        # Önce WiFi scan yap (güncel veriler için)
-        current_time = time.ticks_ms()
-        if (self.last_scan_time is None or 
-            time.ticks_diff(current_time, self.last_scan_time) > self.scan_interval_ms):
-            self.scan_wifi_networks()
+        start = profiler.ticks()
+        # Önce WiFi scan yap (güncel veriler için, ScanCache anlık görüntüsü)
+        # Arka plan görevi çalışıyorsa tarama yapılmaz, son görüntü kullanılır
+        self._refresh_scan()
         
-        return {
+        features = {
             'rssi': self.get_current_rssi(),  # None ise -80 kullan
             'avg_rssi': self.get_average_rssi(window_ms=5000),  # None ise -80 kullan
             'channel_occupancy': self.get_channel_occupancy_rate(),  # None ise 0.0 kullan
@@ -329,5 +488,109 @@ class ChannelMonitor:
             'last_success_time': self.get_last_successful_transmission_time(),  # None ise 0 kullan
             'avg_wait_time': self.get_average_wait_time()  # None ise 0.0 kullan
         }
-
-
+        profiler.record(profiler.STAGE_FEATURES, start)
+        return features
+    
+    def refresh_snapshot(self, rssi_source=None):
+        """
+        Tarama ve RSSI'yi yenile, özellikleri latest_features olarak yayınla
+        (arka plan görevi her turda çağırır)
+        
+        Args:
+            rssi_source: RSSI döndüren fonksiyon (örn. wifi.get_rssi);
+                         None ise tarama görüntüsündeki en yüksek RSSI
+        """
+        if self.scan_cache is None:
+            self.scan_cache = ScanCache(ttl_ms=self.scan_interval_ms)
+        self.scan_wifi_networks(force=True)
+        
+        try:
+            if rssi_source is not None:
+                rssi = rssi_source()
+            else:
+                rssi = self.scan_cache.get_rssi()
+            if rssi is not None:
+                self.record_rssi(rssi)
+        except Exception as e:
+            print("Arka plan RSSI hatasi:", e)
+        
+        return self._publish_features()
+    
+    def _publish_features(self):
+        """Özellikleri hesapla ve latest_features olarak yayınla"""
+        features = self.get_features()
+        self.latest_features = features
+        self.latest_features_time = time.ticks_ms()
+        self.latest_features_version = self.record_version
+        return features
+    
+    def get_latest_features(self, max_age_ms=FEATURES_MAX_AGE_MS):
+        """
+        Zamanlayıcı için özellikler: yayınlanan görüntü (arka plan görevi veya
+        önceki çağrı) o zamandan beri kayıt eklenmediyse ve max_age_ms'ten
+        yeni ise yeniden hesaplanmadan döndürülür, değilse get_features()
+        ile yenilenip yayınlanır
+        
+        Returns:
+            dict: get_features() ile aynı sözlük (değiştirilmemeli)
+        """
+        latest_time = self.latest_features_time
+        if (self.latest_features is not None
+                and self.latest_features_version == self.record_version
+                and time.ticks_diff(time.ticks_ms(), latest_time) <= max_age_ms):
+            return self.latest_features
+        return self._publish_features()
+    
+    async def run_background_scan(self, interval_ms=None, rssi_source=None):
+        """
+        Arka plan tarama görevi: tarama ve RSSI'yi kendi periyodunda yeniler.
+        Görev çalışırken get_features() ve ScanCache okumaları tarama yapmaz,
+        zamanlayıcı get_latest_features() ile son yayınlanan görüntüyü okur.
+        
+        Not: wlan.scan() engelleyen bir çağrıdır ve bu görev içinde event
+        loop üzerinde çalışır; tarama süresince (~1-2 s) gönderim zamanlayıcıları
+        ve ACK dinleyicisi de bekler. Görev taramayı gönderim yolundan çıkarır
+        ve periyodunu sabitler, taramanın kendisini bloklamasız yapmaz.
+        
+        Args:
+            interval_ms: Yenileme periyodu (None ise scan_interval_ms)
+            rssi_source: RSSI döndüren fonksiyon (refresh_snapshot'a bakın)
+        """
+        if interval_ms is None:
+            interval_ms = self.scan_interval_ms
+        if self.scan_cache is None:
+            self.scan_cache = ScanCache(ttl_ms=self.scan_interval_ms)
+        
+        self.background_scan = True
+        self.scan_cache.auto_scan = False
+        try:
+            while self.background_scan:
+                try:
+                    self.refresh_snapshot(rssi_source)
+                except Exception as e:
+                    print("Arka plan tarama hatasi:", e)
+                await sleep_ms(interval_ms)
+        finally:
+            self.background_scan = False
+            self.scan_cache.auto_scan = True
+    
+    def start_background_scan(self, interval_ms=None, rssi_source=None):
+        """
+        Arka plan tarama görevini çalışan event loop'a ekle
+        (asyncio.run / uasyncio.run içinden çağrılmalı)
+        
+        Returns:
+            Task veya None (uasyncio/asyncio yoksa)
+        """
+        if asyncio is None:
+            print("UYARI: uasyncio bulunamadi, arka plan tarama devre disi")
+            return None
+        self.background_task = create_task(
+            self.run_background_scan(interval_ms, rssi_source))
+        return self.background_task
+    
+    def stop_background_scan(self):
+        """Arka plan görevini durdur (mevcut bekleme bittikten sonra çıkar)"""
+        self.background_scan = False
+        if self.scan_cache is not None:
+            self.scan_cache.auto_scan = True
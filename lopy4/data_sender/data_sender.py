@@ -6,10 +6,38 @@ import socket
 import time
 import json
 import ubinascii
+import logger
+import profiler
+from logger import const
 from wifi_manager import WiFiManager
+from async_compat import asyncio, wait_for_ms, recv_datagram, sleep_ms, create_task
+from wire_protocol import (encode_packet, decode_ack, is_binary, encode_batch_record,
+                           encode_batch, BATCH_HEADER_SIZE, MAX_BATCH_RECORDS)
+
+# Paket başına debug çıktıları (1: derlenir, 0: derleme zamanında atılır)
+_DEBUG = const(0)
+
+# Paket formatı: 'bin' (ikili, wire_protocol) veya 'json' (eski sunucular için)
+WIRE_FORMAT = 'bin'
+
+# Paket sıra numarası 16 bit (sarar)
+SEQ_MASK = 0xFFFF
+# Aynı anda ACK bekleyen en fazla paket (dolarsa en eskisi zaman aşımı sayılır)
+MAX_PENDING_ACKS = 32
+# ACK zaman aşımı (ms)
+ACK_TIMEOUT_MS = 500
+
+# Toplu gönderim (opt-in, sadece WIRE_FORMAT = 'bin'): okumalar tek datagramda
+# toplanır, sunucu tek bir toplu ACK (başarı bitmap'i) döndürür
+BATCH_MODE = False
+BATCH_MAX_RECORDS = 8        # Toplu paketteki en fazla okuma (<= 32)
+BATCH_MTU_BYTES = 512        # Datagram boyut bütçesi (byte)
+BATCH_MAX_AGE_MS = 5000      # En eski okuma bu süreden uzun beklerse gönder
+BATCH_FLUSH_PRIORITY = 3     # Bu öncelik ve üstü hemen gönderilir
 
 class DataSender:
-    def __init__(self, device_id, channel_monitor, server_ip="10.236.55.246", server_port=5000):
+    def __init__(self, device_id, channel_monitor, server_ip="10.236.55.246", server_port=5000, scan_cache=None,
+                 on_result=None):
         """
         Veri gönderici
 
@@ -18,13 +46,37 @@ class DataSender:
             channel_monitor: ChannelMonitor instance
             server_ip: Sunucu IP adresi
             server_port: Sunucu port numarası
+            scan_cache: Paylaşılan ScanCache (None ise channel_monitor'unki kullanılır)
+            on_result: send_data_nowait sonuçları için geri çağırma
+                       on_result(seq, success, delay_used)
         """
         self.device_id = device_id
         self.channel_monitor = channel_monitor
+        self.scan_cache = scan_cache
         self.server_ip = server_ip
         self.server_port = server_port
         self.socket = None
 
+        # Paket sıra numarası ve ACK bekleyen paketler: seq -> (gönderim zamanı, delay_used)
+        self.next_seq = 0
+        self.pending_acks = {}
+        self.ack_timeout_ms = ACK_TIMEOUT_MS
+        self.on_result = on_result
+        self.ack_listener_running = False
+        self.ack_listener_task = None
+        self.ack_stats = {'acked': 0, 'timeouts': 0, 'late': 0}
+
+        # Toplu gönderim tamponu (kayıtların seq'leri batch_base_seq'ten ardışık)
+        self.batch_mode = BATCH_MODE and WIRE_FORMAT == 'bin'
+        if BATCH_MODE and not self.batch_mode:
+            print("UYARI: Toplu gonderim sadece ikili formatta destekleniyor, devre disi")
+        self.batch_max_records = min(BATCH_MAX_RECORDS, MAX_BATCH_RECORDS)
+        self.batch_records = []
+        self.batch_delays = []
+        self.batch_base_seq = 0
+        self.batch_bytes = BATCH_HEADER_SIZE
+        self.batch_started = None
+
     def _connect(self):
         """Sunucuya bağlan"""
         try:
@@ -44,12 +96,13 @@ class DataSender:
             print("Socket olusturma hatasi:", e)
             return False
 
-    def _wait_for_ack(self, timeout_ms=500):
+    def _wait_for_ack(self, timeout_ms=500, seq=None):
         """
         Sunucudan ACK paketi bekle
 
         Args:
             timeout_ms: Maksimum bekleme süresi (ms)
+            seq: Beklenen paket sıra numarası (None ise ilk ACK)
 
         Returns:
             tuple: (success, collision_detected) veya (None, None) timeout ise
@@ -57,6 +110,7 @@ class DataSender:
         if self.socket is None:
             return (None, None)
 
+        start_us = profiler.ticks()
         start_time = time.ticks_ms()
         max_iterations = timeout_ms // 10 + 1  # Maksimum iterasyon sayısı (güvenlik için)
         iteration = 0
@@ -73,29 +127,93 @@ class DataSender:
             try:
                 # Non-blocking recvfrom (socket timeout ile)
                 data, addr = self.socket.recvfrom(1024)
-                try:
-                    ack = json.loads(data.decode('utf-8'))
-                    if ack.get('type') == 'ack' and ack.get('device_id') == self.device_id:
-                        success = ack.get('success', 1) == 1
-                        collision_detected = ack.get('collision_detected', 0) == 1
-                        return (success, collision_detected)
-                except:
-                    pass
+                result = self._parse_ack(data)
+                if self._ack_matches(result, seq):
+                    profiler.record(profiler.STAGE_ACK_WAIT, start_us)
+                    return result[1:]
             except Exception as e:
                 # Timeout veya başka hata - kısa bir bekle ve devam et
                 time.sleep_ms(10)  # 10ms bekle
                 continue
 
+        profiler.record(profiler.STAGE_ACK_WAIT, start_us)
         return (None, None)  # Timeout
 
-    def send_data(self, data_age, priority, delay_used=0, data=None):
+    def _parse_ack(self, data):
         """
-        Veri gönder (Garantili Versiyon)
+        ACK paketini çözümle
+
+        Returns:
+            tuple: (seq, success, collision_detected) veya bu cihaza ait ACK
+                   değilse None (seq, eski sunucularda None)
+        """
+        try:
+            if is_binary(data):
+                ack = decode_ack(data)
+                if ack is None:
+                    return None
+            else:
+                ack = json.loads(data.decode('utf-8'))
+            if ack.get('type') == 'ack' and ack.get('device_id') == self.device_id:
+                success = ack.get('success', 1) == 1
+                collision_detected = ack.get('collision_detected', 0) == 1
+                return (ack.get('seq'), success, collision_detected)
+        except:
+            pass
+        return None
+
+    def _ack_matches(self, result, seq):
+        """ACK beklenen pakete mi ait (seq yoksa eski davranış: ilk ACK kabul)"""
+        if result is None:
+            return False
+        return seq is None or result[0] is None or result[0] == seq
+
+    async def _recv_ack(self, seq=None):
+        """Bu pakete ait ACK gelene kadar bekle (soket okunabilir olunca uyanır)"""
+        while True:
+            data = await recv_datagram(self.socket, 1024)
+            result = self._parse_ack(data)
+            if self._ack_matches(result, seq):
+                return result[1:]
+
+    async def _wait_for_ack_async(self, timeout_ms=500, seq=None):
+        """
+        Sunucudan ACK paketi bekle (async, 10ms polling yok)
+
+        Args:
+            timeout_ms: Maksimum bekleme süresi (ms)
+            seq: Beklenen paket sıra numarası (None ise ilk ACK)
+
+        Returns:
+            tuple: (success, collision_detected) veya (None, None) timeout ise
         """
         if self.socket is None:
-            if not self._connect():
-                return False
+            return (None, None)
+        start = profiler.ticks()
+        try:
+            return await wait_for_ms(self._recv_ack(seq), timeout_ms)
+        except asyncio.TimeoutError:
+            return (None, None)
+        except Exception as e:
+            logger.error("ACK bekleme hatasi:", e)
+            return (None, None)
+        finally:
+            profiler.record(profiler.STAGE_ACK_WAIT, start)
+
+    def _take_seq(self):
+        """Sonraki paket sıra numarasını al"""
+        seq = self.next_seq
+        self.next_seq = (seq + 1) & SEQ_MASK
+        return seq
+
+    def _collect_packet(self, data_age, priority, delay_used=0, data=None, seq=None):
+        """
+        Gerçek kanal değerleriyle paket sözlüğünü oluştur
+        (seq verilirse pakete eklenir, sunucu ACK'da geri gönderir)
 
+        Returns:
+            dict: Paket alanları
+        """
         # --- GERÇEK DEĞERLERİ ALMA ---
         # Önce gerçek değerleri almaya çalış, varsayılan değerleri sadece son çare olarak kullan
         rssi_value = None
@@ -111,73 +229,46 @@ class DataSender:
                 collision_rate = self.channel_monitor.get_collision_rate()
                 neighbor_count = self.channel_monitor.get_neighbor_count()
         except Exception as e:
-            print("Kanal bilgisi alma hatasi:", e)
+            logger.error("Kanal bilgisi alma hatasi:", e)
 
-        # Eğer RSSI yoksa WiFi'den direkt almayı dene (scan kullanarak)
+        # Eğer RSSI yoksa paylaşılan tarama önbelleğinden al (ayrı scan yapılmaz)
         if rssi_value is None:
             try:
-                import network
-                wlan = network.WLAN()
-                if wlan.isconnected():
-                    # Pycom LoPy4'te rssi() metodu yok, scan kullanmalıyız
-                    networks = wlan.scan()
-                    if len(networks) > 0:
-                        # En yüksek RSSI değerini bul (genellikle bağlı olduğumuz ağ)
-                        # Pycom LoPy4 formatı: (ssid, bssid, sec, channel, rssi)
-                        # RSSI 4. indekste (net[4]) veya named tuple ise net.rssi
-                        max_rssi = -100
-                        for net in networks:
-                            try:
-                                # Named tuple veya tuple olabilir
-                                if hasattr(net, 'rssi'):
-                                    # Named tuple: net.rssi kullan
-                                    rssi_val = net.rssi
-                                elif len(net) >= 5:
-                                    # Tuple: RSSI 4. indekste
-                                    rssi_val = net[4]
-                                else:
-                                    continue
-
-                                # RSSI negatif olmalı (dBm)
-                                if isinstance(rssi_val, int) and rssi_val < 0:
-                                    if rssi_val > max_rssi:
-                                        max_rssi = rssi_val
-                            except (IndexError, AttributeError, TypeError):
-                                continue
-
-                        # RSSI negatif olmalı
-                        if max_rssi > -100:
-                            rssi_value = max_rssi
-                            # RSSI'yi channel_monitor'a da kaydet
-                            if self.channel_monitor and rssi_value is not None:
-                                self.channel_monitor.record_rssi(rssi_value)
+                scan_cache = self.scan_cache
+                if scan_cache is None and self.channel_monitor:
+                    scan_cache = self.channel_monitor.scan_cache
+                if scan_cache is not None:
+                    rssi_value = scan_cache.get_rssi()
+                    # RSSI'yi channel_monitor'a da kaydet
+                    if self.channel_monitor and rssi_value is not None:
+                        self.channel_monitor.record_rssi(rssi_value)
             except Exception as e:
-                print("WiFi RSSI alma hatasi:", e)
+                logger.error("WiFi RSSI alma hatasi:", e)
 
         # Son çare olarak varsayılan değerleri kullan (sadece gerçek değerler yoksa)
         if rssi_value is None:
             rssi_value = -90
-            print("UYARI: RSSI degeri bulunamadi, varsayilan deger kullaniliyor:", rssi_value)
-        else:
-            print("GERCEK RSSI:", rssi_value)
+            logger.warning("UYARI: RSSI degeri bulunamadi, varsayilan deger kullaniliyor:", rssi_value)
+        elif _DEBUG:
+            logger.debug("GERCEK RSSI:", rssi_value)
 
         if channel_occupancy is None:
             channel_occupancy = 0.0
-            print("UYARI: Channel occupancy bulunamadi, varsayilan deger kullaniliyor:", channel_occupancy)
-        else:
-            print("GERCEK Channel Occupancy:", channel_occupancy)
+            logger.warning("UYARI: Channel occupancy bulunamadi, varsayilan deger kullaniliyor:", channel_occupancy)
+        elif _DEBUG:
+            logger.debug("GERCEK Channel Occupancy:", channel_occupancy)
 
         if collision_rate is None:
             collision_rate = 0.0
-            print("UYARI: Collision rate bulunamadi, varsayilan deger kullaniliyor:", collision_rate)
-        else:
-            print("GERCEK Collision Rate:", collision_rate)
+            logger.warning("UYARI: Collision rate bulunamadi, varsayilan deger kullaniliyor:", collision_rate)
+        elif _DEBUG:
+            logger.debug("GERCEK Collision Rate:", collision_rate)
 
         if neighbor_count is None:
             neighbor_count = 0
-            print("UYARI: Neighbor count bulunamadi, varsayilan deger kullaniliyor:", neighbor_count)
-        else:
-            print("GERCEK Neighbor Count:", neighbor_count)
+            logger.warning("UYARI: Neighbor count bulunamadi, varsayilan deger kullaniliyor:", neighbor_count)
+        elif _DEBUG:
+            logger.debug("GERCEK Neighbor Count:", neighbor_count)
         # --- GERÇEK DEĞERLERİ ALMA BİTİŞİ ---
 
         # Veri paketi oluştur
@@ -193,55 +284,397 @@ class DataSender:
             'neighbor_count': neighbor_count,       # Artık kesinlikle sayı
             'data': data or self._generate_sensor_data()
         }
+        if seq is not None:
+            packet['seq'] = seq
+        # Profil özeti periyodik olarak pakete eklenir (sadece ikili format)
+        if WIRE_FORMAT == 'bin' and profiler.report_due():
+            packet['profile'] = profiler.encode_summary()
+        return packet
+
+    def _build_packet(self, data_age, priority, delay_used=0, data=None, seq=None):
+        """
+        Gerçek kanal değerleriyle veri paketini oluştur
 
-        # JSON'a çevir
+        Returns:
+            bytes: Paket (WIRE_FORMAT'a göre ikili veya JSON) veya hata durumunda None
+        """
+        packet = self._collect_packet(data_age, priority, delay_used, data, seq)
+
+        # İkili formata veya JSON'a çevir
         try:
+            if WIRE_FORMAT == 'bin':
+                return encode_packet(packet)
             packet_json = json.dumps(packet)
-            packet_bytes = packet_json.encode('utf-8')
+            return packet_json.encode('utf-8')
         except Exception as e:
-            print("Paket olusturma hatasi:", e)
+            logger.error("Paket olusturma hatasi:", e)
+            return None
+
+    def _transmit(self, packet_bytes, delay_used):
+        """
+        Paketi gönder ve kanal aktivitesini kaydet
+
+        Returns:
+            bool: En az bir byte gönderildiyse True
+        """
+        # print("Paket gonderiliyor...", len(packet_bytes), "byte") # Çok kalabalık etmesin diye kapadım
+        bytes_sent = self.socket.sendto(packet_bytes, (self.server_ip, self.server_port))
+
+        # Gönderim başarılı mı kontrol et
+        if bytes_sent == 0:
+            # Hiç byte gönderilmedi, başarısız
+            if self.channel_monitor:
+                self.channel_monitor.record_transmission(False, delay_used)
             return False
 
-        # Gönder
-        try:
-            # print("Paket gonderiliyor...", len(packet_bytes), "byte") # Çok kalabalık etmesin diye kapadım
-            bytes_sent = self.socket.sendto(packet_bytes, (self.server_ip, self.server_port))
+        # Kanal aktivitesini kaydet
+        if self.channel_monitor:
+            self.channel_monitor.record_channel_activity()
+        return True
 
-            # Gönderim başarılı mı kontrol et
-            if bytes_sent == 0:
-                # Hiç byte gönderilmedi, başarısız
-                if self.channel_monitor:
-                    self.channel_monitor.record_transmission(False, delay_used)
-                return False
+    def _record_ack_result(self, success, collision_detected, delay_used):
+        """
+        ACK sonucunu channel_monitor'a kaydet
 
-            # Kanal aktivitesini kaydet
+        Returns:
+            bool: Gönderim sonucu
+        """
+        if success is not None:
+            # ACK geldi, gerçek sonucu kullan
+            # collision_detected True ise başarısız sayılır
+            actual_success = success and not collision_detected
             if self.channel_monitor:
-                self.channel_monitor.record_channel_activity()
+                self.channel_monitor.record_transmission(actual_success, delay_used)
+            return actual_success
+
+        # ACK gelmedi (timeout), gönderim başarılı olarak varsay
+        # NOT: UDP gönderimi her zaman başarılı görünür
+        if self.channel_monitor:
+            self.channel_monitor.record_transmission(True, delay_used)
+        return True
+
+    def _record_send_error(self, e, delay_used):
+        logger.error("Gonderim hatasi:", e)
+        # Gönderim hatası - başarısız olarak kaydet
+        if self.channel_monitor:
+            self.channel_monitor.record_transmission(False, delay_used)
+        return False
+
+    def send_data(self, data_age, priority, delay_used=0, data=None):
+        """
+        Veri gönder (Garantili Versiyon)
+        """
+        if self.socket is None:
+            if not self._connect():
+                return False
+
+        start = profiler.ticks()
+        seq = self._take_seq()
+        packet_bytes = self._build_packet(data_age, priority, delay_used, data, seq)
+        if packet_bytes is None:
+            return False
+
+        try:
+            sent = self._transmit(packet_bytes, delay_used)
+            profiler.record(profiler.STAGE_SEND, start)
+            if not sent:
+                return False
 
             # Sunucudan ACK paketi bekle (gerçek collision bilgisi için)
-            success, collision_detected = self._wait_for_ack(timeout_ms=500)
-
-            if success is not None:
-                # ACK geldi, gerçek sonucu kullan
-                # collision_detected True ise başarısız sayılır
-                actual_success = success and not collision_detected
-                if self.channel_monitor:
-                    self.channel_monitor.record_transmission(actual_success, delay_used)
-                return actual_success
-            else:
-                # ACK gelmedi (timeout), gönderim başarılı olarak varsay
-                # NOT: UDP gönderimi her zaman başarılı görünür
-                if self.channel_monitor:
-                    self.channel_monitor.record_transmission(True, delay_used)
-            return True
+            success, collision_detected = self._wait_for_ack(timeout_ms=self.ack_timeout_ms, seq=seq)
+            return self._record_ack_result(success, collision_detected, delay_used)
+
+        except Exception as e:
+            return self._record_send_error(e, delay_used)
+
+    async def send_data_async(self, data_age, priority, delay_used=0, data=None):
+        """
+        Veri gönder (async): ACK beklerken event loop diğer görevleri çalıştırır
+
+        Returns:
+            bool: Gönderim sonucu
+        """
+        if self.socket is None:
+            if not self._connect():
+                return False
+        # ACK soket okunabilir olunca alınır (non-blocking)
+        self.socket.setblocking(False)
+
+        start = profiler.ticks()
+        seq = self._take_seq()
+        packet_bytes = self._build_packet(data_age, priority, delay_used, data, seq)
+        if packet_bytes is None:
+            return False
+
+        try:
+            sent = self._transmit(packet_bytes, delay_used)
+            profiler.record(profiler.STAGE_SEND, start)
+            if not sent:
+                return False
+
+            success, collision_detected = await self._wait_for_ack_async(
+                timeout_ms=self.ack_timeout_ms, seq=seq)
+            return self._record_ack_result(success, collision_detected, delay_used)
 
         except Exception as e:
-            print("Gonderim hatasi:", e)
-            # Gönderim hatası - başarısız olarak kaydet
+            return self._record_send_error(e, delay_used)
+
+    def send_data_nowait(self, data_age, priority, delay_used=0, data=None):
+        """
+        Veri gönder, ACK bekleme (bloklamaz)
+        Paket ACK tablosuna eklenir; sonuç ACK geldiğinde veya zaman aşımında
+        run_ack_listener() / poll_acks() tarafından channel_monitor'a kaydedilir
+        ve on_result(seq, success, delay_used) çağrılır
+
+        Returns:
+            int: Paket sıra numarası veya gönderilemediyse None
+        """
+        if self.socket is None:
+            if not self._connect():
+                return None
+        self.socket.setblocking(False)
+
+        if self.batch_mode:
+            return self._queue_batch(data_age, priority, delay_used, data)
+
+        start = profiler.ticks()
+        seq = self._take_seq()
+        packet_bytes = self._build_packet(data_age, priority, delay_used, data, seq)
+        if packet_bytes is None:
+            return None
+
+        try:
+            sent = self._transmit(packet_bytes, delay_used)
+            profiler.record(profiler.STAGE_SEND, start)
+            if not sent:
+                return None
+        except Exception as e:
+            self._record_send_error(e, delay_used)
+            return None
+
+        self._add_pending(seq, time.ticks_ms(), delay_used)
+        return seq
+
+    def _add_pending(self, seq, sent_time, delay_used):
+        # Tablo doluysa en eski paketi zaman aşımı say
+        if len(self.pending_acks) >= MAX_PENDING_ACKS:
+            self._expire_oldest_ack()
+        self.pending_acks[seq] = (sent_time, delay_used)
+
+    def _queue_batch(self, data_age, priority, delay_used=0, data=None):
+        """
+        Okumayı toplu pakete ekle; öncelik yüksekse, kayıt sayısı veya
+        boyut bütçesi dolarsa ya da en eski okuma bekleme süresini aştıysa gönder
+
+        Returns:
+            int: Okumanın sıra numarası veya hata durumunda None
+        """
+        try:
+            record = encode_batch_record(self._collect_packet(data_age, priority, delay_used, data))
+        except Exception as e:
+            logger.error("Paket olusturma hatasi:", e)
+            return None
+
+        # Boyut bütçesi aşılacaksa önce mevcut tamponu gönder
+        if self.batch_records and self.batch_bytes + len(record) > BATCH_MTU_BYTES:
+            self.flush_batch()
+
+        seq = self._take_seq()
+        if not self.batch_records:
+            self.batch_base_seq = seq
+            self.batch_started = time.ticks_ms()
+        self.batch_records.append(record)
+        self.batch_delays.append(delay_used)
+        self.batch_bytes += len(record)
+
+        if (priority >= BATCH_FLUSH_PRIORITY or
+                len(self.batch_records) >= self.batch_max_records):
+            self.flush_batch()
+        else:
+            self.flush_batch_if_due()
+        return seq
+
+    def flush_batch(self):
+        """
+        Tampondaki okumaları tek datagram olarak gönder ve ACK tablosuna ekle
+
+        Returns:
+            bool: Gönderildiyse True (tampon boşsa False)
+        """
+        if not self.batch_records:
+            return False
+
+        records = self.batch_records
+        delays = self.batch_delays
+        base_seq = self.batch_base_seq
+        self.batch_records = []
+        self.batch_delays = []
+        self.batch_bytes = BATCH_HEADER_SIZE
+        self.batch_started = None
+
+        # _transmit / _record_send_error ilk okumayı kendisi kaydeder;
+        # bağlantı kurulamazsa hiçbiri kaydedilmemiştir
+        unrecorded = delays[1:]
+        if self.socket is None and not self._connect():
+            sent = False
+            unrecorded = delays
+        else:
+            try:
+                start = profiler.ticks()
+                sent = self._transmit(encode_batch(self.device_id, base_seq, records), delays[0])
+                profiler.record(profiler.STAGE_SEND, start)
+            except Exception as e:
+                self._record_send_error(e, delays[0])
+                sent = False
+
+        if not sent:
             if self.channel_monitor:
-                self.channel_monitor.record_transmission(False, delay_used)
+                for delay_used in unrecorded:
+                    self.channel_monitor.record_transmission(False, delay_used)
             return False
 
+        sent_time = time.ticks_ms()
+        for i in range(len(records)):
+            self._add_pending((base_seq + i) & SEQ_MASK, sent_time, delays[i])
+        return True
+
+    def flush_batch_if_due(self):
+        """En eski okuma BATCH_MAX_AGE_MS'den uzun beklediyse tamponu gönder"""
+        if (self.batch_records and
+                time.ticks_diff(time.ticks_ms(), self.batch_started) >= BATCH_MAX_AGE_MS):
+            return self.flush_batch()
+        return False
+
+    def _resolve_ack(self, seq, success, collision_detected):
+        """Bekleyen paketi sonuçlandır ve sonucu kaydet"""
+        sent_time, delay_used = self.pending_acks.pop(seq)
+        # Gönderimden sonuca (ACK veya zaman aşımı) kadar geçen süre
+        profiler.record_us(profiler.STAGE_ACK_WAIT,
+                           time.ticks_diff(time.ticks_ms(), sent_time) * 1000)
+        if success is None:
+            self.ack_stats['timeouts'] += 1
+        else:
+            self.ack_stats['acked'] += 1
+        result = self._record_ack_result(success, collision_detected, delay_used)
+        if self.on_result:
+            self.on_result(seq, result, delay_used)
+        return result
+
+    def _oldest_pending_seq(self):
+        """En eski bekleyen paketin sıra numarası"""
+        oldest_seq = None
+        oldest_time = None
+        for seq, entry in self.pending_acks.items():
+            if oldest_time is None or time.ticks_diff(entry[0], oldest_time) < 0:
+                oldest_seq = seq
+                oldest_time = entry[0]
+        return oldest_seq
+
+    def _expire_oldest_ack(self):
+        seq = self._oldest_pending_seq()
+        if seq is not None:
+            self._resolve_ack(seq, None, None)
+
+    def _handle_batch_ack(self, ack):
+        """Toplu ACK bitmap'ini bekleyen okumalara eşle"""
+        bitmap = ack['success_bitmap']
+        for i in range(ack['count']):
+            seq = (ack['seq'] + i) & SEQ_MASK
+            if seq in self.pending_acks:
+                success = (bitmap >> i) & 1 == 1
+                self._resolve_ack(seq, success, not success)
+            else:
+                self.ack_stats['late'] += 1
+
+    def _handle_ack(self, data):
+        """Gelen ACK'yı bekleyen pakete eşle"""
+        if is_binary(data):
+            ack = decode_ack(data)
+            if ack is not None and ack['type'] == 'batch_ack':
+                if ack['device_id'] == self.device_id:
+                    self._handle_batch_ack(ack)
+                return
+        result = self._parse_ack(data)
+        if result is None:
+            return
+        seq = result[0]
+        if seq is None:
+            # Eski sunucu (seq göndermiyor): en eski bekleyen pakete ait say
+            seq = self._oldest_pending_seq()
+        if seq in self.pending_acks:
+            self._resolve_ack(seq, result[1], result[2])
+        else:
+            # Zaman aşımından sonra gelen veya tekrar eden ACK
+            self.ack_stats['late'] += 1
+
+    def expire_pending_acks(self):
+        """Zaman aşımına uğrayan bekleyen paketleri sonuçlandır"""
+        current_time = time.ticks_ms()
+        expired = [seq for seq, entry in self.pending_acks.items()
+                   if time.ticks_diff(current_time, entry[0]) >= self.ack_timeout_ms]
+        for seq in expired:
+            self._resolve_ack(seq, None, None)
+
+    def _ms_until_next_expiry(self):
+        """En yakın ACK zaman aşımına kalan süre (bekleyen yoksa ack_timeout_ms)"""
+        current_time = time.ticks_ms()
+        remaining = self.ack_timeout_ms
+        for entry in self.pending_acks.values():
+            left = self.ack_timeout_ms - time.ticks_diff(current_time, entry[0])
+            if left < remaining:
+                remaining = left
+        return max(remaining, 1)
+
+    def poll_acks(self):
+        """
+        Gelen ACK'ları bloklamadan işle ve zaman aşımlarını uygula
+        (event loop kullanmayan çağıranlar için)
+        """
+        if self.socket is not None:
+            self.socket.setblocking(False)
+            while True:
+                try:
+                    data, addr = self.socket.recvfrom(1024)
+                except Exception:
+                    break
+                self._handle_ack(data)
+        self.flush_batch_if_due()
+        self.expire_pending_acks()
+
+    async def run_ack_listener(self):
+        """
+        ACK dinleyici görevi: ACK'ları bekleyen paketlere eşler, zaman aşımlarını
+        uygular. Soketin tek okuyucusudur; çalışırken send_data_async kullanılmamalı
+        """
+        self.ack_listener_running = True
+        try:
+            while self.ack_listener_running:
+                if self.socket is None:
+                    await sleep_ms(self.ack_timeout_ms)
+                    continue
+                try:
+                    data = await wait_for_ms(recv_datagram(self.socket, 1024),
+                                             self._ms_until_next_expiry())
+                    self._handle_ack(data)
+                except asyncio.TimeoutError:
+                    pass
+                except Exception as e:
+                    logger.error("ACK dinleme hatasi:", e)
+                    await sleep_ms(10)
+                self.flush_batch_if_due()
+                self.expire_pending_acks()
+        finally:
+            self.ack_listener_running = False
+
+    def start_ack_listener(self):
+        """ACK dinleyici görevini çalışan event loop'a ekle"""
+        self.ack_listener_task = create_task(self.run_ack_listener())
+        return self.ack_listener_task
+
+    def stop_ack_listener(self):
+        """ACK dinleyici görevini durdur"""
+        self.ack_listener_running = False
+
     def _generate_sensor_data(self):
         """Sensör verisi simüle et"""
         import machine
@@ -255,7 +688,14 @@ class DataSender:
         }
 
     def close(self):
-        """Bağlantıyı kapat"""
+        """
+        Bağlantıyı kapat: tamponu gönder, gelmiş ACK'ları işle, hâlâ bekleyen
+        paketleri zaman aşımı olarak sonuçlandır (kaydedilir, on_result çağrılır)
+        """
+        self.flush_batch()
+        self.poll_acks()
+        for seq in list(self.pending_acks):
+            self._resolve_ack(seq, None, None)
         if self.socket:
             self.socket.close()
             self.socket = None
@@ -0,0 +1,68 @@
+"""
+Hafif Loglama
+Seviyeli log fonksiyonları. UART yavaş olduğu için gönderim yolundaki
+ayrıntılı çıktılar iki katmanda kapatılır:
+
+    1. Derleme zamanı: Modül başında _DEBUG = const(0) tanımlanır ve debug
+       çağrıları 'if _DEBUG:' içine yazılır. MicroPython derleyicisi sabit
+       yanlış koşullu bloğu hiç derlemez; argümanlar hesaplanmaz, çağrı yapılmaz
+    2. Çalışma zamanı: LOG_LEVEL altındaki mesajlar yazdırılmaz (set_level)
+
+Kullanım:
+    import logger
+    from logger import const
+
+    _DEBUG = const(0)  # 1 yapılırsa debug çıktıları derlenir
+
+    if _DEBUG:
+        logger.debug("GERCEK RSSI:", rssi)
+    logger.warning("UYARI: RSSI bulunamadi")
+"""
+
+# MicroPython'da const() derleme zamanı sabiti üretir; CPython'da etkisizdir
+try:
+    from micropython import const
+except ImportError:
+    def const(value):
+        return value
+
+# Log seviyeleri
+DEBUG = const(10)
+INFO = const(20)
+WARNING = const(30)
+ERROR = const(40)
+NONE = const(100)  # Hiçbir şey yazdırma
+
+# Varsayılan seviye (DEBUG: her şey, INFO: döngü özeti, WARNING: sadece uyarı/hata)
+LOG_LEVEL = INFO
+
+
+def set_level(level):
+    """Çalışma zamanı log seviyesini değiştir"""
+    global LOG_LEVEL
+    LOG_LEVEL = level
+
+
+def enabled(level):
+    """Bu seviyedeki mesajlar yazdırılacak mı (pahalı argümanlar için)"""
+    return level >= LOG_LEVEL
+
+
+def debug(*args):
+    if LOG_LEVEL <= DEBUG:
+        print(*args)
+
+
+def info(*args):
+    if LOG_LEVEL <= INFO:
+        print(*args)
+
+
+def warning(*args):
+    if LOG_LEVEL <= WARNING:
+        print(*args)
+
+
+def error(*args):
+    if LOG_LEVEL <= ERROR:
+        print(*args)
@@ -5,6 +5,9 @@ LoPy4 Ana Program
 
 import time
 import machine
+import logger
+import profiler
+from logger import const
 # MicroPython'da rastgele sayı üretimi
 try:
     import urandom as random_module
@@ -27,6 +30,12 @@ from wifi_manager import WiFiManager
 from channel_monitor import ChannelMonitor
 from data_sender import DataSender
 from ml_scheduler import MLScheduler
+from async_compat import asyncio, sleep_ms, run
+
+# Döngü başına ayrıntılı çıktılar (1: derlenir, 0: derleme zamanında atılır)
+_DEBUG = const(0)
+# Çalışma zamanı log seviyesi (logger.DEBUG, INFO, WARNING, ERROR veya NONE)
+logger.set_level(logger.INFO)
 
 # Cihaz ID ayarla (her cihaz için farklı)
 # ÖNEMLİ: Her LoPy4 cihazında bu değeri MANUEL olarak değiştir!
@@ -55,18 +64,21 @@ else:
         print("Unique ID bytes:", unique_id_bytes)
         print("Otomatik Device ID:", DEVICE_ID)
 
-def main():
-    print("LoPy4 Adaptif Veri İletimi Baslatiyor...")
-    print("Cihaz ID:", DEVICE_ID)
+def setup():
+    """
+    Modülleri başlat
 
+    Returns:
+        tuple: (wifi, channel_monitor, data_sender, scheduler) veya WiFi yoksa None
+    """
     # WiFi bağlantısı
     wifi = WiFiManager()
     if not wifi.connect():
         print("WiFi bağlantısı başarısız!")
-        return
+        return None
 
-    # Kanal izleme başlat
-    channel_monitor = ChannelMonitor(device_id=DEVICE_ID)
+    # Kanal izleme başlat (WiFiManager ile aynı tarama önbelleğini paylaşır)
+    channel_monitor = ChannelMonitor(device_id=DEVICE_ID, scan_cache=wifi.scan_cache)
     channel_monitor.start()
 
     # RSSI ölçümünü başlat (periyodik olarak RSSI kaydet)
@@ -98,7 +110,8 @@ def main():
     # Veri gönderici
     data_sender = DataSender(
         device_id=DEVICE_ID,
-        channel_monitor=channel_monitor
+        channel_monitor=channel_monitor,
+        scan_cache=wifi.scan_cache
     )
 
     # ML tabanlı zamanlayıcı
@@ -115,7 +128,13 @@ def main():
     else:
         print("UYARI: ML modeli yuklenemedi, varsayilan delay (500ms) kullanilacak")
 
-    # Ana döngü
+    return wifi, channel_monitor, data_sender, scheduler
+
+async def send_loop(wifi, channel_monitor, data_sender, scheduler):
+    """
+    Gönderim döngüsü: sonraki gönderim zamanı, ML gecikmesi ve ACK beklemesi
+    zamanlayıcı / coroutine olarak beklenir; aradaki sürede CPU uyur
+    """
     # Rastgele aralık ayarları (ms cinsinden)
     # ÇARPışMA OLUŞTURMAK İÇİN: Çok daha sık gönder (200-800ms)
     # Test için: 1000-4000ms arası rastgele (1-4 saniye)
@@ -133,45 +152,37 @@ def main():
     # İlk veri gönderim zamanını ayarla
     # İlk gönderim hemen yapılacak
     last_data_time = 0  # İlk gönderim için 0 (data_age=0 olacak)
-    first_send = True  # İlk gönderim flag'i
+    next_send_time = time.ticks_ms()
 
     print("Ana dongu basladi, ilk veri hemen gonderilecek...")
 
-    loop_count = 0
     while True:
-        loop_count += 1
-        current_time_ms = time.ticks_ms()
-
-        # İlk gönderim için özel kontrol
-        if first_send:
-            time_diff = data_interval_ms  # Hemen gönder
-        else:
-            # Zaman farkını hesapla (overflow güvenli)
-            time_diff = time.ticks_diff(current_time_ms, next_send_time)
-
-            # Negatif ise henüz zaman gelmemiş
-            if time_diff < 0:
-                # Henüz zaman gelmemiş, kısa bekle ve devam et
-                time.sleep_ms(10)
-                # Her 1000 döngüde bir durum yazdır
-                if loop_count % 1000 == 0:
-                    print("Dongu calisiyor - Loop:", loop_count, "Bekleniyor... Time diff:", time_diff, "ms")
-                continue
+        # Sonraki gönderim zamanına kadar uyu (overflow güvenli)
+        # 10ms polling yerine tek bir zamanlayıcı beklenir
+        wait_ms = time.ticks_diff(next_send_time, time.ticks_ms())
+        if wait_ms > 0:
+            await sleep_ms(wait_ms)
 
         # Zaman geldi, veri gönder
-        print("Veri gonderim zamani geldi! Time diff:", time_diff, "ms")
+        if _DEBUG:
+            logger.debug("Veri gonderim zamani geldi!")
+        # Yeni gönderim döngüsü: arka plan görevi durmuşsa (auto_scan=True)
+        # okumalar bu döngüde en fazla bir kez tarar
+        wifi.scan_cache.begin_cycle()
         # Veri üret (simülasyon)
         data_age = 0  # Yeni üretilen veri
         # Öncelik seviyesini rastgele seç (1-3 arası)
         priority = random_module.randint(1, 3)
 
         # ML modelinden optimal bekleme süresini al
+        # (kanal özellikleri arka plan taramasının son görüntüsünden, bloklanmadan)
         optimal_delay = scheduler.get_optimal_delay(
             data_age=data_age,
             priority=priority
         )
 
-        print("Optimal gecikme:", optimal_delay, "ms")
+        if _DEBUG:
+            logger.debug("Optimal gecikme:", optimal_delay, "ms")
 
         # Bekleme süresini uygula
         # NOT: Model tahminlerini kullanmak için maksimum delay sınırını kaldırdık
@@ -181,18 +192,11 @@ def main():
         actual_delay = optimal_delay
 
         if actual_delay > 0:
-            print("Bekleme suresi uygulaniyor:", actual_delay, "ms")
-            time.sleep_ms(int(actual_delay))
-        else:
-            print("Bekleme suresi 0, hemen gonderiliyor")
-
-        # RSSI ölçümü yap ve kaydet
-        try:
-            rssi = wifi.get_rssi()
-            if rssi:
-                channel_monitor.record_rssi(rssi)
-        except:
-            pass
+            if _DEBUG:
+                logger.debug("Bekleme suresi uygulaniyor:", actual_delay, "ms")
+            await sleep_ms(int(actual_delay))
+        elif _DEBUG:
+            logger.debug("Bekleme suresi 0, hemen gonderiliyor")
 
         # Veriyi gönder
         # Gönderim zamanını delay'den SONRA al (gerçek gönderim zamanı)
@@ -203,22 +207,26 @@ def main():
         # Negatif ise overflow olmuş, 0 yap
         if actual_data_age < 0:
             actual_data_age = 0
-        print("Veri gonderiliyor - Data Age:", actual_data_age,
-              "Priority:", priority, "Delay:", optimal_delay)
-        success = data_sender.send_data(
+        if _DEBUG:
+            logger.debug("Veri gonderiliyor - Data Age:", actual_data_age,
+                         "Priority:", priority, "Delay:", optimal_delay)
+        # ACK beklenmez: sonuç ACK dinleyicisi tarafından on_result ile bildirilir,
+        # böylece birden fazla paket aynı anda ACK bekleyebilir
+        seq = data_sender.send_data_nowait(
             data_age=actual_data_age,
             priority=priority,
             delay_used=optimal_delay  # Kullanılan gecikmeyi gönder
         )
-        print("Gonderim sonucu:", "BASARILI" if success else "BASARISIZ")
-
-        # Sonucu scheduler'a da kaydet (ML için)
-        # Not: Gerçek gönderim sonucu data_sender içinde channel_monitor'a kaydediliyor
-        scheduler.record_transmission_result(success, optimal_delay)
+        if seq is None:
+            logger.warning("Gonderim sonucu: BASARISIZ")
+        else:
+            logger.info("Paket gonderildi, seq:", seq, "gecikme:", optimal_delay,
+                        "ms, ACK bekleyen:", len(data_sender.pending_acks))
 
         # Bir sonraki gonderim icin YENI rastgele aralik belirle
         data_interval_ms = random_module.randint(MIN_INTERVAL_MS, MAX_INTERVAL_MS)
-        print("Sonraki gonderim:", data_interval_ms, "ms sonra")
+        if _DEBUG:
+            logger.debug("Sonraki gonderim:", data_interval_ms, "ms sonra")
 
         # Zamanı güncelle (gerçek gönderim zamanını kaydet - delay'den sonra)
         last_data_time = time.ticks_ms()
@@ -227,16 +235,45 @@ def main():
         # Overflow kontrolü: next_send_time çok büyükse resetle
         if next_send_time < last_data_time:  # Overflow
             next_send_time = time.ticks_ms() + data_interval_ms
-        first_send = False  # İlk gönderim tamamlandı
-        print("DEBUG: last_data_time=", last_data_time, "next_send_time=", next_send_time, "data_interval_ms:", data_interval_ms)
+        if _DEBUG:
+            logger.debug("DEBUG: last_data_time=", last_data_time, "next_send_time=", next_send_time, "data_interval_ms:", data_interval_ms)
+
+async def main_async(wifi, channel_monitor, data_sender, scheduler):
+    """Arka plan kanal taramasını ve gönderim döngüsünü başlat"""
+    # Tarama ve RSSI ölçümü gönderim yolundan çıkarılır, kendi periyodunda yapılır
+    channel_monitor.start_background_scan(rssi_source=wifi.get_rssi)
+
+    def on_result(seq, success, delay_used):
+        logger.info("Gonderim sonucu: seq", seq, "BASARILI" if success else "BASARISIZ")
+        # Sonucu scheduler'a da kaydet (ML için)
+        # Not: Gerçek gönderim sonucu data_sender içinde channel_monitor'a kaydediliyor
+        scheduler.record_transmission_result(success, delay_used)
+
+    # ACK'lar paket sıra numarasıyla eşlenir, sonuçlar gönderim döngüsünü bloklamaz
+    data_sender.on_result = on_result
+    data_sender.start_ack_listener()
+    await send_loop(wifi, channel_monitor, data_sender, scheduler)
+
+def main():
+    print("LoPy4 Adaptif Veri İletimi Baslatiyor...")
+    print("Cihaz ID:", DEVICE_ID)
+
+    components = setup()
+    if components is None:
+        return
+
+    if asyncio is None:
+        print("HATA: uasyncio bulunamadi, ana dongu baslatilamiyor")
+        return
 
-        # Kısa bir bekleme (döngüyü yavaşlat)
-        time.sleep_ms(10)  # 10ms bekle (daha hızlı kontrol için)
+    run(main_async(*components))
 
 if __name__ == "__main__":
     try:
         main()
     except KeyboardInterrupt:
         print("Program sonlandırılıyor...")
+        # Son özetten bu yana ölçülen aşama süreleri
+        profiler.print_summary()
     except Exception as e:
         print("Hata:", e)
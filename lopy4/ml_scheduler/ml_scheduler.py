@@ -5,13 +5,224 @@ Random Forest modeli ile optimal delay tahmini
 SCHEDULER_MODE:
     0 -> Kural tabanlı zamanlama
     1 -> ML tabanlı zamanlama
+
+MODEL_FORMAT:
+    'json' -> model_micropython.json (ağaçlar yüklemede düz dizilere derlenir)
+    'bin'  -> model_micropython.bin (server/model_exporter.py ile üretilir)
+    'flash' -> model_micropython.bin flash üzerinde kalır, düğümler ihtiyaç
+               anında okunur (RAM'e sığmayan büyük ormanlar için)
+    'py'   -> model_compiled.py / .mpy (if/else kaynak koduna derlenmiş orman,
+              yükleme bir import'tur)
+    'lut'  -> model_delay.lut (önceden hesaplanmış delay tablosu, O(1) arama,
+              ağaç değerlendirmesi yok)
 """
 
 import time
+import logger
+import profiler
+from logger import const
+
+# Tahmin başına debug çıktıları (1: derlenir, 0: derleme zamanında atılır)
+_DEBUG = const(0)
+
+# MicroPython'da array modülü bazı portlarda uarray adıyla gelir
+try:
+    from array import array
+except ImportError:
+    from uarray import array
+
+try:
+    import ustruct as struct
+except ImportError:
+    import struct
 
 # Zamanlayıcı modu (0: kural tabanlı, 1: ML tabanlı)
 SCHEDULER_MODE = 1
 
+# Model dosya formatı ('json', 'bin', 'flash', 'py' veya 'lut') ve varsayılan yollar
+MODEL_FORMAT = 'json'
+MODEL_PATHS = {
+    'json': 'models/model_micropython.json',
+    'bin': 'models/model_micropython.bin',
+    'flash': 'models/model_micropython.bin',
+    'py': 'models/model_compiled.py',
+    'lut': 'models/model_delay.lut',
+}
+
+# İkili model formatı (bkz. server/model_exporter.py)
+BINARY_MODEL_MAGIC = b'RFMB'
+BINARY_MODEL_VERSION = 1
+BINARY_NODE_SIZE = 8
+BINARY_CHUNK_NODES = 64  # Akış okumasında tek seferde okunan düğüm sayısı
+
+# Delay tablosu formatı (bkz. server/model_exporter.py)
+LUT_MAGIC = b'RFLT'
+LUT_VERSION = 1
+
+# Tahmin önbelleği: kayıt sayısı (0: kapalı) ve tahliye politikası ('lru' veya 'fifo')
+# Anahtar, her özelliğin modelin eşik değerleri arasındaki aralık indeksidir;
+# aynı anahtarlı vektörler tüm ağaçlarda aynı yolu izler (tahmin birebir aynı)
+PREDICTION_CACHE_SIZE = 64
+PREDICTION_CACHE_EVICTION = 'lru'
+# Flash modunda kapalı: anahtar için tüm eşikler RAM'e okunmalı, bu da flash
+# modunun RAM tasarrufunu ortadan kaldırır (model RAM'e sığıyorsa 'bin' kullanın)
+FLASH_PREDICTION_CACHE = False
+
+# Flash modu: blok başına düğüm sayısı ve LRU önbellekteki blok sayısı
+FLASH_BLOCK_NODES = 16
+FLASH_CACHE_BLOCKS = 8
+
+
+def _read_binary_header(f):
+    """
+    İkili model başlığını, özellik isimlerini ve kök indekslerini oku
+
+    Args:
+        f: 'rb' modunda açık model dosyası
+
+    Returns:
+        tuple: (n_nodes, feature_names, roots) veya geçersiz dosyada None
+    """
+    magic, version, n_features, n_trees, n_nodes, _ = struct.unpack('<4sBBHHH', f.read(12))
+    if magic != BINARY_MODEL_MAGIC or version != BINARY_MODEL_VERSION:
+        return None
+
+    feature_names = []
+    for _ in range(n_features):
+        name_len = f.read(1)[0]
+        feature_names.append(f.read(name_len).decode('utf-8'))
+
+    roots = array('H')
+    root_bytes = f.read(2 * n_trees)
+    for i in range(n_trees):
+        roots.append(struct.unpack_from('<H', root_bytes, 2 * i)[0])
+
+    return (n_nodes, feature_names, roots)
+
+
+def _threshold_bucket(thresholds, x):
+    """Sıralı eşik listesinde x'ten küçük eşik sayısı (ikili arama)"""
+    lo = 0
+    hi = len(thresholds)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if thresholds[mid] < x:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class FlashForest:
+    """
+    Flash üzerindeki ikili modeli lazy değerlendirir
+    Sadece ziyaret edilen düğümler okunur; düğüm blokları küçük bir LRU
+    önbellekte tutulur (kök bloklar her tahminde kullanıldığı için sıcak kalır)
+    """
+
+    def __init__(self, bin_path, block_nodes=FLASH_BLOCK_NODES, cache_blocks=FLASH_CACHE_BLOCKS):
+        self.file = open(bin_path, 'rb')
+        header = _read_binary_header(self.file)
+        if header is None:
+            self.file.close()
+            raise ValueError("Gecersiz ikili model (magic/versiyon)")
+
+        self.n_nodes, self.feature_names, self.roots = header
+        self.nodes_offset = self.file.tell()
+        self.block_nodes = block_nodes
+
+        # Önceden ayrılmış blok tamponları (tahmin sırasında allocation yok)
+        self.buffers = [bytearray(BINARY_NODE_SIZE * block_nodes) for _ in range(cache_blocks)]
+        self.block_slots = {}  # blok no -> tampon indeksi
+        self.lru = []          # blok numaraları, en son kullanılan sonda
+
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _load_block(self, block):
+        """Bloğu önbellekten döndür, yoksa flash'tan oku (LRU tahliye)"""
+        slot = self.block_slots.get(block)
+        if slot is not None:
+            self.cache_hits += 1
+            if self.lru[-1] != block:
+                self.lru.remove(block)
+                self.lru.append(block)
+            return self.buffers[slot]
+
+        self.cache_misses += 1
+        if len(self.lru) < len(self.buffers):
+            slot = len(self.lru)
+        else:
+            evicted = self.lru.pop(0)
+            slot = self.block_slots.pop(evicted)
+
+        buf = self.buffers[slot]
+        self.file.seek(self.nodes_offset + block * self.block_nodes * BINARY_NODE_SIZE)
+        self.file.readinto(buf)
+        self.block_slots[block] = slot
+        self.lru.append(block)
+        return buf
+
+    def predict(self, feature_vector):
+        """
+        Tüm ağaçların ortalama tahmini
+
+        Args:
+            feature_vector: Özellik vektörü (feature_names sırasında)
+
+        Returns:
+            float: Ortalama tahmin
+        """
+        block_nodes = self.block_nodes
+        total = 0.0
+        for node in self.roots:
+            while True:
+                buf = self._load_block(node // block_nodes)
+                feat, _, right, number = struct.unpack_from(
+                    '<bBHf', buf, (node % block_nodes) * BINARY_NODE_SIZE)
+                if feat < 0:
+                    total += number
+                    break
+                # Sol çocuk preorder'da hemen sonraki düğüm
+                node = node + 1 if feature_vector[feat] <= number else right
+
+        tree_count = len(self.roots)
+        return total / tree_count if tree_count else 500.0
+
+    def collect_thresholds(self, n_features):
+        """
+        Her özellik için modeldeki eşik değerlerini topla (tek sıralı okuma)
+
+        Returns:
+            list: Özellik başına sıralı eşik listesi
+        """
+        sets = [set() for _ in range(n_features)]
+        buf = self.buffers[0]
+        self.file.seek(self.nodes_offset)
+        index = 0
+        while index < self.n_nodes:
+            count = self.file.readinto(buf)
+            if not count:
+                break
+            for offset in range(0, count - count % BINARY_NODE_SIZE, BINARY_NODE_SIZE):
+                feat, _, _, number = struct.unpack_from('<bBHf', buf, offset)
+                if feat >= 0:
+                    sets[feat].add(number)
+                index += 1
+                if index >= self.n_nodes:
+                    break
+
+        # Tampon 0 üzerine yazıldı, önbelleği sıfırla
+        self.block_slots = {}
+        self.lru = []
+        return [sorted(values) for values in sets]
+
+    def close(self):
+        """Model dosyasını kapat"""
+        if self.file:
+            self.file.close()
+            self.file = None
+
 
 class MLScheduler:
     def __init__(self, device_id, channel_monitor, model_path=None):
@@ -37,7 +248,29 @@ class MLScheduler:
         self.feature_names = None
         self.model_loaded = False
 
-        # ML MODEL YÜKLEME - Sadece JSON formatı kullanılıyor
+        # Düzleştirilmiş ağaç dizileri (load_json_model sonrası derlenir)
+        # (feature, threshold, left, right, value, roots) veya None
+        self.flat_model = None
+
+        # Flash üzerinden lazy değerlendirilen model (MODEL_FORMAT = 'flash')
+        self.flash_model = None
+
+        # Kaynak koduna derlenmiş model modülü (MODEL_FORMAT = 'py')
+        self.compiled_model = None
+
+        # Önceden hesaplanmış delay tablosu (MODEL_FORMAT = 'lut')
+        # (özellik başına kenar dizileri, delay değerleri) veya None
+        self.lookup_table = None
+
+        # Tahmin önbelleği (anahtar -> tahmin) ve özellik başına eşik listeleri
+        # split_thresholds: None -> henüz hesaplanmadı, False -> önbellek kullanılamaz
+        self.prediction_cache = {}
+        self.cache_order = []
+        self.split_thresholds = None
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+        # ML MODEL YÜKLEME - MODEL_FORMAT'a göre JSON veya ikili model
         # Özellik isimlerini yükle (pickle formatında)
         try:
             self.load_feature_names('models/model_features.pkl')
@@ -48,18 +281,18 @@ class MLScheduler:
                                  'neighbor_count', 'trend_rssi', 'inter_arrival_time',
                                  'data_age', 'priority', 'hour']
 
-        # JSON modeli yükle (tek format)
-        json_loaded = False
+        # Modeli yükle (format dosya uzantısından belirlenir)
+        model_file_loaded = False
         try:
-            json_model_path = model_path if model_path else 'models/model_micropython.json'
-            self.load_json_model(json_model_path)
+            model_file_path = model_path if model_path else MODEL_PATHS[MODEL_FORMAT]
+            self.load_model(model_file_path)
             if self.model_loaded:
-                json_loaded = True
-                print("JSON model yuklendi")
+                model_file_loaded = True
+                print("Model yuklendi:", model_file_path)
         except Exception as e:
-            print("JSON model yuklenemedi:", e)
+            print("Model yuklenemedi:", e)
 
-        if not json_loaded:
+        if not model_file_loaded:
             print("UYARI: ML modeli yuklenemedi, varsayilan delay (500ms) kullanilacak")
 
     def get_optimal_delay(self, data_age, priority):
@@ -73,21 +306,25 @@ class MLScheduler:
         Returns:
             int: Optimal bekleme süresi (ms)
         """
-        # Özellikleri topla
-        features = self.channel_monitor.get_features()
+        start = profiler.ticks()
+        try:
+            # Özellikleri topla (yeni kayıt yoksa yayınlanan görüntü kullanılır)
+            features = self.channel_monitor.get_latest_features()
 
-        # Mod değişkenine göre seçim yap
-        if SCHEDULER_MODE == 0:
-            # Kural tabanlı zamanlama
-            return self._rule_based_scheduling(features, data_age, priority)
+            # Mod değişkenine göre seçim yap
+            if SCHEDULER_MODE == 0:
+                # Kural tabanlı zamanlama
+                return self._rule_based_scheduling(features, data_age, priority)
 
-        # ML modu (1) - varsayılan
-        if self.model is not None and self.model_loaded:
-            return self._predict_with_model(features, data_age, priority)
+            # ML modu (1) - varsayılan
+            if self.model is not None and self.model_loaded:
+                return self._predict_with_model(features, data_age, priority)
 
-        # ML modu seçili ama model yoksa varsayılan değer döndür
-        print("UYARI: ML modeli yuklu degil, varsayilan delay kullaniliyor: 500ms")
-        return 500.0
+            # ML modu seçili ama model yoksa varsayılan değer döndür
+            logger.warning("UYARI: ML modeli yuklu degil, varsayilan delay kullaniliyor: 500ms")
+            return 500.0
+        finally:
+            profiler.record(profiler.STAGE_PREDICT, start)
 
     def _rule_based_scheduling(self, features, data_age, priority):
         """
@@ -146,24 +383,24 @@ class MLScheduler:
         """
         if not self.model_loaded or self.model is None:
             # Model yüklenmemiş, varsayılan değer döndür
-            print("UYARI: Model yuklenmemis, varsayilan delay: 500ms")
+            logger.warning("UYARI: Model yuklenmemis, varsayilan delay: 500ms")
             return 500.0
 
         try:
             # Özellik vektörünü hazırla
             feature_vector = self._prepare_feature_vector(features, data_age, priority)
 
-            # Model tahmini yap
-            prediction = self._model_predict(feature_vector)
+            # Model tahmini yap (önbellek üzerinden)
+            prediction = self._cached_model_predict(feature_vector)
 
             # Tahmini delay değerine dönüştür (0-5000ms arası)
             delay = max(0, min(int(prediction), 5000))
 
             return delay
         except Exception as e:
-            print("Model tahmin hatasi:", e)
+            logger.error("Model tahmin hatasi:", e)
             # Hata durumunda varsayılan değer döndür (kural tabanlı kullanma)
-            print("Varsayilan delay kullaniliyor: 500ms")
+            logger.warning("Varsayilan delay kullaniliyor: 500ms")
             return 500.0
 
     def _prepare_feature_vector(self, features, data_age, priority):
@@ -216,6 +453,101 @@ class MLScheduler:
 
         return feature_vector
 
+    def _cached_model_predict(self, feature_vector):
+        """
+        Tahmin önbelleği ile model tahmini
+        Önbellek kapalıysa veya eşikler bilinmiyorsa doğrudan _model_predict
+
+        Args:
+            feature_vector: Özellik vektörü
+
+        Returns:
+            float: Tahmin edilen delay değeri
+        """
+        if PREDICTION_CACHE_SIZE <= 0:
+            return self._model_predict(feature_vector)
+
+        if self.split_thresholds is None:
+            self.split_thresholds = self._collect_split_thresholds()
+        thresholds = self.split_thresholds
+        if not thresholds or len(thresholds) > len(feature_vector):
+            return self._model_predict(feature_vector)
+
+        # Karışık tabanlı tam sayı anahtar (tuple allocation yok)
+        key = 0
+        for i in range(len(thresholds)):
+            feature_thresholds = thresholds[i]
+            if feature_thresholds:
+                key = key * (len(feature_thresholds) + 1) + _threshold_bucket(feature_thresholds, feature_vector[i])
+
+        cache = self.prediction_cache
+        prediction = cache.get(key)
+        if prediction is not None:
+            self.cache_hits += 1
+            if PREDICTION_CACHE_EVICTION == 'lru' and self.cache_order[-1] != key:
+                self.cache_order.remove(key)
+                self.cache_order.append(key)
+            return prediction
+
+        self.cache_misses += 1
+        prediction = self._model_predict(feature_vector)
+        if len(self.cache_order) >= PREDICTION_CACHE_SIZE:
+            del cache[self.cache_order.pop(0)]
+        cache[key] = prediction
+        self.cache_order.append(key)
+        return prediction
+
+    def _collect_split_thresholds(self):
+        """
+        Yüklü modelin özellik başına sıralı eşik listelerini çıkar
+
+        Returns:
+            list: Eşik listeleri veya model desteklemiyorsa False
+        """
+        if not self.model_loaded:
+            return False
+        try:
+            if self.flat_model is not None:
+                feature, threshold = self.flat_model[0], self.flat_model[1]
+                sets = [set() for _ in range(len(self.feature_names))]
+                for i in range(len(feature)):
+                    if feature[i] >= 0:
+                        sets[feature[i]].add(threshold[i])
+                return [sorted(values) for values in sets]
+
+            if self.flash_model is not None:
+                if not FLASH_PREDICTION_CACHE:
+                    return False
+                return self.flash_model.collect_thresholds(len(self.feature_names))
+
+            if self.compiled_model is not None and hasattr(self.compiled_model, 'THRESHOLDS'):
+                return [list(values) for values in self.compiled_model.THRESHOLDS]
+        except Exception as e:
+            print("UYARI: Tahmin onbellegi devre disi:", e)
+        return False
+
+    def clear_prediction_cache(self):
+        """Tahmin önbelleğini ve sayaçları sıfırla"""
+        self.prediction_cache = {}
+        self.cache_order = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def get_cache_stats(self):
+        """
+        Tahmin önbelleği istatistikleri
+
+        Returns:
+            dict: size, hits, misses, hit_rate
+        """
+        total = self.cache_hits + self.cache_misses
+        return {
+            'size': len(self.prediction_cache),
+            'hits': self.cache_hits,
+            'misses': self.cache_misses,
+            'hit_rate': self.cache_hits / total if total > 0 else 0.0
+        }
+
     def _model_predict(self, feature_vector):
         """
         Model ile tahmin yap (Random Forest için)
@@ -256,6 +588,22 @@ class MLScheduler:
         Returns:
             float: Tahmin edilen delay
         """
+        # Derlenmiş (düzleştirilmiş) model varsa onu kullan
+        if self.flat_model is not None:
+            return self._predict_flat_model(feature_vector)
+
+        # Flash üzerindeki model (düğümler ihtiyaç anında okunur)
+        if self.flash_model is not None:
+            return self._predict_flash_model(feature_vector)
+
+        # Derlenmiş kaynak kod modeli (if/else fonksiyonları)
+        if self.compiled_model is not None:
+            return self.compiled_model.predict(feature_vector)
+
+        # Delay tablosu (ağaç değerlendirmesi yok)
+        if self.lookup_table is not None:
+            return self._predict_lookup_table(feature_vector)
+
         if not isinstance(self.model, dict) or 'trees' not in self.model:
             print("UYARI: Model dict formatinda degil veya trees yok")
             return 500.0
@@ -274,10 +622,11 @@ class MLScheduler:
                 feature_dict[name] = feature_vector[i]
 
         # Debug: İlk birkaç özelliği yazdır
-        print("DEBUG Model tahmini - Ozellikler:",
-              "rssi=", feature_dict.get('rssi', 0),
-              "collision=", feature_dict.get('collision_rate', 0),
-              "priority=", feature_dict.get('priority', 0))
+        if _DEBUG:
+            logger.debug("DEBUG Model tahmini - Ozellikler:",
+                         "rssi=", feature_dict.get('rssi', 0),
+                         "collision=", feature_dict.get('collision_rate', 0),
+                         "priority=", feature_dict.get('priority', 0))
 
         # Her ağaç için tahmin yap ve ortalamasını al
         predictions = []
@@ -287,15 +636,159 @@ class MLScheduler:
 
         # RandomForest: Tüm ağaçların ortalaması
         avg_prediction = sum(predictions) / len(predictions) if predictions else 500.0
-        print("DEBUG Model tahmini - Ortalama:", avg_prediction, "ms (", len(predictions), "agac)")
+        if _DEBUG:
+            logger.debug("DEBUG Model tahmini - Ortalama:", avg_prediction, "ms (", len(predictions), "agac)")
 
         # Sadece ML tahminini kullan (kural tabanlı sisteme geçme)
         # Model tahmini ne olursa olsun, ML tahminini döndür
         return avg_prediction
 
+    def _predict_flat_model(self, feature_vector):
+        """
+        Düzleştirilmiş dizilerle tahmin yap (iteratif, recursion yok)
+
+        Args:
+            feature_vector: Özellik vektörü (liste, feature_names sırasında)
+
+        Returns:
+            float: Tüm ağaçların ortalama tahmini
+        """
+        feature, threshold, left, right, value, roots = self.flat_model
+
+        # Debug: İlk birkaç özelliği yazdır (vektör sırası sabit)
+        if _DEBUG:
+            logger.debug("DEBUG Model tahmini - Ozellikler:",
+                         "rssi=", feature_vector[0],
+                         "collision=", feature_vector[2],
+                         "priority=", feature_vector[7])
+
+        total = 0.0
+        for node in roots:
+            # feature < 0 -> leaf
+            f = feature[node]
+            while f >= 0:
+                if feature_vector[f] <= threshold[node]:
+                    node = left[node]
+                else:
+                    node = right[node]
+                f = feature[node]
+            total += value[node]
+
+        tree_count = len(roots)
+        avg_prediction = total / tree_count if tree_count else 500.0
+        if _DEBUG:
+            logger.debug("DEBUG Model tahmini - Ortalama:", avg_prediction, "ms (", tree_count, "agac)")
+        return avg_prediction
+
+    def _predict_flash_model(self, feature_vector):
+        """
+        Flash üzerindeki ikili model ile tahmin yap
+
+        Args:
+            feature_vector: Özellik vektörü (liste, feature_names sırasında)
+
+        Returns:
+            float: Tüm ağaçların ortalama tahmini
+        """
+        if _DEBUG:
+            logger.debug("DEBUG Model tahmini - Ozellikler:",
+                         "rssi=", feature_vector[0],
+                         "collision=", feature_vector[2],
+                         "priority=", feature_vector[7])
+
+        avg_prediction = self.flash_model.predict(feature_vector)
+        if _DEBUG:
+            logger.debug("DEBUG Model tahmini - Ortalama:", avg_prediction, "ms (",
+                         len(self.flash_model.roots), "agac, onbellek isabet/iskalama:",
+                         self.flash_model.cache_hits, "/", self.flash_model.cache_misses, ")")
+        return avg_prediction
+
+    def _predict_lookup_table(self, feature_vector):
+        """
+        Delay tablosundan O(1) tahmin
+
+        Args:
+            feature_vector: Özellik vektörü (feature_names sırasında)
+
+        Returns:
+            float: Tablodaki delay değeri (ms, 0-5000 arası)
+        """
+        edges, values = self.lookup_table
+        index = 0
+        for i in range(len(edges)):
+            feature_edges = edges[i]
+            index = index * (len(feature_edges) + 1) + _threshold_bucket(feature_edges, feature_vector[i])
+        return float(values[index])
+
+    def _compile_json_trees(self, trees):
+        """
+        JSON ağaçlarını paralel düz dizilere derle
+
+        Düğümler preorder sırada numaralanır (sol çocuk = düğüm + 1).
+        Leaf düğümlerde feature = -1, değer value dizisindedir.
+
+        Args:
+            trees: JSON ağaç listesi (dict)
+
+        Returns:
+            tuple: (feature, threshold, left, right, value, roots) dizileri
+
+        Raises:
+            ValueError: Ağaçta bilinmeyen özellik veya geçersiz düğüm varsa
+        """
+        names = self.feature_names or []
+        feature_index = {}
+        for i, name in enumerate(names):
+            feature_index[name] = i
+
+        feature = array('b')
+        threshold = array('f')
+        left = array('H')
+        right = array('H')
+        value = array('f')
+        roots = array('H')
+
+        for tree in trees:
+            roots.append(len(feature))
+            # Yığın: (düğüm, ebeveyn indeksi, sağ çocuk mu)
+            stack = [(tree, -1, False)]
+            while stack:
+                node, parent, is_right = stack.pop()
+                index = len(feature)
+                if index > 0xFFFF:
+                    raise ValueError("Model cok buyuk (dugum sayisi > 65535)")
+                if parent >= 0:
+                    if is_right:
+                        right[parent] = index
+                    else:
+                        left[parent] = index
+
+                if node['type'] == 'leaf':
+                    feature.append(-1)
+                    threshold.append(0.0)
+                    value.append(node['value'])
+                    left.append(0)
+                    right.append(0)
+                    continue
+
+                name = node['feature']
+                if name not in feature_index:
+                    raise ValueError("Bilinmeyen ozellik: " + str(name))
+                feature.append(feature_index[name])
+                threshold.append(node['threshold'])
+                value.append(0.0)
+                left.append(0)
+                right.append(0)
+                # Önce sağ, sonra sol: sol çocuk hemen ardından işlenir
+                stack.append((node['right'], index, True))
+                stack.append((node['left'], index, False))
+
+        return (feature, threshold, left, right, value, roots)
+
     def _predict_tree(self, tree_node, features):
         """
         Tek bir ağaç ile tahmin yap (recursive)
+        Not: Derlenmiş model yoksa kullanılır (bkz. _predict_flat_model)
 
         Args:
             tree_node: Ağaç node'u (dict)
@@ -328,7 +821,7 @@ class MLScheduler:
             float: Varsayılan delay (500ms)
         """
         # ML modeli çalışmazsa varsayılan değer döndür
-        print("UYARI: ML modeli calismadi, varsayilan delay: 500ms")
+        logger.warning("UYARI: ML modeli calismadi, varsayilan delay: 500ms")
         return 500.0
 
     def load_feature_names(self, feature_path):
@@ -363,6 +856,19 @@ class MLScheduler:
                                  'neighbor_count', 'trend_rssi', 'inter_arrival_time',
                                  'data_age', 'priority', 'hour']
 
+    def _reset_model(self):
+        """Yüklü model ve tüm tahmin backend'lerini temizle"""
+        if self.flash_model is not None:
+            self.flash_model.close()
+        self.model = None
+        self.flat_model = None
+        self.flash_model = None
+        self.compiled_model = None
+        self.lookup_table = None
+        self.model_loaded = False
+        self.split_thresholds = None
+        self.clear_prediction_cache()
+
     def load_json_model(self, json_path):
         """
         JSON formatındaki modeli yükle (MicroPython uyumlu)
@@ -374,6 +880,7 @@ class MLScheduler:
         print("JSON model yukleniyor:", json_path)
         import time
         start_time = time.ticks_ms()
+        self._reset_model()
 
         try:
             # ujson daha hızlı (MicroPython'da genellikle mevcut)
@@ -417,6 +924,17 @@ class MLScheduler:
                     self.feature_names = self.model['feature_names']
 
                 tree_count = len(self.model.get('trees', []))
+
+                # Ağaçları düz dizilere derle, başarılıysa dict ağaçları serbest bırak
+                try:
+                    self.flat_model = self._compile_json_trees(self.model.get('trees', []))
+                    del self.model['trees']
+                    import gc
+                    gc.collect()
+                    print("  Agaclar duz dizilere derlendi:", len(self.flat_model[0]), "dugum")
+                except Exception as e:
+                    print("UYARI: Agaclar derlenemedi, recursive tahmin kullanilacak:", e)
+
                 print("JSON model basariyla yuklendi!")
                 print("  Agac sayisi:", tree_count)
                 print("  Yukleme suresi:", load_duration, "ms")
@@ -443,19 +961,238 @@ class MLScheduler:
             self.model = None
             self.model_loaded = False
 
+    def load_binary_model(self, bin_path):
+        """
+        Paketlenmiş ikili modeli yükle (server/model_exporter.py çıktısı)
+        Düğüm kayıtları parça parça okunur, önceden ayrılmış dizilere yazılır
+        (dosyanın tamamı belleğe alınmaz)
+
+        Args:
+            bin_path: İkili model dosya yolu (.bin)
+        """
+        print("Ikili model yukleniyor:", bin_path)
+        start_time = time.ticks_ms()
+        self._reset_model()
+
+        try:
+            with open(bin_path, 'rb') as f:
+                header = _read_binary_header(f)
+                if header is None:
+                    print("UYARI: Gecersiz ikili model (magic/versiyon)")
+                    return
+                n_nodes, feature_names, roots = header
+                n_trees = len(roots)
+
+                # Diziler önceden ayrılır (append ile büyütme yok)
+                feature = array('b', bytes(n_nodes))
+                threshold = array('f', bytes(4 * n_nodes))
+                left = array('H', bytes(2 * n_nodes))
+                right = array('H', bytes(2 * n_nodes))
+                value = array('f', bytes(4 * n_nodes))
+
+                buf = bytearray(BINARY_NODE_SIZE * BINARY_CHUNK_NODES)
+                index = 0
+                while index < n_nodes:
+                    count = f.readinto(buf)
+                    if not count:
+                        raise ValueError("Ikili model eksik (dugum kayitlari)")
+                    for offset in range(0, count - count % BINARY_NODE_SIZE, BINARY_NODE_SIZE):
+                        feat, _, right_index, number = struct.unpack_from('<bBHf', buf, offset)
+                        feature[index] = feat
+                        if feat < 0:
+                            value[index] = number
+                        else:
+                            threshold[index] = number
+                            left[index] = index + 1
+                            right[index] = right_index
+                        index += 1
+                        if index >= n_nodes:
+                            break
+
+            self.feature_names = feature_names
+            self.flat_model = (feature, threshold, left, right, value, roots)
+            self.model = {
+                'type': 'RandomForestRegressor',
+                'format': 'bin',
+                'n_estimators': n_trees,
+                'feature_names': feature_names,
+            }
+            self.model_loaded = True
+
+            load_duration = time.ticks_diff(time.ticks_ms(), start_time)
+            print("Ikili model basariyla yuklendi!")
+            print("  Agac sayisi:", n_trees)
+            print("  Dugum sayisi:", n_nodes)
+            print("  Yukleme suresi:", load_duration, "ms")
+
+        except OSError as e:
+            print("HATA: Ikili model dosyasi bulunamadi:", bin_path)
+            print("Hata detayi:", e)
+        except MemoryError as e:
+            print("HATA: Bellek yetersiz! Ikili model cok buyuk.")
+        except Exception as e:
+            print("HATA: Ikili model yukleme basarisiz:", e)
+
+    def load_flash_model(self, bin_path):
+        """
+        İkili modeli flash üzerinde bırakarak aç (lazy değerlendirme)
+        RAM'de sadece kök indeksleri ve LRU blok önbelleği tutulur
+
+        Args:
+            bin_path: İkili model dosya yolu (.bin)
+        """
+        print("Flash model aciliyor:", bin_path)
+        self._reset_model()
+
+        try:
+            self.flash_model = FlashForest(bin_path)
+            self.feature_names = self.flash_model.feature_names
+            self.model = {
+                'type': 'RandomForestRegressor',
+                'format': 'flash',
+                'n_estimators': len(self.flash_model.roots),
+                'feature_names': self.feature_names,
+            }
+            self.model_loaded = True
+            print("Flash model hazir!")
+            print("  Agac sayisi:", len(self.flash_model.roots))
+            print("  Dugum sayisi:", self.flash_model.n_nodes)
+            print("  Onbellek:", FLASH_CACHE_BLOCKS, "blok x", FLASH_BLOCK_NODES, "dugum")
+        except OSError as e:
+            print("HATA: Ikili model dosyasi bulunamadi:", bin_path)
+            print("Hata detayi:", e)
+            self.flash_model = None
+        except Exception as e:
+            print("HATA: Flash model acilamadi:", e)
+            self.flash_model = None
+
+    def load_compiled_model(self, module_path):
+        """
+        Kaynak koduna derlenmiş modeli import et (server/model_exporter.py çıktısı)
+        Modül FEATURE_NAMES, N_ESTIMATORS ve predict(x) içermelidir
+
+        Args:
+            module_path: Modül dosya yolu (örn. 'models/model_compiled.py')
+        """
+        print("Derlenmis model import ediliyor:", module_path)
+        start_time = time.ticks_ms()
+        self._reset_model()
+
+        # 'models/model_compiled.py' -> dizin 'models', modül 'model_compiled'
+        slash = module_path.rfind('/')
+        module_dir = module_path[:slash] if slash >= 0 else ''
+        module_name = module_path[slash + 1:].split('.')[0]
+
+        try:
+            import sys
+            if module_dir and module_dir not in sys.path:
+                sys.path.append(module_dir)
+            module = __import__(module_name)
+
+            if not hasattr(module, 'predict') or not hasattr(module, 'FEATURE_NAMES'):
+                print("UYARI: Gecersiz derlenmis model modulu:", module_name)
+                return
+
+            self.compiled_model = module
+            self.feature_names = list(module.FEATURE_NAMES)
+            self.model = {
+                'type': 'RandomForestRegressor',
+                'format': 'py',
+                'n_estimators': module.N_ESTIMATORS,
+                'feature_names': self.feature_names,
+            }
+            self.model_loaded = True
+            print("Derlenmis model yuklendi!")
+            print("  Agac sayisi:", module.N_ESTIMATORS)
+            print("  Yukleme suresi:", time.ticks_diff(time.ticks_ms(), start_time), "ms")
+        except ImportError as e:
+            print("HATA: Derlenmis model bulunamadi:", module_path)
+            print("Hata detayi:", e)
+        except MemoryError as e:
+            print("HATA: Bellek yetersiz! Derlenmis model cok buyuk.")
+            print("Cozum: mpy-cross ile .mpy'ye derleyin veya firmware'e dondurun (frozen)")
+        except Exception as e:
+            print("HATA: Derlenmis model yukleme basarisiz:", e)
+
+    def load_lookup_table(self, lut_path):
+        """
+        Önceden hesaplanmış delay tablosunu yükle (server/model_exporter.py çıktısı)
+
+        Args:
+            lut_path: Tablo dosya yolu (.lut)
+        """
+        print("Delay tablosu yukleniyor:", lut_path)
+        start_time = time.ticks_ms()
+        self._reset_model()
+
+        try:
+            with open(lut_path, 'rb') as f:
+                magic, version, n_features, n_values = struct.unpack('<4sBBI', f.read(10))
+                if magic != LUT_MAGIC or version != LUT_VERSION:
+                    print("UYARI: Gecersiz delay tablosu (magic/versiyon)")
+                    return
+
+                edges = []
+                for _ in range(n_features):
+                    n_edges = f.read(1)[0]
+                    edges.append(array('f', f.read(4 * n_edges)))
+
+                # Değerler doğrudan önceden ayrılmış diziye okunur (little-endian)
+                values = array('H', bytes(2 * n_values))
+                f.readinto(values)
+
+            self.lookup_table = (edges, values)
+            self.model = {
+                'type': 'RandomForestRegressor',
+                'format': 'lut',
+                'n_values': n_values,
+            }
+            self.model_loaded = True
+            print("Delay tablosu yuklendi!")
+            print("  Deger sayisi:", n_values)
+            print("  Yukleme suresi:", time.ticks_diff(time.ticks_ms(), start_time), "ms")
+        except OSError as e:
+            print("HATA: Delay tablosu bulunamadi:", lut_path)
+            print("Hata detayi:", e)
+        except MemoryError as e:
+            print("HATA: Bellek yetersiz! Delay tablosu cok buyuk.")
+            print("Cozum: model_exporter.py --max-bins ile daha kaba bir izgara secin")
+        except Exception as e:
+            print("HATA: Delay tablosu yukleme basarisiz:", e)
+
     def load_model(self, model_path):
         """
-        ML modelini yükle - ARTIK KULLANILMIYOR
-        Sadece JSON formatı kullanılıyor (load_json_model kullan)
+        ML modelini dosya uzantısına göre yükle
+        '.bin' -> load_binary_model (MODEL_FORMAT = 'flash' ise load_flash_model),
+        '.py' / '.mpy' -> load_compiled_model, '.lut' -> load_lookup_table,
+        diğerleri -> load_json_model
+        ('.pkl' yolu verilirse aynı isimli '.json' dosyası denenir)
 
         Args:
-            model_path: Model dosya yolu (kullanılmıyor)
+            model_path: Model dosya yolu
         """
-        print("UYARI: load_model() artik kullanilmiyor, load_json_model() kullanin")
-        print("JSON model yukleniyor...")
-        # JSON model yolunu dene
-        json_path = model_path.replace('.pkl', '.json') if model_path else 'models/model_micropython.json'
-        self.load_json_model(json_path)
+        if not model_path:
+            model_path = MODEL_PATHS[MODEL_FORMAT]
+
+        if model_path.endswith('.lut'):
+            self.load_lookup_table(model_path)
+            return
+
+        if model_path.endswith('.py') or model_path.endswith('.mpy'):
+            self.load_compiled_model(model_path)
+            return
+
+        if model_path.endswith('.bin'):
+            if MODEL_FORMAT == 'flash':
+                self.load_flash_model(model_path)
+            else:
+                self.load_binary_model(model_path)
+            return
+
+        if model_path.endswith('.pkl'):
+            print("UYARI: Pickle model cihazda desteklenmiyor, JSON model deneniyor")
+            model_path = model_path.replace('.pkl', '.json')
+        self.load_json_model(model_path)
 
     def record_transmission_result(self, success, delay_used):
         """
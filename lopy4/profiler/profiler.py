@@ -0,0 +1,173 @@
+"""
+Gönderim Yolu Profilleme
+Gönderim döngüsünün aşamalarının süresini time.ticks_us ile ölçer ve
+sabit kovalı histogramlarda biriktirir. Sayaçlar yüklemede bir kez ayrılan
+bir array'dedir; ölçüm başına allocation yapılmaz.
+
+Aşamalar (iç içe olabilir: tahmin süresi özellik toplamayı da içerir):
+    0 features  -> ChannelMonitor.get_features
+    1 scan      -> ChannelMonitor.scan_wifi_networks
+    2 predict   -> MLScheduler.get_optimal_delay
+    3 send      -> DataSender paket oluşturma + gönderim
+    4 ack_wait  -> ACK bekleme (gönderimden sonuca kadar)
+
+Özet, REPORT_INTERVAL_MS aralığıyla uplink paketine TLV olarak eklenir
+(bkz. wire_protocol.TLV_PROFILE); sunucu tüm cihazların histogramlarını toplar.
+
+Kullanım:
+    import profiler
+
+    start = profiler.ticks()
+    ...
+    profiler.record(profiler.STAGE_SEND, start)
+"""
+
+import time
+
+try:
+    from micropython import const
+except ImportError:
+    def const(value):
+        return value
+
+try:
+    from array import array
+except ImportError:
+    from uarray import array
+
+try:
+    import ustruct as struct
+except ImportError:
+    import struct
+
+# Ölçüm açık mı (False: record() hemen döner)
+ENABLED = True
+
+# Uplink özet aralığı (ms, 0: pakete eklenmez)
+REPORT_INTERVAL_MS = 60000
+
+STAGE_FEATURES = const(0)
+STAGE_SCAN = const(1)
+STAGE_PREDICT = const(2)
+STAGE_SEND = const(3)
+STAGE_ACK_WAIT = const(4)
+STAGE_NAMES = ('features', 'scan', 'predict', 'send', 'ack_wait')
+N_STAGES = const(5)
+
+# Kova üst sınırları (us, yarım dekad aralıklı); son kova >= 1 s
+BUCKET_BOUNDS_US = (100, 300, 1000, 3000, 10000, 30000, 100000, 300000, 1000000)
+N_BUCKETS = const(10)
+
+# Histogram sayaçları: aşama i, kova b -> counts[i * N_BUCKETS + b]
+counts = array('L', [0] * (N_STAGES * N_BUCKETS))
+# Aşama başına en uzun süre (us)
+max_us = array('L', [0] * N_STAGES)
+
+_last_report = None
+
+
+def ticks():
+    """Ölçüm başlangıcı (time.ticks_us)"""
+    return time.ticks_us()
+
+
+def record(stage, start):
+    """start'tan bu yana geçen süreyi aşamanın histogramına ekle"""
+    if ENABLED:
+        record_us(stage, time.ticks_diff(time.ticks_us(), start))
+
+
+def record_us(stage, elapsed_us):
+    """Ölçülmüş süreyi (us) aşamanın histogramına ekle"""
+    if not ENABLED:
+        return
+    if elapsed_us < 0:
+        elapsed_us = 0
+    bucket = 0
+    for bound in BUCKET_BOUNDS_US:
+        if elapsed_us < bound:
+            break
+        bucket += 1
+    counts[stage * N_BUCKETS + bucket] += 1
+    if elapsed_us > max_us[stage]:
+        max_us[stage] = elapsed_us
+
+
+def reset():
+    """Tüm sayaçları sıfırla"""
+    for i in range(len(counts)):
+        counts[i] = 0
+    for i in range(N_STAGES):
+        max_us[i] = 0
+
+
+def report_due():
+    """Uplink özeti gönderme zamanı geldi mi (ilk çağrı süreyi başlatır)"""
+    global _last_report
+    if not ENABLED or REPORT_INTERVAL_MS <= 0:
+        return False
+    now = time.ticks_ms()
+    if _last_report is None:
+        _last_report = now
+        return False
+    if time.ticks_diff(now, _last_report) < REPORT_INTERVAL_MS:
+        return False
+    _last_report = now
+    return True
+
+
+def encode_summary():
+    """
+    Son özetten bu yana biriken histogramları TLV değerine kodla ve sıfırla
+
+    Format: n_stages (uint8), n_buckets (uint8),
+            n_stages x n_buckets sayaç (uint16, doyumlu),
+            n_stages en uzun süre (uint32, us)
+
+    Returns:
+        bytes: 122 byte
+    """
+    values = [min(count, 0xFFFF) for count in counts]
+    summary = (struct.pack('<BB', N_STAGES, N_BUCKETS) +
+               struct.pack('<%dH' % len(values), *values) +
+               struct.pack('<%dI' % N_STAGES, *max_us))
+    reset()
+    return summary
+
+
+def percentile_us(stage, fraction):
+    """
+    Aşamanın yaklaşık yüzdelik değeri (kova üst sınırı, us)
+
+    Returns:
+        int: Kova üst sınırı (en uzun süreyi aşmaz), son kovadaysa en uzun
+             süre; ölçüm yoksa None
+    """
+    base = stage * N_BUCKETS
+    total = 0
+    for b in range(N_BUCKETS):
+        total += counts[base + b]
+    if total == 0:
+        return None
+    target = total * fraction
+    seen = 0
+    for b in range(N_BUCKETS - 1):
+        seen += counts[base + b]
+        if seen >= target:
+            return min(BUCKET_BOUNDS_US[b], max_us[stage])
+    return max_us[stage]
+
+
+def print_summary():
+    """Aşama başına ölçüm sayısı, p50/p90 ve en uzun süreyi yazdır"""
+    print("=== Profil (us) ===")
+    for stage in range(N_STAGES):
+        base = stage * N_BUCKETS
+        total = 0
+        for b in range(N_BUCKETS):
+            total += counts[base + b]
+        if total:
+            print(" ", STAGE_NAMES[stage], "n:", total,
+                  "p50<=", percentile_us(stage, 0.5),
+                  "p90<=", percentile_us(stage, 0.9),
+                  "max:", max_us[stage])
@@ -0,0 +1,151 @@
+"""
+Paylaşılan WiFi Tarama Önbelleği
+Tek bir wlan.scan() sonucunu WiFiManager, ChannelMonitor ve DataSender
+arasında paylaştırır (RSSI, komşu sayısı ve kanal doluluğu aynı anlık görüntüden)
+
+Sözleşme:
+    - Anlık görüntü ttl_ms süresince geçerlidir, süresi dolmadan yeniden tarama yapılmaz
+    - begin_cycle() çağrıldıktan sonra aynı döngüde en fazla bir tarama yapılır
+      (döngü içindeki sonraki okumalar, eski olsa bile mevcut görüntüyü kullanır)
+    - auto_scan=False ise okumalar hiç taramaz; taramayı sadece scan() çağıran
+      arka plan görevi yapar (gönderim yolu bloklanmaz)
+"""
+
+import time
+
+
+class ScanCache:
+    def __init__(self, wlan=None, ttl_ms=5000):
+        """
+        WiFi tarama önbelleği
+
+        Args:
+            wlan: network.WLAN instance (None ise ilk taramada oluşturulur)
+            ttl_ms: Anlık görüntü geçerlilik süresi (ms)
+        """
+        self.wlan = wlan
+        self.ttl_ms = ttl_ms
+
+        # Son tarama sonucu ve zamanı
+        self.networks = []
+        self.snapshot_time = None
+
+        # Döngü sözleşmesi (begin_cycle ilk çağrıldığında etkinleşir)
+        self.cycle_mode = False
+        self.cycle_scanned = False
+
+        # Toplam tarama sayısı (izleme için)
+        self.scan_count = 0
+
+        # False ise get_networks() taramaz (arka plan görevi scan() çağırır)
+        self.auto_scan = True
+
+    def begin_cycle(self):
+        """Yeni gönderim döngüsü başlat (bu döngüde en fazla bir tarama)"""
+        self.cycle_mode = True
+        self.cycle_scanned = False
+
+    def is_stale(self):
+        """Anlık görüntü yok veya TTL dolmuş mu"""
+        if self.snapshot_time is None:
+            return True
+        return time.ticks_diff(time.ticks_ms(), self.snapshot_time) > self.ttl_ms
+
+    def _get_wlan(self):
+        if self.wlan is None:
+            import network
+            self.wlan = network.WLAN()
+        return self.wlan
+
+    def scan(self):
+        """
+        Zorla tarama yap ve anlık görüntüyü güncelle
+
+        Returns:
+            list: Taranan ağlar [(ssid, bssid, sec, channel, rssi), ...]
+        """
+        try:
+            wlan = self._get_wlan()
+
+            # Eğer bağlı değilse veya scan yapamıyorsa boş dön
+            if not wlan.isconnected():
+                return []
+
+            # Döngü başına tek deneme (başarısız tarama da sayılır)
+            self.cycle_scanned = True
+
+            # Pycom LoPy4 için: wlan.scan() kullanılır
+            self.networks = wlan.scan()
+            self.snapshot_time = time.ticks_ms()
+            self.scan_count += 1
+            return self.networks
+        except Exception as e:
+            print("WiFi scan hatasi:", e)
+            return []
+
+    def get_networks(self):
+        """
+        Güncel anlık görüntüyü döndür, gerekirse (TTL dolmuş ve bu döngüde
+        henüz taranmamışsa) bir kez tara
+
+        Returns:
+            list: Taranan ağlar
+        """
+        if not self.auto_scan:
+            return self.networks
+        if self.is_stale() and not (self.cycle_mode and self.cycle_scanned):
+            self.scan()
+        return self.networks
+
+    def get_rssi(self):
+        """
+        Anlık görüntüdeki en güçlü sinyal (genellikle bağlı olduğumuz ağ)
+
+        Returns:
+            int: RSSI değeri (dBm) veya None
+        """
+        networks = self.get_networks()
+        if len(networks) == 0:
+            return None
+
+        # Pycom LoPy4 scan formatı: (ssid, bssid, sec, channel, rssi)
+        # RSSI 4. indekste (net[4]) veya named tuple ise net.rssi
+        max_rssi = -100
+        for net in networks:
+            try:
+                # Named tuple veya tuple olabilir
+                if hasattr(net, 'rssi'):
+                    rssi_val = net.rssi
+                elif len(net) >= 5:
+                    rssi_val = net[4]
+                else:
+                    continue
+
+                # RSSI negatif olmalı (dBm)
+                if isinstance(rssi_val, int) and rssi_val < 0:
+                    if rssi_val > max_rssi:
+                        max_rssi = rssi_val
+            except (IndexError, AttributeError, TypeError):
+                continue
+
+        if max_rssi > -100:
+            return max_rssi
+        return None
+
+    def get_neighbor_count(self):
+        """
+        Anlık görüntüdeki ağ sayısı
+
+        Returns:
+            int: Taranan ağ sayısı
+        """
+        return len(self.get_networks())
+
+    def get_occupancy(self):
+        """
+        Ağ sayısından kanal doluluk tahmini (0-10 ağ -> 0.0-1.0)
+
+        Returns:
+            float: Doluluk oranı (0.0 - 1.0)
+        """
+        return min(len(self.get_networks()) / 10.0, 1.0)
@@ -5,15 +5,17 @@ Pycom MicroPython uyumlu
 
 import network
 import time
+from scan_cache import ScanCache
 
 class WiFiManager:
-    def __init__(self, ssid=None, password=None):
+    def __init__(self, ssid=None, password=None, scan_cache=None):
         """
         WiFi bağlantı yöneticisi
 
         Args:
             ssid: WiFi SSID (None ise varsayılan değer kullanılır)
             password: WiFi şifresi (None ise varsayılan değer kullanılır)
+            scan_cache: Paylaşılan ScanCache (None ise bu WLAN için oluşturulur)
         """
         # BURAYA KENDİ WİFİ BİLGİLERİNİ YAZ
         self.ssid = ssid or "Patates"  # WiFi ağ adını buraya yaz
@@ -22,6 +24,9 @@ class WiFiManager:
         # Pycom MicroPython için WiFi başlatma
         self.wlan = network.WLAN(mode=network.WLAN.STA)
 
+        # Paylaşılan tarama önbelleği (ChannelMonitor ve DataSender'a da verilir)
+        self.scan_cache = scan_cache if scan_cache is not None else ScanCache(wlan=self.wlan)
+
     def connect(self, timeout=30):
         """
         WiFi'ye bağlan
@@ -63,7 +68,8 @@ class WiFiManager:
     def get_rssi(self):
         """
         Mevcut RSSI değerini al (Pycom LoPy4 için scan kullanarak)
-        Bağlı olduğumuz ağın RSSI değerini scan sonuçlarından bulur
+        Paylaşılan tarama önbelleğindeki en güçlü sinyali döndürür;
+        anlık görüntü güncelse yeni tarama yapılmaz
 
         Returns:
             int: RSSI değeri (dBm) veya None
@@ -72,52 +78,13 @@ class WiFiManager:
             return None
 
         try:
-            # WiFi ağlarını tara
-            networks = self.wlan.scan()
-
-            # Bağlı olduğumuz ağın SSID'sini bul
             # Pycom'da bağlı ağın SSID'sini direkt alamayız, bu yüzden
-            # scan sonuçlarından en yüksek RSSI'li ağı kullanabiliriz
-            # veya tüm ağlar arasından en güçlü sinyali seçebiliriz
-
-            if len(networks) == 0:
-                return None
-
-            # Pycom LoPy4 scan formatı: (ssid, bssid, sec, channel, rssi)
-            # RSSI 4. indekste (net[4]) veya named tuple ise net.rssi
-            max_rssi = -100
-            for net in networks:
-                try:
-                    # Named tuple veya tuple olabilir
-                    if hasattr(net, 'rssi'):
-                        # Named tuple: net.rssi kullan
-                        rssi_val = net.rssi
-                    elif len(net) >= 5:
-                        # Tuple: RSSI 4. indekste (ssid, bssid, sec, channel, rssi)
-                        rssi_val = net[4]
-                    else:
-                        continue
-
-                    # RSSI negatif olmalı (dBm)
-                    if isinstance(rssi_val, int) and rssi_val < 0:
-                        if rssi_val > max_rssi:
-                            max_rssi = rssi_val
-                except (IndexError, AttributeError, TypeError):
-                    continue
-
-            # Eğer geçerli bir RSSI bulunduysa döndür (negatif olmalı)
-            if max_rssi > -100:
-                return max_rssi
-
-            # Alternatif: SSID'ye göre eşleştirme (daha doğru ama SSID bilgisi gerekir)
-            # Şimdilik en yüksek RSSI'yi kullanıyoruz
-
+            # scan sonuçlarından en yüksek RSSI'li ağı kullanıyoruz
+            return self.scan_cache.get_rssi()
         except Exception as e:
             print("RSSI alma hatasi (scan):", e)
             return None
 
-        return None
-
     def is_connected(self):
         """Bağlantı durumunu kontrol et"""
         return self.wlan.isconnected()
@@ -0,0 +1,245 @@
+"""
+İkili Kablo Protokolü (cihaz tarafı)
+Veri paketlerini sabit yerleşimli ikili formata kodlar, ikili ACK'ları çözer
+(sunucu tarafı: server/wire_protocol.py)
+
+Format (little-endian, WIRE_VERSION = 1):
+    Veri paketi başlığı: '<BBBHHIIBHbHHB' (24 byte)
+        magic (0xA7), version, type (1 = veri),
+        device_id (uint16), seq (uint16), timestamp (uint32, ticks_ms),
+        data_age (uint32, ms), priority (uint8), delay_used (uint16, ms),
+        rssi (int8, dBm), channel_occupancy (uint16, x10000),
+        collision_rate (uint16, x10000), neighbor_count (uint8)
+    TLV uzantısı (isteğe bağlı, başlıktan sonra): type (uint8), len (uint8), value
+        1: temperature (int16, x100)
+        2: humidity (uint16, x100)
+        3: sensor_id (ham byte'lar, JSON'daki hex yerine)
+        4: profil özeti (profiler.encode_summary, periyodik)
+        255: diğer alanlar (JSON)
+    ACK: '<BBBHHB' (8 byte)
+        magic, version, type (2 = ack), device_id, seq,
+        flags (bit0 = success, bit1 = collision_detected)
+    Toplu paket: '<BBBHHB' (8 byte) + count x kayıt
+        magic, version, type (3 = batch), device_id, base_seq, count
+        Kayıt: '<IIBHbHHB' (17 byte, veri başlığından ortak alanlar çıkarılmış)
+               + TLV uzunluğu (uint8) + TLV; kayıt i'nin seq'i base_seq + i
+    Toplu ACK: '<BBBHHBI' (12 byte)
+        magic, version, type (4 = batch ack), device_id, base_seq, count,
+        success_bitmap (bit i = 1: kayıt i çarpışmasız alındı)
+
+JSON paketler '{' (0x7B) ile başladığı için magic byte ile ayırt edilir.
+"""
+
+import json
+
+try:
+    import ustruct as struct
+except ImportError:
+    import struct
+
+try:
+    import ubinascii as binascii
+except ImportError:
+    import binascii
+
+WIRE_MAGIC = 0xA7
+WIRE_VERSION = 1
+TYPE_DATA = 1
+TYPE_ACK = 2
+TYPE_BATCH = 3
+TYPE_BATCH_ACK = 4
+
+DATA_HEADER_FORMAT = '<BBBHHIIBHbHHB'
+DATA_HEADER_SIZE = struct.calcsize(DATA_HEADER_FORMAT)
+ACK_FORMAT = '<BBBHHB'
+ACK_SIZE = struct.calcsize(ACK_FORMAT)
+
+BATCH_HEADER_FORMAT = '<BBBHHB'
+BATCH_HEADER_SIZE = struct.calcsize(BATCH_HEADER_FORMAT)
+RECORD_FORMAT = '<IIBHbHHB'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+BATCH_ACK_FORMAT = '<BBBHHBI'
+BATCH_ACK_SIZE = struct.calcsize(BATCH_ACK_FORMAT)
+# success_bitmap 32 bit
+MAX_BATCH_RECORDS = 32
+
+# Oranlar (0.0 - 1.0) uint16 olarak 1/10000 çözünürlükle
+RATE_SCALE = 10000
+
+TLV_TEMPERATURE = 1
+TLV_HUMIDITY = 2
+TLV_SENSOR_ID = 3
+TLV_PROFILE = 4
+TLV_JSON = 255
+
+ACK_FLAG_SUCCESS = 0x01
+ACK_FLAG_COLLISION = 0x02
+
+
+def _clamp(value, low, high):
+    value = int(value)
+    if value < low:
+        return low
+    if value > high:
+        return high
+    return value
+
+
+def _tlv(tlv_type, value):
+    return struct.pack('<BB', tlv_type, len(value)) + value
+
+
+def encode_sensor_data(data):
+    """
+    Sensör sözlüğünü TLV uzantısına kodla
+
+    Args:
+        data: {'temperature': 25.5, 'humidity': 60.0, 'sensor_id': 'a1b2...', ...}
+
+    Returns:
+        bytes: TLV kayıtları (data boşsa b'')
+    """
+    if not data:
+        return b''
+
+    parts = []
+    rest = {}
+    for key in data:
+        value = data[key]
+        if key == 'temperature':
+            parts.append(_tlv(TLV_TEMPERATURE, struct.pack('<h', _clamp(round(value * 100), -32768, 32767))))
+        elif key == 'humidity':
+            parts.append(_tlv(TLV_HUMIDITY, struct.pack('<H', _clamp(round(value * 100), 0, 65535))))
+        elif key == 'sensor_id':
+            try:
+                raw = binascii.unhexlify(value)
+            except Exception:
+                raw = None
+            if raw is not None and len(raw) <= 255:
+                parts.append(_tlv(TLV_SENSOR_ID, raw))
+            else:
+                rest[key] = value
+        else:
+            rest[key] = value
+
+    if rest:
+        extra = json.dumps(rest).encode('utf-8')
+        if len(extra) <= 255:
+            parts.append(_tlv(TLV_JSON, extra))
+        else:
+            print("UYARI: Sensor verisi TLV icin cok buyuk, atlandi:", len(extra), "byte")
+
+    return b''.join(parts)
+
+
+def _packet_fields(packet):
+    """Paketin başlık / kayıt alanları (timestamp'ten neighbor_count'a)"""
+    return (
+        int(packet['timestamp']) & 0xFFFFFFFF,
+        _clamp(packet['data_age'], 0, 0xFFFFFFFF),
+        _clamp(packet['priority'], 0, 255),
+        _clamp(packet['delay_used'], 0, 65535),
+        _clamp(packet['rssi'], -128, 127),
+        _clamp(round(packet['channel_occupancy'] * RATE_SCALE), 0, 65535),
+        _clamp(round(packet['collision_rate'] * RATE_SCALE), 0, 65535),
+        _clamp(packet['neighbor_count'], 0, 255)
+    )
+
+
+def encode_packet(packet):
+    """
+    Veri paketini ikili formata kodla
+
+    Args:
+        packet: DataSender paket sözlüğü (JSON formatıyla aynı anahtarlar)
+
+    Returns:
+        bytes: Başlık + TLV uzantısı (varsa profil özeti sonda)
+    """
+    header = struct.pack(
+        DATA_HEADER_FORMAT,
+        WIRE_MAGIC,
+        WIRE_VERSION,
+        TYPE_DATA,
+        _clamp(packet['device_id'], 0, 65535),
+        _clamp(packet.get('seq', 0), 0, 65535),
+        *_packet_fields(packet)
+    )
+    tlv = encode_sensor_data(packet.get('data'))
+    if packet.get('profile'):
+        tlv += _tlv(TLV_PROFILE, packet['profile'])
+    return header + tlv
+
+
+def encode_batch_record(packet):
+    """
+    Paketi toplu paket kaydına kodla (device_id ve seq toplu başlıkta)
+
+    Returns:
+        bytes: 17 byte kayıt + TLV uzunluğu + TLV
+    """
+    tlv = encode_sensor_data(packet.get('data'))
+    if len(tlv) > 255:
+        tlv = b''
+    # Profil özeti sadece kayıt TLV bütçesine sığarsa eklenir
+    profile = packet.get('profile')
+    if profile and len(tlv) + 2 + len(profile) <= 255:
+        tlv += _tlv(TLV_PROFILE, profile)
+    return struct.pack(RECORD_FORMAT, *_packet_fields(packet)) + struct.pack('<B', len(tlv)) + tlv
+
+
+def encode_batch(device_id, base_seq, records):
+    """
+    Kayıtları tek datagramda topla
+
+    Args:
+        records: encode_batch_record() çıktıları (seq'ler base_seq'ten ardışık)
+
+    Returns:
+        bytes: Toplu başlık + kayıtlar
+    """
+    header = struct.pack(BATCH_HEADER_FORMAT, WIRE_MAGIC, WIRE_VERSION, TYPE_BATCH,
+                         _clamp(device_id, 0, 65535), base_seq & 0xFFFF, len(records))
+    return header + b''.join(records)
+
+
+def is_binary(data):
+    """Datagram ikili protokolde mi (magic byte)"""
+    return len(data) > 0 and data[0] == WIRE_MAGIC
+
+
+def decode_ack(data):
+    """
+    İkili ACK'yı çözümle
+
+    Returns:
+        dict: JSON ACK ile aynı anahtarlar, toplu ACK için
+              {'type': 'batch_ack', 'device_id', 'seq', 'count', 'success_bitmap'}
+              veya geçersizse None
+    """
+    if len(data) < ACK_SIZE or not is_binary(data):
+        return None
+    if data[2] == TYPE_BATCH_ACK:
+        if len(data) < BATCH_ACK_SIZE:
+            return None
+        magic, version, packet_type, device_id, base_seq, count, bitmap = struct.unpack(
+            BATCH_ACK_FORMAT, data[:BATCH_ACK_SIZE])
+        if version != WIRE_VERSION:
+            return None
+        return {
+            'type': 'batch_ack',
+            'device_id': device_id,
+            'seq': base_seq,
+            'count': count,
+            'success_bitmap': bitmap
+        }
+    magic, version, packet_type, device_id, seq, flags = struct.unpack(ACK_FORMAT, data[:ACK_SIZE])
+    if version != WIRE_VERSION or packet_type != TYPE_ACK:
+        return None
+    return {
+        'type': 'ack',
+        'device_id': device_id,
+        'seq': seq,
+        'success': 1 if flags & ACK_FLAG_SUCCESS else 0,
+        'collision_detected': 1 if flags & ACK_FLAG_COLLISION else 0
+    }
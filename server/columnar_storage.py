@@ -0,0 +1,508 @@
+"""
+Sütunlu Depolama
+Toplanan verileri (csv_headers şeması) tipli, sıkıştırılmış sütun
+parçalarına (chunk) yazar. Dosyalar saatlik bölümlenir; analiz ve yeniden
+eğitim için sadece gereken saatler ve sütunlar okunur, metin parse edilmez.
+
+Dizin yapısı:
+    <root>/YYYYMMDD_HH.col   (yerel saat, CSV timestamp'leriyle aynı)
+
+Dosya formatı (little-endian, COLUMNAR_VERSION = 1):
+    Dosya art arda eklenmiş parçalardan oluşur, her tampon boşaltma bir parça yazar
+    Parça başlığı: '<4sBBI' -> magic, version, n_columns, n_rows
+    Her sütun   : uint8 isim uzunluğu + utf-8 isim,
+                  '<cBI' -> array typecode, encoding, sıkıştırılmış uzunluk,
+                  zlib ile sıkıştırılmış sütun verisi
+    encoding    : 0 ham, 1 delta (timestamp; ardışık farklar daha iyi sıkışır)
+
+Kullanım:
+    python columnar_storage.py convert data/collected_data.csv data/columnar
+    python columnar_storage.py info data/columnar
+"""
+
+import csv
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from datetime import datetime
+from csv_writer import FSYNC_NEVER, FSYNC_FLUSH, FSYNC_CLOSE, FSYNC_POLICIES
+
+COLUMNAR_MAGIC = b'CLCH'
+COLUMNAR_VERSION = 1
+CHUNK_HEADER_FORMAT = '<4sBBI'
+COLUMN_HEADER_FORMAT = '<cBI'
+FILE_SUFFIX = '.col'
+
+ENCODING_RAW = 0
+ENCODING_DELTA = 1
+
+UNKNOWN_DEVICE_ID = -1  # device_id alanı olmayan paketler ('unknown')
+
+# csv_headers sırasıyla sütun tipleri (array typecode)
+# timestamp: epoch milisaniye, device_id: 'unknown' -> -1
+SCHEMA = [
+    ('timestamp', 'q'),
+    ('device_id', 'i'),
+    ('data_age', 'i'),
+    ('priority', 'B'),
+    ('rssi', 'h'),
+    ('channel_occupancy', 'f'),
+    ('collision_rate', 'f'),
+    ('neighbor_count', 'H'),
+    ('success', 'B'),
+    ('delay_used', 'i'),
+    ('collision_detected', 'B'),
+]
+COLUMN_TYPES = dict(SCHEMA)
+DELTA_COLUMNS = ('timestamp',)
+
+# Tam sayı typecode'larının değer aralıkları (dışındaki satırlar reddedilir)
+TYPE_RANGES = {
+    'B': (0, 2 ** 8 - 1),
+    'h': (-2 ** 15, 2 ** 15 - 1),
+    'H': (0, 2 ** 16 - 1),
+    'i': (-2 ** 31, 2 ** 31 - 1),
+    'q': (-2 ** 63, 2 ** 63 - 1),
+}
+
+
+def _to_int(value):
+    if value is None or value == '':
+        return 0
+    return int(round(float(value)))
+
+
+def _to_float(value):
+    if value is None or value == '':
+        return 0.0
+    return float(value)
+
+
+def _to_device_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return UNKNOWN_DEVICE_ID
+
+
+def _to_timestamp_ms(value):
+    """ISO zaman damgası (CSV) veya datetime -> epoch ms"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return int(value.timestamp() * 1000)
+
+
+def _to_datetime(value):
+    """datetime, ISO metni veya epoch ms -> datetime"""
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return datetime.fromtimestamp(value / 1000.0)
+
+
+def convert_row(row):
+    """
+    CSV satırını (csv_headers sırası) tipli değerlere dönüştür
+
+    Returns:
+        tuple: SCHEMA sırasıyla değerler
+
+    Raises:
+        ValueError: Değer dönüştürülemiyor veya sütun tipinin aralığı dışında
+            (JSON paketleri doğrulanmadan gelir, örn. priority=300 'B' sütununa sığmaz)
+    """
+    values = []
+    for (name, typecode), value in zip(SCHEMA, row):
+        if name == 'timestamp':
+            value = _to_timestamp_ms(value)
+        elif name == 'device_id':
+            value = _to_device_id(value)
+        elif typecode == 'f':
+            values.append(_to_float(value))
+            continue
+        else:
+            value = _to_int(value)
+        low, high = TYPE_RANGES[typecode]
+        if not low <= value <= high:
+            raise ValueError(f"{name} aralik disinda: {value} ({low}..{high})")
+        values.append(value)
+    return tuple(values)
+
+
+def partition_name(timestamp_ms):
+    """Satırın saatlik bölüm dosyası adı (YYYYMMDD_HH.col)"""
+    return datetime.fromtimestamp(timestamp_ms / 1000.0).strftime('%Y%m%d_%H') + FILE_SUFFIX
+
+
+def _to_le_bytes(column):
+    if sys.byteorder == 'big':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_le_bytes(typecode, data):
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == 'big':
+        column.byteswap()
+    return column
+
+
+def encode_chunk(rows):
+    """
+    Dönüştürülmüş satırları tek bir parça olarak kodla
+
+    Args:
+        rows: convert_row() çıktıları
+
+    Returns:
+        bytes: Parça verisi
+    """
+    parts = [struct.pack(CHUNK_HEADER_FORMAT, COLUMNAR_MAGIC, COLUMNAR_VERSION,
+                         len(SCHEMA), len(rows))]
+    for index, (name, typecode) in enumerate(SCHEMA):
+        column = array(typecode, [row[index] for row in rows])
+        encoding = ENCODING_RAW
+        if name in DELTA_COLUMNS and len(column) > 1:
+            encoding = ENCODING_DELTA
+            for i in range(len(column) - 1, 0, -1):
+                column[i] -= column[i - 1]
+
+        payload = zlib.compress(_to_le_bytes(column))
+        name_bytes = name.encode('utf-8')
+        parts.append(struct.pack('<B', len(name_bytes)))
+        parts.append(name_bytes)
+        parts.append(struct.pack(COLUMN_HEADER_FORMAT, typecode.encode('ascii'), encoding,
+                                 len(payload)))
+        parts.append(payload)
+    return b''.join(parts)
+
+
+def iter_chunks(path, columns=None):
+    """
+    Dosyadaki parçaları sırayla çöz
+
+    Args:
+        path: .col dosyası
+        columns: Okunacak sütun isimleri (None ise hepsi; diğerleri açılmaz)
+
+    Yields:
+        dict: sütun ismi -> array
+    """
+    header_size = struct.calcsize(CHUNK_HEADER_FORMAT)
+    column_header_size = struct.calcsize(COLUMN_HEADER_FORMAT)
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    offset = 0
+    while offset < len(data):
+        if len(data) - offset < header_size:
+            raise ValueError(f"Eksik parca basligi: {path}")
+        magic, version, n_columns, n_rows = struct.unpack_from(CHUNK_HEADER_FORMAT, data, offset)
+        if magic != COLUMNAR_MAGIC:
+            raise ValueError(f"Gecersiz sutun dosyasi: {path}")
+        if version != COLUMNAR_VERSION:
+            raise ValueError(f"Desteklenmeyen versiyon: {version}")
+        offset += header_size
+
+        chunk = {}
+        for _ in range(n_columns):
+            name_len = data[offset]
+            name = data[offset + 1:offset + 1 + name_len].decode('utf-8')
+            offset += 1 + name_len
+            typecode, encoding, size = struct.unpack_from(COLUMN_HEADER_FORMAT, data, offset)
+            offset += column_header_size
+            payload = data[offset:offset + size]
+            offset += size
+
+            if columns is not None and name not in columns:
+                continue
+            column = _from_le_bytes(typecode.decode('ascii'), zlib.decompress(payload))
+            if encoding == ENCODING_DELTA:
+                for i in range(1, len(column)):
+                    column[i] += column[i - 1]
+            if len(column) != n_rows:
+                raise ValueError(f"Sutun uzunlugu hatali: {name}")
+            chunk[name] = column
+        yield chunk
+
+
+def partition_files(root_dir, start=None, end=None):
+    """
+    Zaman aralığıyla kesişen saatlik bölüm dosyaları (sıralı)
+
+    Args:
+        root_dir: Sütunlu veri dizini
+        start, end: datetime, ISO metni veya epoch ms (None ise sınırsız)
+    """
+    if not os.path.isdir(root_dir):
+        return []
+    start_key = _to_datetime(start).strftime('%Y%m%d_%H') if start is not None else None
+    end_key = _to_datetime(end).strftime('%Y%m%d_%H') if end is not None else None
+
+    files = []
+    for name in sorted(os.listdir(root_dir)):
+        if not name.endswith(FILE_SUFFIX):
+            continue
+        key = name[:-len(FILE_SUFFIX)]
+        if start_key is not None and key < start_key:
+            continue
+        if end_key is not None and key > end_key:
+            continue
+        files.append(os.path.join(root_dir, name))
+    return files
+
+
+def read_columns(root_dir, columns=None, start=None, end=None):
+    """
+    Sütunları zaman aralığına göre oku
+
+    Args:
+        root_dir: Sütunlu veri dizini
+        columns: Sütun isimleri (None ise tüm şema)
+        start, end: datetime, ISO metni veya epoch ms; [start, end) aralığı
+
+    Returns:
+        dict: sütun ismi -> array (timestamp epoch ms)
+
+    Örnek:
+        data = read_columns('data/columnar', ['device_id', 'success'])
+        df = pandas.DataFrame(data)
+    """
+    names = list(columns) if columns is not None else [name for name, _ in SCHEMA]
+    for name in names:
+        if name not in COLUMN_TYPES:
+            raise ValueError(f"Bilinmeyen sutun: {name}")
+
+    start_ms = _to_timestamp_ms(_to_datetime(start)) if start is not None else None
+    end_ms = _to_timestamp_ms(_to_datetime(end)) if end is not None else None
+    filtered = start_ms is not None or end_ms is not None
+
+    # Zaman filtresi için timestamp sütunu da okunur
+    wanted = set(names)
+    if filtered:
+        wanted.add('timestamp')
+
+    result = {name: array(COLUMN_TYPES[name]) for name in names}
+    for path in partition_files(root_dir, start, end):
+        for chunk in iter_chunks(path, wanted):
+            if not filtered:
+                for name in names:
+                    result[name].extend(chunk[name])
+                continue
+
+            timestamps = chunk['timestamp']
+            keep = [i for i, ts in enumerate(timestamps)
+                    if (start_ms is None or ts >= start_ms) and (end_ms is None or ts < end_ms)]
+            if len(keep) == len(timestamps):
+                for name in names:
+                    result[name].extend(chunk[name])
+            else:
+                for name in names:
+                    column = chunk[name]
+                    result[name].extend(column[i] for i in keep)
+    return result
+
+
+class ColumnarWriter:
+    def __init__(self, root_dir, headers=None, buffer_rows=4096, flush_interval_s=5.0,
+                 fsync=FSYNC_NEVER):
+        """
+        Sütunlu yazıcı (BufferedCsvWriter ile aynı arayüz)
+
+        Args:
+            root_dir: Saatlik bölüm dosyalarının dizini
+            headers: Satır sütun sırası (SCHEMA ile aynı olmalı)
+            buffer_rows: Bu kadar satır birikince parça yaz (büyük parça daha iyi sıkışır)
+            flush_interval_s: En eski satır bu kadar beklediyse parça yaz
+            fsync: 'never', 'flush' veya 'close'
+        """
+        if headers is not None and list(headers) != [name for name, _ in SCHEMA]:
+            raise ValueError("Sutun sirasi sutunlu sema ile uyusmuyor")
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Gecersiz fsync politikasi: {fsync}")
+
+        self.root_dir = root_dir
+        self.buffer_rows = buffer_rows
+        self.flush_interval_s = flush_interval_s
+        self.fsync = fsync
+
+        self.buffer = []
+        self.buffer_since = None
+        self.touched_files = set()  # fsync='close' için
+
+        # İzleme için
+        self.rows_written = 0
+        self.rows_rejected = 0
+        self.flush_count = 0
+        self.bytes_written = 0
+
+    def open(self):
+        """Dizini oluştur"""
+        os.makedirs(self.root_dir, exist_ok=True)
+
+    def write_row(self, row):
+        """Satırı tampona ekle"""
+        self.write_rows((row,))
+
+    def write_rows(self, rows):
+        """
+        Satırları dönüştürüp tampona ekle, boyut veya süre dolduysa yaz
+
+        Raises:
+            ValueError: Dönüştürülemeyen satırlar atlandı (geçerli satırlar tampona
+                eklenir ve yazılır; DataCollector._write_rows uyarı olarak yazar)
+        """
+        if not self.buffer:
+            self.buffer_since = time.monotonic()
+        rejected = 0
+        error = None
+        for row in rows:
+            try:
+                self.buffer.append(convert_row(row))
+            except (TypeError, ValueError) as e:
+                rejected += 1
+                error = e
+        if not self.buffer:
+            self.buffer_since = None
+        elif len(self.buffer) >= self.buffer_rows:
+            self.flush()
+        else:
+            self.flush_if_due()
+        if rejected:
+            self.rows_rejected += rejected
+            raise ValueError(f"{rejected} satir atlandi: {error}")
+
+    def flush_if_due(self):
+        """En eski satır flush_interval_s kadar beklediyse yaz"""
+        if self.buffer and time.monotonic() - self.buffer_since >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self):
+        """
+        Tamponu saatlik bölümlere ayırıp her birine bir parça ekle
+        Kodlanamayan bölüm atlanır ve tampondan çıkarılır (sonraki yazmaları
+        kilitlemez); dosya hatasında tampon tekrar denemek için korunur
+
+        Raises:
+            ValueError: Kodlanamayan bölüm satırları atlandı (diğer bölümler yazıldı)
+        """
+        if not self.buffer:
+            return
+        self.open()
+
+        partitions = {}
+        for row in self.buffer:
+            partitions.setdefault(partition_name(row[0]), []).append(row)
+
+        chunks = []
+        rejected = 0
+        error = None
+        for name, rows in partitions.items():
+            try:
+                chunks.append((name, encode_chunk(rows)))
+            except (OverflowError, TypeError, ValueError) as e:
+                rejected += len(rows)
+                error = e
+        if rejected:
+            self.rows_rejected += rejected
+            self.buffer = [row for name, _ in chunks for row in partitions[name]]
+
+        for name, chunk in chunks:
+            path = os.path.join(self.root_dir, name)
+            with open(path, 'ab') as f:
+                f.write(chunk)
+                f.flush()
+                if self.fsync == FSYNC_FLUSH:
+                    os.fsync(f.fileno())
+            self.touched_files.add(path)
+            self.bytes_written += len(chunk)
+
+        self.rows_written += len(self.buffer)
+        self.flush_count += 1
+        self.buffer = []
+        self.buffer_since = None
+        if rejected:
+            raise ValueError(f"{rejected} satir kodlanamadi, atlandi: {error}")
+
+    def close(self):
+        """Tamponu yaz (fsync='close' ise yazılan dosyaları diske zorla)"""
+        self.flush()
+        if self.fsync == FSYNC_CLOSE:
+            for path in self.touched_files:
+                with open(path, 'rb') as f:
+                    os.fsync(f.fileno())
+        self.touched_files = set()
+
+
+def convert_csv(csv_path, root_dir, buffer_rows=65536):
+    """
+    Mevcut CSV dosyasını sütunlu formata dönüştür
+
+    Args:
+        csv_path: collected_data.csv yolu
+        root_dir: Hedef dizin
+        buffer_rows: Parça başına satır
+
+    Returns:
+        int: Dönüştürülen satır sayısı
+    """
+    writer = ColumnarWriter(root_dir, buffer_rows=buffer_rows, flush_interval_s=float('inf'))
+    writer.open()
+    with open(csv_path, 'r', newline='') as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return 0
+        index = [header.index(name) for name, _ in SCHEMA]
+        for row in reader:
+            if not row:
+                continue
+            try:
+                writer.write_row([row[i] for i in index])
+            except ValueError:
+                pass  # Geçersiz satır atlanır (rows_rejected'da sayılır)
+    writer.close()
+    if writer.rows_rejected:
+        print(f"UYARI: {writer.rows_rejected} gecersiz satir atlandi")
+    return writer.rows_written
+
+
+def _print_info(root_dir):
+    total_rows = 0
+    total_bytes = 0
+    for path in partition_files(root_dir):
+        rows = sum(len(chunk['timestamp']) for chunk in iter_chunks(path, ('timestamp',)))
+        size = os.path.getsize(path)
+        total_rows += rows
+        total_bytes += size
+        print(f"  {os.path.basename(path)}: {rows} satir, {size} byte")
+    print(f"Toplam: {total_rows} satir, {total_bytes} byte")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Sütunlu veri depolama araçları')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert_parser = subparsers.add_parser('convert', help='CSV dosyasını sütunlu formata dönüştür')
+    convert_parser.add_argument('csv_path')
+    convert_parser.add_argument('root_dir')
+    info_parser = subparsers.add_parser('info', help='Bölüm dosyalarını listele')
+    info_parser.add_argument('root_dir')
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        count = convert_csv(args.csv_path, args.root_dir)
+        csv_size = os.path.getsize(args.csv_path)
+        col_size = sum(os.path.getsize(p) for p in partition_files(args.root_dir))
+        print(f"{count} satir donusturuldu: {args.csv_path} ({csv_size} byte) -> "
+              f"{args.root_dir} ({col_size} byte)")
+    else:
+        _print_info(args.root_dir)
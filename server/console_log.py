@@ -0,0 +1,132 @@
+"""
+Kuyruklu Konsol Logu
+Paket başına ekran çıktılarını paket işleme yolundan ayırır: mesajlar
+bloklamayan bir kuyruğa eklenir, biçimlendirme ve stdout'a yazma ayrı bir
+thread'de yapılır. Terminal veya pipe yavaşlasa da veri alımı durmaz.
+
+Yük altında çıktı miktarı sınırlanır:
+    - Örnekleme: Rutin mesajlardan (BASARILI satırları) her N'de biri yazılır
+    - Hız sınırı: Saniyede en fazla rate_limit mesaj kuyruğa eklenir
+    - Kuyruk dolarsa mesaj beklemeden düşürülür
+Bastırılan mesajların sayısı her saniye tek satırlık özet olarak yazılır.
+"""
+
+import queue
+import sys
+import threading
+import time
+
+
+class ConsoleLog:
+    def __init__(self, rate_limit=50, sample_every=1, queue_size=1000, stream=None):
+        """
+        Kuyruklu, hız sınırlı konsol logu
+
+        Args:
+            rate_limit: Saniyede en fazla yazılacak mesaj (None veya 0: sınırsız)
+            sample_every: info() mesajlarından her N'de biri yazılır (1: hepsi)
+            queue_size: Yazılmayı bekleyen en fazla mesaj (dolunca düşürülür)
+            stream: Çıktı akışı (None ise sys.stdout)
+        """
+        if sample_every < 1:
+            raise ValueError(f"Gecersiz ornekleme: {sample_every}")
+
+        self.rate_limit = rate_limit
+        self.sample_every = sample_every
+        self.stream = stream
+
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.thread = None
+
+        # Hız sınırı penceresi (1 saniye)
+        self.window_start = time.monotonic()
+        self.window_count = 0
+        self.sample_counter = 0
+
+        # Son özetten beri bastırılan mesajlar
+        self.suppressed = 0   # Hız sınırı veya dolu kuyruk
+        self.sampled_out = 0  # Örnekleme
+
+        # İzleme için (toplam)
+        self.messages_written = 0
+        self.messages_dropped = 0
+
+    def info(self, message, *args):
+        """Rutin mesaj (örneklenir ve hız sınırına tabidir)"""
+        self.sample_counter += 1
+        if self.sample_counter >= self.sample_every:
+            self.sample_counter = 0
+            self._submit(message, args)
+        else:
+            self.sampled_out += 1
+
+    def warning(self, message, *args):
+        """Önemli mesaj (örneklenmez, hız sınırına tabidir)"""
+        self._submit(message, args)
+
+    def write(self, message, *args):
+        """Sınırsız mesaj (periyodik özetler gibi seyrek çıktılar için)"""
+        self._put(message, args)
+
+    def _submit(self, message, args):
+        now = time.monotonic()
+        if now - self.window_start >= 1.0:
+            self._report_suppressed()
+            self.window_start = now
+            self.window_count = 0
+
+        if self.rate_limit and self.window_count >= self.rate_limit:
+            self.suppressed += 1
+            self.messages_dropped += 1
+            return
+        self.window_count += 1
+        self._put(message, args)
+
+    def _put(self, message, args):
+        """Mesajı beklemeden kuyruğa ekle (args yazıcı thread'de str.format ile uygulanır)"""
+        if self.thread is None:
+            self.start()
+        try:
+            self.queue.put_nowait((message, args))
+        except queue.Full:
+            self.suppressed += 1
+            self.messages_dropped += 1
+
+    def _report_suppressed(self):
+        if self.suppressed or self.sampled_out:
+            self._put("[Log] {} mesaj bastirildi, {} mesaj orneklemeyle atlandi",
+                      (self.suppressed, self.sampled_out))
+            self.suppressed = 0
+            self.sampled_out = 0
+
+    def start(self):
+        """Yazıcı thread'i başlat (ilk mesajda otomatik başlar)"""
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._writer_loop, name='console-log',
+                                           daemon=True)
+            self.thread.start()
+
+    def _writer_loop(self):
+        stream = self.stream or sys.stdout
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            message, args = item
+            try:
+                stream.write((message.format(*args) if args else message) + '\n')
+                self.messages_written += 1
+            except Exception as e:
+                stream.write(f"Log bicimlendirme hatasi: {e}\n")
+            if self.queue.empty():
+                stream.flush()
+        stream.flush()
+
+    def close(self):
+        """Bekleyen mesajları ve son özeti yaz, thread'i durdur"""
+        if self.thread is None:
+            return
+        self._report_suppressed()
+        self.queue.put(None)  # Kuyruk doluysa yazıcı boşaltana kadar bekler
+        self.thread.join()
+        self.thread = None
@@ -0,0 +1,109 @@
+"""
+Tamponlu CSV Yazıcı
+Dosyayı sunucu boyunca açık tutar, satırları bellekte biriktirir ve
+boyut veya süre dolduğunda tek seferde yazar (paket başına open/close yok)
+"""
+
+import csv
+import os
+import time
+
+# fsync politikaları
+FSYNC_NEVER = 'never'   # İşletim sistemi karar verir (en hızlı)
+FSYNC_FLUSH = 'flush'   # Her tampon boşaltmada fsync (en güvenli)
+FSYNC_CLOSE = 'close'   # Sadece kapanışta fsync
+FSYNC_POLICIES = (FSYNC_NEVER, FSYNC_FLUSH, FSYNC_CLOSE)
+
+
+class BufferedCsvWriter:
+    def __init__(self, path, headers, buffer_rows=256, flush_interval_s=1.0, fsync=FSYNC_NEVER):
+        """
+        Tamponlu CSV yazıcı
+
+        Args:
+            path: CSV dosya yolu
+            headers: Başlık satırı (dosya yoksa veya boşsa yazılır)
+            buffer_rows: Bu kadar satır birikince dosyaya yaz
+            flush_interval_s: En eski satır bu kadar beklediyse dosyaya yaz
+            fsync: 'never', 'flush' veya 'close'
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Gecersiz fsync politikasi: {fsync}")
+
+        self.path = path
+        self.headers = headers
+        self.buffer_rows = buffer_rows
+        self.flush_interval_s = flush_interval_s
+        self.fsync = fsync
+
+        self.file = None
+        self.writer = None
+        self.buffer = []
+        self.buffer_since = None  # Tampondaki en eski satırın zamanı
+
+        # İzleme için
+        self.rows_written = 0
+        self.flush_count = 0
+
+    def open(self):
+        """Dosyayı append modunda aç, yeni dosyaya başlık yaz"""
+        if self.file is not None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.file = open(self.path, 'a', newline='')
+        self.writer = csv.writer(self.file)
+        if self.file.tell() == 0:
+            self.writer.writerow(self.headers)
+            self.file.flush()
+
+    def write_row(self, row):
+        """Satırı tampona ekle"""
+        self.write_rows((row,))
+
+    def write_rows(self, rows):
+        """Satırları tampona ekle, boyut veya süre dolduysa dosyaya yaz"""
+        if not self.buffer:
+            self.buffer_since = time.monotonic()
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.buffer_rows:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """En eski satır flush_interval_s kadar beklediyse dosyaya yaz"""
+        if self.buffer and time.monotonic() - self.buffer_since >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self):
+        """Tampondaki tüm satırları dosyaya yaz"""
+        if not self.buffer:
+            return
+        if self.file is None:
+            self.open()
+
+        self.writer.writerows(self.buffer)
+        self.file.flush()
+        if self.fsync == FSYNC_FLUSH:
+            os.fsync(self.file.fileno())
+
+        self.rows_written += len(self.buffer)
+        self.flush_count += 1
+        self.buffer = []
+        self.buffer_since = None
+
+    def close(self):
+        """Tamponu yaz ve dosyayı kapat"""
+        if self.file is None:
+            return
+        try:
+            self.flush()
+            if self.fsync != FSYNC_NEVER:
+                os.fsync(self.file.fileno())
+        finally:
+            self.file.close()
+            self.file = None
+            self.writer = None
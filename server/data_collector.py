@@ -3,15 +3,55 @@ Veri Toplama Sunucusu
 LoPy4 cihazlarından gelen verileri toplar ve kaydeder
 """
 
+import asyncio
+import os
 import socket
 import json
 import time
-import csv
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from wire_protocol import (is_binary, packet_type, decode_packet, decode_batch, encode_ack,
+                           encode_batch_ack, WireProtocolError, TYPE_BATCH,
+                           PROFILE_BUCKETS_US)
+from csv_writer import BufferedCsvWriter, FSYNC_NEVER, FSYNC_POLICIES
+from console_log import ConsoleLog
+from metrics import CollectorMetrics
+
+# Depolama modları (sütunlu ve SQLite modları gerektiğinde yüklenir)
+STORAGE_CSV = 'csv'
+STORAGE_COLUMNAR = 'columnar'
+STORAGE_SQLITE = 'sqlite'
+STORAGE_BACKENDS = (STORAGE_CSV, STORAGE_COLUMNAR, STORAGE_SQLITE)
+
+# Çarpışma mesajında gösterilen en fazla cihaz (tümü _detect_collision ile döner)
+COLLISION_PRINT_PEERS = 5
+
+# uvloop opsiyonel (yoksa standart asyncio event loop kullanılır)
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+
+class CollectorProtocol(asyncio.DatagramProtocol):
+    def __init__(self, collector):
+        """Gelen datagramları DataCollector'ın paket kuyruğuna aktarır"""
+        self.collector = collector
+
+    def datagram_received(self, data, addr):
+        self.collector._enqueue_packet(data, addr)
+
+    def error_received(self, exc):
+        self.collector.console.warning("Socket hatası: {}", exc)
+
 
 class DataCollector:
-    def __init__(self, host='0.0.0.0', port=5000, data_file='data/collected_data.csv'):
+    def __init__(self, host='0.0.0.0', port=5000, data_file='data/collected_data.csv',
+                 packet_queue_size=1024, stats_interval_s=None, use_uvloop=False,
+                 csv_buffer_rows=256, csv_flush_interval_s=1.0, csv_fsync=FSYNC_NEVER,
+                 storage=STORAGE_CSV, storage_path=None, log_rate_limit=50, log_sample_every=1,
+                 metrics_host='127.0.0.1', metrics_port=None, metrics_snapshot_path=None,
+                 metrics_snapshot_interval_s=10.0):
         """
         Veri toplama sunucusu
         
@@ -19,18 +59,71 @@ class DataCollector:
             host: Dinlenecek IP adresi
             port: Port numarası
             data_file: Veri kayıt dosyası
+            packet_queue_size: İşlenmeyi bekleyen en fazla paket (dolunca okuma durur)
+            stats_interval_s: Periyodik istatistik özeti aralığı (None ise kapalı)
+            use_uvloop: uvloop kuruluysa onun event loop'unu kullan
+            csv_buffer_rows: Bu kadar satır birikince CSV'ye yaz
+            csv_flush_interval_s: Satırlar en fazla bu kadar bellekte bekler
+            csv_fsync: fsync politikası ('never', 'flush', 'close')
+            storage: Depolama modu ('csv', 'columnar' veya 'sqlite'); tampon ve
+                fsync ayarları tüm modlarda geçerlidir
+            storage_path: Sütunlu veri dizini veya SQLite dosyası (None ise
+                data_file ile aynı dizinde 'columnar' / 'collected_data.db');
+                csv modunda data_file kullanılır
+            log_rate_limit: Saniyede en fazla paket/çarpışma satırı (None: sınırsız)
+            log_sample_every: BASARILI satırlarından her N'de biri yazılır
+            metrics_host: Metrik HTTP uç noktasının dinlediği adres
+            metrics_port: Metrik HTTP portu (None ise uç nokta kapalı)
+            metrics_snapshot_path: Periyodik JSON metrik dosyası (None ise yazılmaz)
+            metrics_snapshot_interval_s: Metrik dosyası yazma aralığı
         """
+        if storage not in STORAGE_BACKENDS:
+            raise ValueError(f"Gecersiz depolama modu: {storage}")
+
         self.host = host
         self.port = port
         self.data_file = data_file
         self.socket = None
         
+        # asyncio durumu (start_async içinde oluşturulur)
+        self.transport = None
+        self.packet_queue = None   # (data, addr) -> paket işleme görevi
+        self.persist_queue = None  # CSV satırları -> kayıt görevi
+        self.packet_queue_size = packet_queue_size
+        self.stats_interval_s = stats_interval_s
+        self.use_uvloop = use_uvloop
+        self.reading_paused = False
+        
+        # Tamponlu satır yazıcı (_init_storage içinde açılır)
+        self.storage = storage
+        self.storage_path = storage_path
+        self.row_writer = None
+        self.csv_buffer_rows = csv_buffer_rows
+        self.csv_flush_interval_s = csv_flush_interval_s
+        self.csv_fsync = csv_fsync
+        
+        # Paket başına ekran çıktıları (ayrı thread'de yazılır, yük altında sınırlanır)
+        self.console = ConsoleLog(rate_limit=log_rate_limit, sample_every=log_sample_every)
+        
+        # Canlı metrikler (HTTP uç noktası ve snapshot dosyası start_async içinde başlar)
+        self.metrics = CollectorMetrics(self)
+        self.metrics_host = metrics_host
+        self.metrics_port = metrics_port
+        self.metrics_snapshot_path = metrics_snapshot_path
+        self.metrics_snapshot_interval_s = metrics_snapshot_interval_s
+        
         # İstatistikler
         self.stats = defaultdict(int)
         self.device_stats = defaultdict(lambda: {'received': 0, 'failed': 0})
         
+        # Cihazların gönderdiği profil özetleri (tüm filo, aşama -> kova sayaçları)
+        self.profile_counts = defaultdict(lambda: [0] * (len(PROFILE_BUCKETS_US) + 1))
+        self.profile_max_us = defaultdict(int)
+        
         # Çarpışma tespiti için son paket zamanları
-        self.last_packet_times = {}  # device_id -> timestamp
+        # Eskiden yeniye sıralı tutulur (her pakette cihaz sona taşınır),
+        # pencereden çıkan cihazlar baştan düşülür
+        self.last_packet_times = OrderedDict()  # device_id -> timestamp (pencere içindeki cihazlar)
         self.collision_window_ms = 800 
         
         # CSV başlıkları
@@ -41,150 +134,437 @@ class DataCollector:
         ]
         
     def start(self):
-        """Sunucuyu başlat"""
-        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        self.socket.bind((self.host, self.port))
-        self.socket.settimeout(1.0)  # 1 saniye timeout (non-blocking için)
+        """Sunucuyu başlat (Ctrl+C ile durdurulana kadar bloklar)"""
+        if self.use_uvloop:
+            if uvloop is not None:
+                asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+            else:
+                print("UYARI: uvloop bulunamadi, standart asyncio kullaniliyor")
+        
+        try:
+            asyncio.run(self.start_async())
+        except KeyboardInterrupt:
+            print("\nSunucu durduruluyor...")
+        finally:
+            # Tamponda kalan satırları her durumda yaz
+            self._close_storage()
+            self.console.close()
+            self._print_stats()
+    
+    async def start_async(self):
+        """
+        Sunucuyu çalışan event loop içinde başlat
+        
+        Görevler:
+            - CollectorProtocol: datagramları paket kuyruğuna ekler
+            - _packet_worker: paketleri işler, ACK'yı transport ile bloklamadan gönderir
+            - _persist_worker: CSV satırlarını toplu olarak yazıcı tamponuna aktarır
+            - _flush_worker: tamponu csv_flush_interval_s aralığıyla dosyaya yazar
+            - _stats_reporter: periyodik istatistik özeti (stats_interval_s verildiyse)
+            - metrics.run: paket hızı örnekleri ve periyodik metrik dosyası
+            - Metrik HTTP uç noktası (metrics_port verildiyse)
+        """
+        loop = asyncio.get_running_loop()
+        self.packet_queue = asyncio.Queue(maxsize=self.packet_queue_size)
+        self.persist_queue = asyncio.Queue()
+        
+        self.socket = self._create_socket()
+        self.transport, _ = await loop.create_datagram_endpoint(
+            lambda: CollectorProtocol(self), sock=self.socket)
         
         print(f"Veri toplama sunucusu başlatıldı: {self.host}:{self.port}")
         
-        # CSV dosyasını başlat
-        self._init_csv_file()
+        # Depolamayı başlat (CSV dosyası veya sütunlu dizin)
+        self._init_storage()
+        
+        if self.metrics_port is not None:
+            await self.metrics.start_server(self.metrics_host, self.metrics_port)
+            print(f"Metrik uç noktası: http://{self.metrics_host}:{self.metrics_port}/metrics")
+        
+        tasks = [
+            asyncio.create_task(self._packet_worker()),
+            asyncio.create_task(self._persist_worker()),
+            asyncio.create_task(self._flush_worker()),
+            asyncio.create_task(self.metrics.run(self.metrics_snapshot_path,
+                                                 self.metrics_snapshot_interval_s)),
+        ]
+        if self.stats_interval_s:
+            tasks.append(asyncio.create_task(self._stats_reporter()))
         
         try:
-            while True:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await self.metrics.close_server()
+            self.transport.close()
+            self.transport = None
+            # Kuyrukta kalan satırları kaydet ve dosyayı kapat
+            self._write_rows(self._drain_queue(self.persist_queue))
+            self._close_storage()
+            if self.metrics_snapshot_path:
                 try:
-                    data, addr = self.socket.recvfrom(4096)
-                    self._process_packet(data, addr)
-                except socket.timeout:
-                    continue
+                    self.metrics.write_snapshot(self.metrics_snapshot_path)
+                except OSError as e:
+                    print(f"Metrik dosyasi yazilamadi: {e}")
+            self.persist_queue = None
+            self.packet_queue = None
+    
+    def _enqueue_packet(self, data, addr):
+        """
+        Datagramı işleme kuyruğuna ekle (backpressure: kuyruk dolunca
+        socket okuması durdurulur, paketler çekirdek tamponunda bekler)
+        """
+        try:
+            self.packet_queue.put_nowait((data, addr))
+        except asyncio.QueueFull:
+            self.stats['dropped_packets'] += 1
+            return
+        
+        if self.packet_queue.full() and not self.reading_paused:
+            try:
+                self.transport.pause_reading()
+                self.reading_paused = True
+            except (AttributeError, NotImplementedError):
+                pass  # Desteklenmiyorsa kuyruk dolunca paket düşürülür
+    
+    async def _packet_worker(self):
+        """Paket kuyruğunu işle"""
+        while True:
+            data, addr = await self.packet_queue.get()
+            
+            # Kuyruk yarıya indiğinde okumayı sürdür
+            if self.reading_paused and self.packet_queue.qsize() <= self.packet_queue_size // 2:
+                self.transport.resume_reading()
+                self.reading_paused = False
+            
+            start = time.perf_counter()
+            try:
+                self._process_packet(data, addr)
+            except Exception as e:
+                self.console.warning("Paket işleme hatası: {}", e)
+            self.metrics.processing_seconds.observe(time.perf_counter() - start)
+    
+    async def _persist_worker(self):
+        """CSV satırlarını kuyruktan alıp toplu olarak yaz"""
+        while True:
+            rows = [await self.persist_queue.get()]
+            rows.extend(self._drain_queue(self.persist_queue))
+            self._write_rows(rows)
+    
+    async def _flush_worker(self):
+        """Trafik azken tamponda bekleyen satırları süre dolunca yaz"""
+        while True:
+            await asyncio.sleep(self.csv_flush_interval_s)
+            if self.row_writer is not None:
+                try:
+                    self.row_writer.flush_if_due()
                 except Exception as e:
-                    print(f"Paket işleme hatası: {e}")
-        except KeyboardInterrupt:
-            print("\nSunucu durduruluyor...")
-        finally:
-            self._print_stats()
-            if self.socket:
-                self.socket.close()
+                    self.console.warning("CSV kayıt hatası: {}", e)
+    
+    async def _stats_reporter(self):
+        """Periyodik kısa istatistik özeti"""
+        while True:
+            await asyncio.sleep(self.stats_interval_s)
+            self.console.write(f"[Istatistik] alinan: {self.stats['total_received']} | "
+                               f"carpisma: {self.stats['collisions_detected']} | "
+                               f"kuyruk: {self.packet_queue.qsize()} | "
+                               f"dusen: {self.stats['dropped_packets']} | "
+                               f"hiz: {self.metrics.packets_per_second():.1f} paket/sn | "
+                               f"log bastirilan: {self.console.messages_dropped}")
+    
+    @staticmethod
+    def _drain_queue(queue):
+        """Kuyruktaki tüm öğeleri beklemeden al"""
+        items = []
+        if queue is None:
+            return items
+        while True:
+            try:
+                items.append(queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return items
     
-    def _init_csv_file(self):
-        """CSV dosyasını başlat"""
-        import os
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
+    def _create_socket(self):
+        """UDP socket oluştur ve bind et"""
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind((self.host, self.port))
+        return sock
+    
+    def _init_storage(self):
+        """
+        Depolamayı aç: csv modunda dosya yoksa veya boşsa başlıklar yazılır,
+        sütunlu modda veri dizini, sqlite modunda tablo ve indeksler oluşturulur
+        """
+        if self.row_writer is None:
+            self.row_writer = self._create_row_writer()
+        self.row_writer.open()
+    
+    def _create_row_writer(self):
+        """Depolama moduna göre tamponlu yazıcıyı oluştur"""
+        if self.storage == STORAGE_COLUMNAR:
+            from columnar_storage import ColumnarWriter
+            root_dir = self.storage_path
+            if root_dir is None:
+                root_dir = os.path.join(os.path.dirname(self.data_file), 'columnar')
+            return ColumnarWriter(
+                root_dir, self.csv_headers,
+                buffer_rows=self.csv_buffer_rows,
+                flush_interval_s=self.csv_flush_interval_s,
+                fsync=self.csv_fsync)
         
-        # Dosya yoksa başlıkları yaz
+        if self.storage == STORAGE_SQLITE:
+            from sqlite_storage import SqliteWriter
+            db_path = self.storage_path
+            if db_path is None:
+                db_path = os.path.splitext(self.data_file)[0] + '.db'
+            return SqliteWriter(
+                db_path, self.csv_headers,
+                buffer_rows=self.csv_buffer_rows,
+                flush_interval_s=self.csv_flush_interval_s,
+                fsync=self.csv_fsync)
+        
+        return BufferedCsvWriter(
+            self.data_file, self.csv_headers,
+            buffer_rows=self.csv_buffer_rows,
+            flush_interval_s=self.csv_flush_interval_s,
+            fsync=self.csv_fsync)
+    
+    def _close_storage(self):
+        """Tamponu yaz ve depolamayı kapat"""
+        if self.row_writer is None:
+            return
         try:
-            with open(self.data_file, 'r') as f:
-                pass  # Dosya varsa başlık yazma
-        except FileNotFoundError:
-            with open(self.data_file, 'w', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(self.csv_headers)
+            self.row_writer.close()
+        except Exception as e:
+            print(f"CSV kayıt hatası: {e}")
     
     def _process_packet(self, data, addr):
         """
         Gelen paketi işle (Düzeltilmiş)
         """
         try:
-            packet = json.loads(data.decode('utf-8'))
-            
-            device_id = packet.get('device_id', 'unknown')
-            # timestamp yoksa sunucu zamanını kullan
-            packet_timestamp = packet.get('timestamp', int(time.time() * 1000))
-            server_timestamp = int(time.time() * 1000)
-            
-            # --- DÜZELTME: .get() içine varsayılan değerleri (0 veya -90) ekledik ---
-            data_age = packet.get('data_age', 0)
-            priority = packet.get('priority', 1)
-            delay_used = packet.get('delay_used', 0)
-            
-            rssi_value = packet.get('rssi', -90)            # Boşsa -90 yap
-            channel_occupancy = packet.get('channel_occupancy', 0.0) # Boşsa 0.0 yap
-            collision_rate = packet.get('collision_rate', 0.0)       # Boşsa 0.0 yap
-            neighbor_count = packet.get('neighbor_count', 0)         # Boşsa 0 yap
-            # -----------------------------------------------------------------------
-
-            # Çarpışma tespiti: Son 100ms içinde başka bir cihazdan paket geldi mi?
-            collision_detected = False
-            for other_device_id, last_time in self.last_packet_times.items():
-                if other_device_id != device_id:
-                    time_diff = abs(server_timestamp - last_time)
-                    if time_diff < self.collision_window_ms:
-                        collision_detected = True
-                        self.stats['collisions_detected'] += 1
-                        print(f"CARPISMA! {device_id} <-> {other_device_id} ({time_diff}ms)")
-                        break
-            
-            # Son paket zamanını güncelle
-            self.last_packet_times[device_id] = server_timestamp
-            
-            # Eski kayıtları temizle
-            current_time = server_timestamp
-            self.last_packet_times = {
-                dev_id: ts for dev_id, ts in self.last_packet_times.items()
-                if current_time - ts < 1000
-            }
-            
-            # İstatistikleri güncelle
-            self.stats['total_received'] += 1
-            if collision_detected:
-                self.device_stats[device_id]['failed'] += 1
+            # İkili protokol (magic byte) veya geriye dönük uyumluluk için JSON
+            binary = is_binary(data)
+            if binary and packet_type(data) == TYPE_BATCH:
+                self._process_batch(data, addr)
+                return
+            start = time.perf_counter()
+            if binary:
+                packet = decode_packet(data)
+                self.stats['binary_packets'] += 1
             else:
-                self.device_stats[device_id]['received'] += 1
+                packet = json.loads(data.decode('utf-8'))
+            self.metrics.parse_seconds.observe(time.perf_counter() - start)
             
-            # Veriyi CSV'ye kaydet
-            row = [
-                datetime.now().isoformat(),
-                device_id,
-                data_age,
-                priority,
-                rssi_value,         # Düzelttik
-                channel_occupancy,  # Düzelttik
-                collision_rate,     # Düzelttik
-                neighbor_count,     # Düzelttik
-                0 if collision_detected else 1,
-                delay_used,
-                1 if collision_detected else 0
-            ]
-            
-            self._save_to_csv(row)
+            device_id = packet.get('device_id', 'unknown')
+            collision_detected = self._record_packet(packet)
             
             # ACK paketi gönder (cihaza collision bilgisini bildirmek için)
             ack_packet = {
                 'type': 'ack',
                 'device_id': device_id,
-                'timestamp': server_timestamp,
+                'timestamp': int(time.time() * 1000),
                 'success': 0 if collision_detected else 1,
                 'collision_detected': 1 if collision_detected else 0
             }
-            try:
-                ack_json = json.dumps(ack_packet)
-                ack_bytes = ack_json.encode('utf-8')
-                # Cihazın kaynak portuna gönder (5000 + device_id)
-                ack_port = 5000 + device_id
-                self.socket.sendto(ack_bytes, (addr[0], ack_port))
-            except Exception as e:
-                print(f"ACK gonderim hatasi: {e}")
-            
-            # Ekrana daha temiz bilgi basalım
-            status = "CARPISMA" if collision_detected else "BASARILI"
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] {status} | ID:{device_id} | RSSI:{rssi_value} | Doluluk:%{channel_occupancy*100:.1f}")
+            # Paket sıra numarasını geri gönder (cihaz ACK'yı pakete eşler)
+            if 'seq' in packet:
+                ack_packet['seq'] = packet['seq']
+            # ACK, paketle aynı formatta gönderilir
+            if binary:
+                ack_bytes = encode_ack(ack_packet)
+            else:
+                ack_bytes = json.dumps(ack_packet).encode('utf-8')
+            self._send_ack(ack_bytes, device_id, addr)
             
         except json.JSONDecodeError as e:
-            print(f"JSON hatasi: {e}")
+            self.console.warning("JSON hatasi: {}", e)
+            self.stats['decode_errors'] += 1
+        except WireProtocolError as e:
+            self.console.warning("Ikili paket hatasi: {}", e)
             self.stats['decode_errors'] += 1
         except Exception as e:
-            print(f"Paket isleme hatasi: {e}")
+            self.console.warning("Paket isleme hatasi: {}", e)
             self.stats['processing_errors'] += 1
     
+    def _process_batch(self, data, addr):
+        """
+        Toplu paketi tek tek kayıtlara aç, her birini ayrı CSV satırı olarak
+        kaydet ve tek bir toplu ACK (başarı bitmap'i) gönder
+        """
+        start = time.perf_counter()
+        device_id, base_seq, packets = decode_batch(data)
+        self.metrics.parse_seconds.observe(time.perf_counter() - start)
+        self.stats['batches_received'] += 1
+        self.stats['binary_packets'] += 1
+        
+        success_bitmap = 0
+        for i, packet in enumerate(packets):
+            if not self._record_packet(packet):
+                success_bitmap |= 1 << i
+        
+        self._send_ack(encode_batch_ack(device_id, base_seq, len(packets), success_bitmap),
+                       device_id, addr)
+    
+    def _send_ack(self, ack_bytes, device_id, addr):
+        """ACK'yı cihazın kaynak portuna gönder (5000 + device_id)"""
+        try:
+            ack_port = 5000 + device_id
+            if self.transport is not None:
+                # Bloklamaz; gönderilemeyen veri transport tamponunda bekler
+                self.transport.sendto(ack_bytes, (addr[0], ack_port))
+            else:
+                self.socket.sendto(ack_bytes, (addr[0], ack_port))
+        except Exception as e:
+            self.console.warning("ACK gonderim hatasi: {}", e)
+    
+    def _record_packet(self, packet):
+        """
+        Tek paket için çarpışma tespiti, istatistik ve CSV kaydı
+        
+        Returns:
+            bool: Çarpışma tespit edildiyse True
+        """
+        device_id = packet.get('device_id', 'unknown')
+        # timestamp yoksa sunucu zamanını kullan
+        packet_timestamp = packet.get('timestamp', int(time.time() * 1000))
+        server_timestamp = int(time.time() * 1000)
+        
+        # --- DÜZELTME: .get() içine varsayılan değerleri (0 veya -90) ekledik ---
+        data_age = packet.get('data_age', 0)
+        priority = packet.get('priority', 1)
+        delay_used = packet.get('delay_used', 0)
+        
+        rssi_value = packet.get('rssi', -90)            # Boşsa -90 yap
+        channel_occupancy = packet.get('channel_occupancy', 0.0) # Boşsa 0.0 yap
+        collision_rate = packet.get('collision_rate', 0.0)       # Boşsa 0.0 yap
+        neighbor_count = packet.get('neighbor_count', 0)         # Boşsa 0 yap
+        # -----------------------------------------------------------------------
+
+        # Çarpışma tespiti: Pencere içinde başka bir cihazdan paket geldi mi?
+        collisions = self._detect_collision(device_id, server_timestamp)
+        collision_detected = bool(collisions)
+        if collision_detected:
+            self.stats['collisions_detected'] += 1
+            # Ekrana en yakın birkaç cihaz yazılır
+            peers = ', '.join(f"{other_device_id} ({time_diff}ms)"
+                              for other_device_id, time_diff in collisions[:COLLISION_PRINT_PEERS])
+            if len(collisions) > COLLISION_PRINT_PEERS:
+                peers += f" +{len(collisions) - COLLISION_PRINT_PEERS}"
+            self.console.warning("CARPISMA! {} <-> {}", device_id, peers)
+        
+        profile = packet.get('profile')
+        if profile:
+            self.stats['profile_reports'] += 1
+            self._merge_profile(profile)
+        
+        # İstatistikleri güncelle
+        self.stats['total_received'] += 1
+        if collision_detected:
+            self.device_stats[device_id]['failed'] += 1
+        else:
+            self.device_stats[device_id]['received'] += 1
+        
+        # Veriyi CSV'ye kaydet
+        row = [
+            datetime.now().isoformat(),
+            device_id,
+            data_age,
+            priority,
+            rssi_value,         # Düzelttik
+            channel_occupancy,  # Düzelttik
+            collision_rate,     # Düzelttik
+            neighbor_count,     # Düzelttik
+            0 if collision_detected else 1,
+            delay_used,
+            1 if collision_detected else 0
+        ]
+        
+        self._save_to_csv(row)
+        
+        # Ekrana daha temiz bilgi basalım (biçimlendirme log thread'inde yapılır;
+        # BASARILI satırları örneklenir, çarpışmalar her zaman yazılır)
+        log = self.console.warning if collision_detected else self.console.info
+        log("[{:%H:%M:%S}] {} | ID:{} | RSSI:{} | Doluluk:%{:.1f}",
+            datetime.now(), "CARPISMA" if collision_detected else "BASARILI",
+            device_id, rssi_value, channel_occupancy * 100)
+        
+        return collision_detected
+    
+    def _merge_profile(self, profile):
+        """Profil özetini (aşama -> counts, max_us) filo histogramlarına ekle"""
+        for stage, summary in profile.items():
+            counts = self.profile_counts[stage]
+            for i, count in enumerate(summary['counts']):
+                counts[i] += count
+            if summary['max_us'] > self.profile_max_us[stage]:
+                self.profile_max_us[stage] = summary['max_us']
+    
+    @staticmethod
+    def _profile_percentile(counts, fraction, max_us):
+        """Kova sayaçlarından yaklaşık yüzdelik (kova üst sınırı, max_us'u aşmaz)"""
+        total = sum(counts)
+        if not total:
+            return None
+        seen = 0
+        for bound, count in zip(PROFILE_BUCKETS_US, counts):
+            seen += count
+            if seen >= total * fraction:
+                return min(bound, max_us)
+        return max_us
+    
+    def _detect_collision(self, device_id, server_timestamp):
+        """
+        Pencere içinde paket gönderen diğer cihazları bul ve paketi kaydet
+        
+        last_packet_times son paket zamanına göre sıralı olduğu için süresi
+        dolan cihazlar baştan düşülür (amortize O(1)), "başka cihaz var mı"
+        kontrolü O(1)'dir; çarpışan cihazlar sondan başa okunur, liste
+        çarpışan cihaz sayısı kadar sürer ve sıralama gerekmez.
+        
+        Returns:
+            list: [(diğer cihaz, zaman farkı ms), ...] yakından uzağa;
+                çarpışma yoksa boş liste
+        """
+        last_packet_times = self.last_packet_times
+        window_start = server_timestamp - self.collision_window_ms
+        
+        # Süresi dolan cihazları düş (en eski baştadır)
+        while last_packet_times:
+            oldest_device_id = next(iter(last_packet_times))
+            if last_packet_times[oldest_device_id] > window_start:
+                break
+            last_packet_times.popitem(last=False)
+        
+        # Cihazı sona taşı
+        last_packet_times.pop(device_id, None)
+        
+        collisions = []
+        if last_packet_times:
+            collisions = [(other_device_id, abs(server_timestamp - last_time))
+                          for other_device_id, last_time in reversed(last_packet_times.items())]
+        
+        last_packet_times[device_id] = server_timestamp
+        return collisions
+    
     def _save_to_csv(self, row):
-        """Veriyi CSV'ye kaydet"""
+        """Veriyi CSV'ye kaydet (sunucu çalışırken kayıt görevine kuyrukla aktarılır)"""
+        if self.persist_queue is not None:
+            self.persist_queue.put_nowait(row)
+        else:
+            self._write_rows([row])
+    
+    def _write_rows(self, rows):
+        """Satırları tamponlu yazıcıya aktar"""
+        if not rows:
+            return
         try:
-            with open(self.data_file, 'a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(row)
+            if self.row_writer is None:
+                self._init_storage()
+            self.row_writer.write_rows(rows)
         except Exception as e:
-            print(f"CSV kayıt hatası: {e}")
+            self.console.warning("CSV kayıt hatası: {}", e)
     
     def _print_stats(self):
         """İstatistikleri yazdır"""
@@ -194,15 +574,86 @@ class DataCollector:
         if self.stats['total_received'] > 0:
             collision_rate = (self.stats.get('collisions_detected', 0) / self.stats['total_received']) * 100
             print(f"Çarpışma oranı: {collision_rate:.2f}%")
+        print(f"İkili protokol paketleri: {self.stats['binary_packets']}")
         print(f"Decode hataları: {self.stats['decode_errors']}")
         print(f"İşleme hataları: {self.stats['processing_errors']}")
+        if self.stats['dropped_packets']:
+            print(f"Kuyruk dolu, düşen paketler: {self.stats['dropped_packets']}")
         print("\nCihaz bazında:")
         for device_id, stats in self.device_stats.items():
             success_rate = (stats['received'] / (stats['received'] + stats['failed'])) * 100 if (stats['received'] + stats['failed']) > 0 else 0
             print(f"  Cihaz {device_id}: {stats['received']} başarılı, {stats['failed']} başarısız "
                   f"({success_rate:.1f}% başarı)")
+        if self.profile_counts:
+            print(f"\nCihaz profili ({self.stats['profile_reports']} özet, us):")
+            for stage, counts in self.profile_counts.items():
+                if not any(counts):
+                    continue
+                max_us = self.profile_max_us[stage]
+                print(f"  {stage}: n={sum(counts)} "
+                      f"p50<={self._profile_percentile(counts, 0.5, max_us)} "
+                      f"p90<={self._profile_percentile(counts, 0.9, max_us)} max={max_us}")
 
 if __name__ == "__main__":
-    collector = DataCollector()
-    collector.start()
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='LoPy4 veri toplama sunucusu')
+    parser.add_argument('--host', default='0.0.0.0', help='Dinlenecek IP adresi')
+    parser.add_argument('--port', type=int, default=5000, help='UDP port numarası')
+    parser.add_argument('--data-file', default='data/collected_data.csv', help='CSV dosya yolu')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Worker process sayısı (>1 ise SO_REUSEPORT ile çok çekirdekli mod)')
+    parser.add_argument('--csv-buffer-rows', type=int, default=256,
+                        help='Bu kadar satır birikince CSV dosyasına yaz')
+    parser.add_argument('--csv-flush-interval', type=float, default=1.0,
+                        help='Satırların bellekte en fazla bekleme süresi (saniye)')
+    parser.add_argument('--csv-fsync', default=FSYNC_NEVER, choices=FSYNC_POLICIES,
+                        help='fsync politikası')
+    parser.add_argument('--storage', default=STORAGE_CSV, choices=STORAGE_BACKENDS,
+                        help='Depolama modu (columnar: saatlik sıkıştırılmış sütun dosyaları, '
+                             'sqlite: indeksli veritabanı)')
+    parser.add_argument('--storage-path', default=None,
+                        help='Sütunlu veri dizini veya SQLite dosyası '
+                             '(varsayılan: data/columnar, data/collected_data.db)')
+    parser.add_argument('--stats-interval', type=float, default=None,
+                        help='Periyodik istatistik özeti aralığı (saniye)')
+    parser.add_argument('--uvloop', action='store_true', help='uvloop event loop kullan (kuruluysa)')
+    parser.add_argument('--log-rate', type=int, default=50,
+                        help='Saniyede en fazla paket/çarpışma satırı (0: sınırsız)')
+    parser.add_argument('--log-sample', type=int, default=1,
+                        help='BASARILI satırlarından her N\'de birini yaz')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help='Prometheus metrik HTTP portu (örn. 9100; çok çekirdekli modda '
+                             'worker i port + i kullanır)')
+    parser.add_argument('--metrics-host', default='127.0.0.1', help='Metrik uç noktası adresi')
+    parser.add_argument('--metrics-snapshot', default=None,
+                        help='Periyodik JSON metrik dosyası (örn. data/metrics.json)')
+    parser.add_argument('--metrics-snapshot-interval', type=float, default=10.0,
+                        help='Metrik dosyası yazma aralığı (saniye)')
+    args = parser.parse_args()
+    
+    if args.workers > 1:
+        from parallel_collector import run_workers
+        run_workers(args.workers, args.host, args.port, args.data_file,
+                    log_rate_limit=args.log_rate, log_sample_every=args.log_sample,
+                    metrics_host=args.metrics_host, metrics_port=args.metrics_port,
+                    metrics_snapshot_path=args.metrics_snapshot,
+                    metrics_snapshot_interval_s=args.metrics_snapshot_interval,
+                    csv_buffer_rows=args.csv_buffer_rows,
+                    csv_flush_interval_s=args.csv_flush_interval,
+                    csv_fsync=args.csv_fsync,
+                    storage=args.storage, storage_path=args.storage_path)
+    else:
+        collector = DataCollector(args.host, args.port, args.data_file,
+                                  stats_interval_s=args.stats_interval, use_uvloop=args.uvloop,
+                                  csv_buffer_rows=args.csv_buffer_rows,
+                                  csv_flush_interval_s=args.csv_flush_interval,
+                                  csv_fsync=args.csv_fsync,
+                                  storage=args.storage, storage_path=args.storage_path,
+                                  log_rate_limit=args.log_rate,
+                                  log_sample_every=args.log_sample,
+                                  metrics_host=args.metrics_host, metrics_port=args.metrics_port,
+                                  metrics_snapshot_path=args.metrics_snapshot,
+                                  metrics_snapshot_interval_s=args.metrics_snapshot_interval)
+        collector.start()
 
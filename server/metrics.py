@@ -0,0 +1,327 @@
+"""
+Canlı Metrikler
+DataCollector sayaçlarını sunucu çalışırken dışarı açar:
+    - HTTP metin uç noktası (Prometheus formatı): GET /metrics
+    - JSON anlık görüntü: GET /metrics.json ve periyodik snapshot dosyası
+
+Sayaçlar kilitsizdir: stats, device_stats ve gecikme histogramları sadece
+event loop thread'inde güncellenir; HTTP sunucusu da aynı loop'ta çalıştığı
+için okumalar tutarlıdır ve paket yolunda kilit alınmaz.
+
+Gecikmeler sabit kovalı histogramlarda tutulur (gözlem başına bir bisect),
+yüzdelikler kovalardan yaklaşık hesaplanır.
+"""
+
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+from wire_protocol import PROFILE_BUCKETS_US
+
+# Gecikme kovaları (saniye, üst sınır dahil); son kova +Inf
+LATENCY_BUCKETS_S = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+                     0.001, 0.0025, 0.005, 0.01, 0.025, 0.1)
+
+# (Prometheus adı, DataCollector.stats anahtarı, açıklama)
+COUNTERS = (
+    ('packets_received', 'total_received', 'Alinan paketler (toplu paketlerdeki kayitlar dahil)'),
+    ('collisions', 'collisions_detected', 'Tespit edilen carpismalar'),
+    ('binary_packets', 'binary_packets', 'Ikili protokolle gelen datagramlar'),
+    ('batches', 'batches_received', 'Toplu paketler'),
+    ('decode_errors', 'decode_errors', 'JSON / ikili decode hatalari'),
+    ('processing_errors', 'processing_errors', 'Isleme hatalari'),
+    ('dropped_packets', 'dropped_packets', 'Kuyruk dolu oldugu icin dusen paketler'),
+    ('profile_reports', 'profile_reports', 'Cihazlardan gelen profil ozetleri'),
+)
+
+# Paket hızı bu kadar saniyelik pencereden hesaplanır
+RATE_WINDOW_S = 10
+
+
+class Histogram:
+    def __init__(self, bounds=LATENCY_BUCKETS_S):
+        """
+        Sabit kovalı histogram
+
+        Args:
+            bounds: Artan kova üst sınırları (son kova +Inf eklenir)
+        """
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.max = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        """Yaklaşık yüzdelik (kova üst sınırı, en fazla max); gözlem yoksa None"""
+        if not self.count:
+            return None
+        target = self.count * fraction
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+def _escape_label_value(value):
+    """Prometheus metin formatı: etiket değerinde \\, \" ve satır sonu kaçırılır"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels):
+    # device_id gibi değerler paketten gelir (JSON yolunda herhangi bir metin olabilir)
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape_label_value(value)}"'
+                          for key, value in labels.items()) + '}'
+
+
+def _with_inf(bounds):
+    return tuple(bounds) + (float('inf'),)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class CollectorMetrics:
+    def __init__(self, collector, labels=None):
+        """
+        DataCollector metrikleri
+
+        Args:
+            collector: İzlenen DataCollector
+            labels: Tüm metriklere eklenen sabit etiketler (örn. {'worker': '0'})
+        """
+        self.collector = collector
+        self.labels = dict(labels or {})
+        self.started = time.time()
+
+        # Paket yolunda güncellenir
+        self.parse_seconds = Histogram()
+        self.processing_seconds = Histogram()
+
+        # Paket hızı için (zaman, toplam paket) örnekleri, sample() ile eklenir
+        self.rate_samples = deque(maxlen=RATE_WINDOW_S + 1)
+
+        self.server = None
+
+    def sample(self):
+        """Paket hızı penceresine örnek ekle (saniyede bir çağrılır)"""
+        self.rate_samples.append((time.monotonic(), self.collector.stats.get('total_received', 0)))
+
+    def packets_per_second(self):
+        """Son RATE_WINDOW_S saniyedeki ortalama paket hızı"""
+        if len(self.rate_samples) < 2:
+            return 0.0
+        (t0, n0), (t1, n1) = self.rate_samples[0], self.rate_samples[-1]
+        return (n1 - n0) / (t1 - t0) if t1 > t0 else 0.0
+
+    def queue_depths(self):
+        """Kuyruk ve tampon doluluğu"""
+        collector = self.collector
+        writer = collector.row_writer
+        return {
+            'packet': collector.packet_queue.qsize() if collector.packet_queue is not None else 0,
+            'persist': collector.persist_queue.qsize() if collector.persist_queue is not None else 0,
+            'log': collector.console.queue.qsize(),
+            'storage_buffer': len(writer.buffer) if writer is not None else 0,
+        }
+
+    def snapshot(self):
+        """
+        Tüm metriklerin JSON'a uygun anlık görüntüsü
+
+        Returns:
+            dict: Sayaçlar, oranlar, gecikme yüzdelikleri, kuyruklar, cihazlar
+        """
+        collector = self.collector
+        stats = {key: collector.stats.get(key, 0) for _, key, _ in COUNTERS}
+        total = stats['total_received']
+        devices = {}
+        for device_id, counts in collector.device_stats.items():
+            device_total = counts['received'] + counts['failed']
+            devices[str(device_id)] = {
+                'received': counts['received'],
+                'failed': counts['failed'],
+                'success_rate': counts['received'] / device_total if device_total else 0.0,
+            }
+        latency = {}
+        for name, histogram in (('parse', self.parse_seconds),
+                                ('processing', self.processing_seconds)):
+            latency[name] = {
+                'count': histogram.count,
+                'mean_s': histogram.sum / histogram.count if histogram.count else None,
+                'p50_s': histogram.percentile(0.5),
+                'p90_s': histogram.percentile(0.9),
+                'p99_s': histogram.percentile(0.99),
+                'max_s': histogram.max,
+            }
+        return {
+            'time': time.time(),
+            'uptime_s': time.time() - self.started,
+            'labels': self.labels,
+            'stats': stats,
+            'packets_per_second': self.packets_per_second(),
+            'collision_rate': stats['collisions_detected'] / total if total else 0.0,
+            'latency': latency,
+            'queues': self.queue_depths(),
+            'log_dropped': collector.console.messages_dropped,
+            'devices': devices,
+            'device_profile': {
+                stage: {'counts': list(counts), 'max_us': collector.profile_max_us[stage]}
+                for stage, counts in collector.profile_counts.items()
+            },
+        }
+
+    def render_prometheus(self):
+        """Prometheus metin formatı (text/plain; version=0.0.4)"""
+        collector = self.collector
+        stats = collector.stats
+        lines = []
+
+        def metric(name, metric_type, help_text, samples):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            for suffix, labels, value in samples:
+                lines.append(f'{name}{suffix}{_format_labels({**self.labels, **labels})} '
+                             f'{_format_value(value)}')
+
+        for name, key, help_text in COUNTERS:
+            metric(f'collector_{name}_total', 'counter', help_text, [('', {}, stats.get(key, 0))])
+
+        total = stats.get('total_received', 0)
+        metric('collector_packets_per_second', 'gauge',
+               f'Son {RATE_WINDOW_S} sn ortalama paket hizi',
+               [('', {}, self.packets_per_second())])
+        metric('collector_collision_ratio', 'gauge', 'Carpisma orani (baslangictan beri)',
+               [('', {}, stats.get('collisions_detected', 0) / total if total else 0.0)])
+        metric('collector_queue_depth', 'gauge', 'Kuyruk / tampon dolulugu',
+               [('', {'queue': name}, depth) for name, depth in self.queue_depths().items()])
+        metric('collector_log_dropped_total', 'counter', 'Bastirilan konsol mesajlari',
+               [('', {}, collector.console.messages_dropped)])
+        metric('collector_uptime_seconds', 'gauge', 'Sunucu calisma suresi',
+               [('', {}, time.time() - self.started)])
+
+        for name, histogram, help_text in (
+                ('collector_parse_seconds', self.parse_seconds, 'Paket cozme suresi'),
+                ('collector_processing_seconds', self.processing_seconds,
+                 'Paket isleme suresi (cozme, carpisma, kayit, ACK)')):
+            samples = []
+            cumulative = 0
+            for bound, count in zip(_with_inf(histogram.bounds), histogram.counts):
+                cumulative += count
+                samples.append(('_bucket', {'le': _format_value(bound)}, cumulative))
+            samples.append(('_sum', {}, histogram.sum))
+            samples.append(('_count', {}, histogram.count))
+            metric(name, 'histogram', help_text, samples)
+
+        device_samples = []
+        ratio_samples = []
+        for device_id, counts in collector.device_stats.items():
+            device = {'device': str(device_id)}
+            device_samples.append(('', {**device, 'result': 'success'}, counts['received']))
+            device_samples.append(('', {**device, 'result': 'collision'}, counts['failed']))
+            device_total = counts['received'] + counts['failed']
+            ratio_samples.append(('', device, counts['received'] / device_total if device_total else 0.0))
+        metric('collector_device_packets_total', 'counter', 'Cihaz bazinda paketler', device_samples)
+        metric('collector_device_success_ratio', 'gauge', 'Cihaz bazinda basari orani', ratio_samples)
+
+        # Cihazların gönderdiği aşama histogramları (toplam süre bilinmediği için _sum yok)
+        stage_samples = []
+        max_samples = []
+        bounds = _with_inf(bound / 1e6 for bound in PROFILE_BUCKETS_US)
+        for stage, counts in collector.profile_counts.items():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                stage_samples.append(('_bucket', {'stage': stage, 'le': _format_value(bound)},
+                                      cumulative))
+            stage_samples.append(('_count', {'stage': stage}, cumulative))
+            max_samples.append(('', {'stage': stage}, collector.profile_max_us[stage] / 1e6))
+        if stage_samples:
+            metric('collector_device_stage_seconds', 'histogram',
+                   'Cihaz gonderim asamasi sureleri (profil ozetleri)', stage_samples)
+            metric('collector_device_stage_max_seconds', 'gauge',
+                   'Cihaz gonderim asamasi en uzun sure', max_samples)
+
+        lines.append('')
+        return '\n'.join(lines)
+
+    def write_snapshot(self, path):
+        """Anlık görüntüyü JSON dosyasına yaz (geçici dosya + rename, okuyucu yarım dosya görmez)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+    async def start_server(self, host='127.0.0.1', port=9100):
+        """HTTP uç noktasını çalışan event loop'ta başlat"""
+        self.server = await asyncio.start_server(self._handle_http, host, port)
+        return self.server
+
+    async def close_server(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+            self.server = None
+
+    async def _handle_http(self, reader, writer):
+        """Minimal HTTP/1.0: GET /metrics, GET /metrics.json"""
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            # Başlıkları atla
+            while True:
+                line = await asyncio.wait_for(reader.readline(), 5)
+                if line in (b'\r\n', b'\n', b''):
+                    break
+            parts = request_line.decode('latin-1').split()
+            path = parts[1].split('?')[0] if len(parts) > 1 else ''
+            if len(parts) > 1 and parts[0] != 'GET':
+                status, content_type, body = '405 Method Not Allowed', 'text/plain', 'GET only\n'
+            elif path in ('/metrics', '/'):
+                status, content_type = '200 OK', 'text/plain; version=0.0.4; charset=utf-8'
+                body = self.render_prometheus()
+            elif path == '/metrics.json':
+                status, content_type = '200 OK', 'application/json'
+                body = json.dumps(self.snapshot())
+            else:
+                status, content_type, body = '404 Not Found', 'text/plain', 'Not found\n'
+            payload = body.encode('utf-8')
+            writer.write(f'HTTP/1.0 {status}\r\nContent-Type: {content_type}\r\n'
+                         f'Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n'
+                         .encode('latin-1') + payload)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def run(self, snapshot_path=None, snapshot_interval_s=10.0):
+        """Saniyede bir hız örneği al, snapshot_path verildiyse periyodik dosya yaz"""
+        last_snapshot = time.monotonic()
+        while True:
+            self.sample()
+            if snapshot_path and time.monotonic() - last_snapshot >= snapshot_interval_s:
+                last_snapshot = time.monotonic()
+                try:
+                    self.write_snapshot(snapshot_path)
+                except OSError as e:
+                    self.collector.console.warning("Metrik dosyasi yazilamadi: {}", e)
+            await asyncio.sleep(1.0)
@@ -0,0 +1,516 @@
+"""
+Model Dışa Aktarıcı
+Random Forest modelini LoPy4 için kompakt ikili formata, if/else kaynak
+koduna (model_compiled.py) veya önceden hesaplanmış delay tablosuna
+(model_delay.lut) dönüştürür
+
+Girdi:
+    - model_micropython.json (JSON ağaç formatı)
+    - lora_model_final.pkl (sklearn RandomForestRegressor, sklearn gerektirir)
+
+İkili format (little-endian, MODEL_VERSION = 1):
+    Başlık   : '<4sBBHHH' -> magic, version, n_features, n_trees, n_nodes, reserved
+    Özellikler: her biri için uint8 uzunluk + utf-8 isim
+    Kökler   : n_trees x uint16 (her ağacın kök düğüm indeksi)
+    Düğümler : n_nodes x '<bBHf' (8 byte)
+               feature (int8, leaf için -1), reserved (uint8),
+               right (uint16, sağ çocuk indeksi),
+               threshold / leaf değeri (float32)
+
+Düğümler preorder sırada yazılır, sol çocuk her zaman düğüm + 1'dir.
+
+Kaynak kod formatı: her ağaç için iç içe if/else fonksiyonu (_t0, _t1, ...),
+ortalamayı döndüren predict(x) ve özellik başına eşik listesi THRESHOLDS. İsteğe bağlı olarak mpy-cross ile .mpy'ye
+derlenebilir veya firmware'e dondurulabilir (frozen module).
+"""
+
+import json
+import struct
+
+MODEL_MAGIC = b'RFMB'
+MODEL_VERSION = 1
+HEADER_FORMAT = '<4sBBHHH'
+NODE_FORMAT = '<bBHf'
+LEAF_FEATURE = -1
+
+LUT_MAGIC = b'RFLT'
+LUT_VERSION = 1
+LUT_HEADER_FORMAT = '<4sBBI'
+LUT_MAX_DELAY_MS = 5000
+LUT_DEFAULT_MAX_VALUES = 4096
+LUT_MIN_BINS = 2  # Özellik başına en az bir kenar (iki aralık)
+
+
+def load_json_forest(json_path):
+    """
+    JSON modelini yükle
+
+    Args:
+        json_path: model_micropython.json yolu
+
+    Returns:
+        tuple: (feature_names, trees) - trees JSON ağaç dict listesi
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        model = json.load(f)
+
+    if model.get('type') != 'RandomForestRegressor':
+        raise ValueError(f"Gecersiz model tipi: {model.get('type')}")
+
+    return model['feature_names'], model['trees']
+
+
+def load_pickle_forest(pkl_path):
+    """
+    sklearn pickle modelini yükle ve JSON ağaç formatına çevir
+
+    Args:
+        pkl_path: lora_model_final.pkl yolu
+
+    Returns:
+        tuple: (feature_names, trees)
+    """
+    import pickle
+
+    with open(pkl_path, 'rb') as f:
+        obj = pickle.load(f)
+
+    # lora_model_final.pkl: {'model': RandomForestRegressor, 'preprocessor': ...}
+    model = obj['model'] if isinstance(obj, dict) else obj
+    if isinstance(obj, dict) and obj.get('preprocessor') is not None:
+        print("UYARI: Pickle dosyasinda preprocessor var, cihaz ham ozellikleri kullanir")
+
+    feature_names = [str(name) for name in model.feature_names_in_]
+    trees = [_sklearn_tree_to_dict(est.tree_, feature_names) for est in model.estimators_]
+    return feature_names, trees
+
+
+def _sklearn_tree_to_dict(tree, feature_names, node=0):
+    """sklearn Tree nesnesini JSON ağaç dict'ine çevir"""
+    if tree.children_left[node] == -1:
+        return {'type': 'leaf', 'value': float(tree.value[node][0][0])}
+
+    return {
+        'type': 'node',
+        'feature': feature_names[tree.feature[node]],
+        'threshold': float(tree.threshold[node]),
+        'left': _sklearn_tree_to_dict(tree, feature_names, tree.children_left[node]),
+        'right': _sklearn_tree_to_dict(tree, feature_names, tree.children_right[node]),
+    }
+
+
+def load_forest(model_path):
+    """Dosya uzantısına göre modeli yükle (.json veya .pkl)"""
+    if model_path.endswith('.pkl'):
+        return load_pickle_forest(model_path)
+    return load_json_forest(model_path)
+
+
+def flatten_forest(feature_names, trees):
+    """
+    Ağaçları preorder düğüm listesine çevir
+
+    Args:
+        feature_names: Özellik isimleri listesi
+        trees: JSON ağaç dict listesi
+
+    Returns:
+        tuple: (nodes, roots) - nodes: [(feature, right, threshold_or_value), ...]
+    """
+    feature_index = {name: i for i, name in enumerate(feature_names)}
+    nodes = []
+    roots = []
+
+    for tree in trees:
+        roots.append(len(nodes))
+        # Yığın: (düğüm, ebeveyn indeksi) - sadece sağ çocuklar ebeveyne yazılır
+        stack = [(tree, -1)]
+        while stack:
+            node, parent = stack.pop()
+            index = len(nodes)
+            if parent >= 0:
+                feature, _, threshold = nodes[parent]
+                nodes[parent] = (feature, index, threshold)
+
+            if node['type'] == 'leaf':
+                nodes.append((LEAF_FEATURE, 0, float(node['value'])))
+                continue
+
+            if node['feature'] not in feature_index:
+                raise ValueError(f"Bilinmeyen ozellik: {node['feature']}")
+            nodes.append((feature_index[node['feature']], 0, float(node['threshold'])))
+            # Sağ çocuk önce yığına: sol çocuk hemen ardından (düğüm + 1) yazılır
+            stack.append((node['right'], index))
+            stack.append((node['left'], -1))
+
+    if len(nodes) > 0xFFFF:
+        raise ValueError(f"Model cok buyuk: {len(nodes)} dugum (max 65535)")
+
+    return nodes, roots
+
+
+def write_binary_model(bin_path, feature_names, trees):
+    """
+    Modeli kompakt ikili formatta yaz
+
+    Args:
+        bin_path: Çıktı dosya yolu (.bin)
+        feature_names: Özellik isimleri
+        trees: JSON ağaç dict listesi
+
+    Returns:
+        int: Yazılan byte sayısı
+    """
+    nodes, roots = flatten_forest(feature_names, trees)
+
+    out = bytearray()
+    out += struct.pack(HEADER_FORMAT, MODEL_MAGIC, MODEL_VERSION,
+                       len(feature_names), len(roots), len(nodes), 0)
+    for name in feature_names:
+        encoded = name.encode('utf-8')
+        out += struct.pack('<B', len(encoded)) + encoded
+    for root in roots:
+        out += struct.pack('<H', root)
+    for feature, right, threshold in nodes:
+        out += struct.pack(NODE_FORMAT, feature, 0, right, threshold)
+
+    with open(bin_path, 'wb') as f:
+        f.write(out)
+    return len(out)
+
+
+def _write_tree_source(lines, node, feature_index, indent):
+    """Ağacı iç içe if/else satırları olarak yaz"""
+    # Derinlik küçük (max_depth), recursion burada sorun değil
+    pad = '    ' * indent
+    if node['type'] == 'leaf':
+        lines.append(f"{pad}return {float(node['value'])!r}")
+        return
+    if node['feature'] not in feature_index:
+        raise ValueError(f"Bilinmeyen ozellik: {node['feature']}")
+    lines.append(f"{pad}if x[{feature_index[node['feature']]}] <= {float(node['threshold'])!r}:")
+    _write_tree_source(lines, node['left'], feature_index, indent + 1)
+    lines.append(f"{pad}else:")
+    _write_tree_source(lines, node['right'], feature_index, indent + 1)
+
+
+def _collect_thresholds(trees, feature_names):
+    """Özellik başına sıralı eşik değerleri (cihazdaki tahmin önbelleği anahtarı için)"""
+    sets = {name: set() for name in feature_names}
+    stack = list(trees)
+    while stack:
+        node = stack.pop()
+        if node['type'] == 'leaf':
+            continue
+        sets[node['feature']].add(float(node['threshold']))
+        stack.append(node['left'])
+        stack.append(node['right'])
+    return tuple(tuple(sorted(sets[name])) for name in feature_names)
+
+
+def write_python_model(py_path, feature_names, trees):
+    """
+    Modeli if/else kaynak koduna derle
+
+    Args:
+        py_path: Çıktı dosya yolu (.py)
+        feature_names: Özellik isimleri
+        trees: JSON ağaç dict listesi
+
+    Returns:
+        int: Yazılan byte sayısı
+    """
+    feature_index = {name: i for i, name in enumerate(feature_names)}
+
+    lines = [
+        '"""',
+        'Derlenmis Random Forest modeli',
+        'server/model_exporter.py tarafindan otomatik uretildi, elle duzenlemeyin',
+        '"""',
+        '',
+        f"FEATURE_NAMES = {tuple(feature_names)!r}",
+        f"N_ESTIMATORS = {len(trees)}",
+        f"THRESHOLDS = {_collect_thresholds(trees, feature_names)!r}",
+    ]
+
+    for i, tree in enumerate(trees):
+        lines.append('')
+        lines.append('')
+        lines.append(f"def _t{i}(x):")
+        _write_tree_source(lines, tree, feature_index, 1)
+
+    # Tek uzun ifade yerine satır satır toplama (MicroPython derleyici yığını için)
+    lines.append('')
+    lines.append('')
+    lines.append('def predict(x):')
+    lines.append('    s = _t0(x)' if trees else '    s = 0.0')
+    for i in range(1, len(trees)):
+        lines.append(f"    s += _t{i}(x)")
+    lines.append(f"    return s / {len(trees) or 1}")
+    lines.append('')
+
+    source = '\n'.join(lines)
+    with open(py_path, 'w', encoding='utf-8') as f:
+        f.write(source)
+    return len(source.encode('utf-8'))
+
+
+def predict_forest(nodes, roots, x):
+    """
+    Düzleştirilmiş orman ile tahmin (sunucu tarafı, cihazdaki _predict_flat_model ile aynı)
+
+    Args:
+        nodes: flatten_forest düğüm listesi
+        roots: Kök indeksleri
+        x: Özellik vektörü
+
+    Returns:
+        float: Ağaçların ortalama tahmini
+    """
+    total = 0.0
+    for node in roots:
+        feature, right, number = nodes[node]
+        while feature != LEAF_FEATURE:
+            node = node + 1 if x[feature] <= number else right
+            feature, right, number = nodes[node]
+        total += number
+    return total / len(roots) if roots else 500.0
+
+
+def clamp_delay(prediction):
+    """Tahmini cihazdaki gibi 0-5000 ms tam sayı delay'e çevir"""
+    return max(0, min(int(prediction), LUT_MAX_DELAY_MS))
+
+
+def _bucket(edges, x):
+    """Sıralı kenar listesinde x'ten küçük kenar sayısı"""
+    import bisect
+    return bisect.bisect_left(edges, x)
+
+
+def _reduce_edges(thresholds, max_bins):
+    """Eşik sayısı max_bins - 1'i aşıyorsa eşit aralıklı alt küme seç"""
+    if max_bins is None or len(thresholds) < max_bins:
+        return list(thresholds)
+    step = len(thresholds) / (max_bins - 1)
+    return sorted({thresholds[int(i * step)] for i in range(max_bins - 1)})
+
+
+def build_lookup_table(feature_names, trees, max_bins=None, max_values=LUT_DEFAULT_MAX_VALUES):
+    """
+    Özellik ızgarası üzerinde ormanı değerlendirip delay tablosu oluştur
+
+    Kenarlar modelin eşik değerleridir; max_bins verilirse özellik başına
+    en fazla max_bins aralık kalacak şekilde seyreltilir (tablo küçülür,
+    hata artar). max_bins=None iken tablo ormanla birebir aynıdır.
+
+    Args:
+        feature_names: Özellik isimleri
+        trees: JSON ağaç dict listesi
+        max_bins: Özellik başına maksimum aralık sayısı (None: tüm eşikler)
+        max_values: İzin verilen maksimum tablo boyutu
+
+    Returns:
+        tuple: (edges, values) - edges: özellik başına kenar listesi,
+               values: sınırlanmış delay listesi
+    """
+    if max_bins is not None and max_bins < LUT_MIN_BINS:
+        raise ValueError(f"Gecersiz max_bins: {max_bins} (en az {LUT_MIN_BINS})")
+
+    nodes, roots = flatten_forest(feature_names, trees)
+    thresholds = _collect_thresholds(trees, feature_names)
+    edges = [_reduce_edges(t, max_bins) for t in thresholds]
+
+    n_values = 1
+    for feature_edges in edges:
+        n_values *= len(feature_edges) + 1
+    if n_values > max_values:
+        raise ValueError(f"Tablo cok buyuk: {n_values} deger (max {max_values}), --max-bins kucultun")
+
+    # Her aralık için temsilci nokta: (alt, üst] aralığının ortası
+    representatives = []
+    for feature_edges in edges:
+        points = []
+        for k in range(len(feature_edges) + 1):
+            if not feature_edges:
+                points.append(0.0)
+            elif k == 0:
+                points.append(feature_edges[0])
+            elif k == len(feature_edges):
+                points.append(feature_edges[-1] + 1.0)
+            else:
+                points.append((feature_edges[k - 1] + feature_edges[k]) / 2.0)
+        representatives.append(points)
+
+    # Karışık tabanlı indeks sırası: ilk özellik en anlamlı basamak
+    values = []
+    x = [0.0] * len(feature_names)
+
+    def sweep(i):
+        if i == len(feature_names):
+            values.append(clamp_delay(predict_forest(nodes, roots, x)))
+            return
+        for point in representatives[i]:
+            x[i] = point
+            sweep(i + 1)
+
+    sweep(0)
+    return edges, values
+
+
+def lookup_delay(edges, values, x):
+    """Tablodan delay oku (cihazdaki _predict_lookup_table ile aynı)"""
+    index = 0
+    for i, feature_edges in enumerate(edges):
+        index = index * (len(feature_edges) + 1) + _bucket(feature_edges, x[i])
+    return values[index]
+
+
+def write_lookup_table(lut_path, edges, values):
+    """
+    Delay tablosunu ikili formatta yaz
+
+    Returns:
+        int: Yazılan byte sayısı
+    """
+    out = bytearray()
+    out += struct.pack(LUT_HEADER_FORMAT, LUT_MAGIC, LUT_VERSION, len(edges), len(values))
+    for feature_edges in edges:
+        out += struct.pack('<B', len(feature_edges))
+        for edge in feature_edges:
+            out += struct.pack('<f', edge)
+    for value in values:
+        out += struct.pack('<H', value)
+
+    with open(lut_path, 'wb') as f:
+        f.write(out)
+    return len(out)
+
+
+def load_csv_feature_vectors(csv_path, feature_names):
+    """
+    collected_data.csv satırlarından cihazdaki gibi özellik vektörleri üret
+
+    trend_rssi cihaz bazında son 5 RSSI ortalaması - mevcut RSSI,
+    inter_arrival_time = data_age, hour sunucu zaman damgasından alınır.
+
+    Returns:
+        list: Özellik vektörleri (feature_names sırasında)
+    """
+    import csv
+    from collections import defaultdict
+    from datetime import datetime
+
+    rssi_history = defaultdict(list)
+    vectors = []
+    with open(csv_path, 'r', newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                rssi = float(row['rssi'])
+                history = rssi_history[row['device_id']]
+                history.append(rssi)
+                del history[:-5]
+                trend_rssi = sum(history) / len(history) - rssi if len(history) > 1 else 0.0
+
+                values = {
+                    'rssi': rssi,
+                    'channel_occupancy': float(row['channel_occupancy']),
+                    'collision_rate': float(row['collision_rate']),
+                    'neighbor_count': float(row['neighbor_count']),
+                    'trend_rssi': trend_rssi,
+                    'inter_arrival_time': float(row['data_age']),
+                    'data_age': float(row['data_age']),
+                    'priority': float(row['priority']),
+                    'hour': float(datetime.fromisoformat(row['timestamp']).hour),
+                }
+            except (KeyError, ValueError):
+                continue
+            vectors.append([values.get(name, 0.0) for name in feature_names])
+    return vectors
+
+
+def validate_lookup_table(feature_names, trees, edges, values, vectors):
+    """
+    Tablo ve orman delay'lerini karşılaştır
+
+    Returns:
+        dict: rows, exact_match, mean_abs_error, max_abs_error (ms)
+    """
+    nodes, roots = flatten_forest(feature_names, trees)
+    errors = [abs(lookup_delay(edges, values, x) - clamp_delay(predict_forest(nodes, roots, x)))
+              for x in vectors]
+    if not errors:
+        return {'rows': 0, 'exact_match': 0.0, 'mean_abs_error': 0.0, 'max_abs_error': 0}
+    return {
+        'rows': len(errors),
+        'exact_match': sum(1 for e in errors if e == 0) / len(errors),
+        'mean_abs_error': sum(errors) / len(errors),
+        'max_abs_error': max(errors),
+    }
+
+
+def print_lookup_report(feature_names, trees, csv_path, max_values):
+    """Farklı ızgara çözünürlükleri için tablo boyutu ve hata raporu yazdır"""
+    vectors = load_csv_feature_vectors(csv_path, feature_names)
+    print(f"Dogrulama verisi: {csv_path} ({len(vectors)} satir)")
+    print(f"{'max_bins':>10} {'deger':>8} {'byte':>8} {'birebir':>9} {'ort. hata':>10} {'max hata':>9}")
+    for max_bins in (2, 4, 8, 16, 32, None):
+        try:
+            edges, values = build_lookup_table(feature_names, trees, max_bins, max_values)
+        except ValueError:
+            print(f"{str(max_bins or 'tam'):>10} {'(max_values asildi)':>36}")
+            continue
+        report = validate_lookup_table(feature_names, trees, edges, values, vectors)
+        size = 2 * len(values) + 4 * sum(len(e) for e in edges)
+        print(f"{str(max_bins or 'tam'):>10} {len(values):>8} {size:>8} "
+              f"{report['exact_match'] * 100:>8.1f}% {report['mean_abs_error']:>8.2f}ms "
+              f"{report['max_abs_error']:>7}ms")
+
+
+def _max_bins_arg(text):
+    """--max-bins argparse tipi (en az LUT_MIN_BINS)"""
+    import argparse
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"tam sayi olmali: {text}")
+    if value < LUT_MIN_BINS:
+        raise argparse.ArgumentTypeError(f"en az {LUT_MIN_BINS} olmali: {value}")
+    return value
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Random Forest modelini LoPy4 formatina aktar")
+    parser.add_argument('input', help="Girdi modeli (.json veya .pkl)")
+    parser.add_argument('-o', '--output', default='../lopy4/models/model_micropython.bin',
+                        help="Cikti dosyasi (.bin: ikili model, .py: derlenmis kaynak kod, "
+                             ".lut: delay tablosu)")
+    parser.add_argument('--max-bins', type=_max_bins_arg, default=None,
+                        help="Delay tablosu: ozellik basina maksimum aralik sayisi, en az 2 "
+                             "(varsayilan: tum esikler)")
+    parser.add_argument('--max-values', type=int, default=LUT_DEFAULT_MAX_VALUES,
+                        help="Delay tablosu: maksimum deger sayisi")
+    parser.add_argument('--validate', metavar='CSV',
+                        help="Delay tablosu: collected_data.csv uzerinde tablo-orman hata raporu")
+    args = parser.parse_args()
+
+    feature_names, trees = load_forest(args.input)
+    if args.validate:
+        print_lookup_report(feature_names, trees, args.validate, args.max_values)
+
+    if args.output.endswith('.py'):
+        size = write_python_model(args.output, feature_names, trees)
+    elif args.output.endswith('.lut'):
+        edges, values = build_lookup_table(feature_names, trees, args.max_bins, args.max_values)
+        size = write_lookup_table(args.output, edges, values)
+    else:
+        size = write_binary_model(args.output, feature_names, trees)
+    print(f"Model aktarildi: {args.output}")
+    print(f"  Agac sayisi: {len(trees)}")
+    print(f"  Dosya boyutu: {size} byte")
+
+
+if __name__ == "__main__":
+    main()
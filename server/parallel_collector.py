@@ -0,0 +1,241 @@
+"""
+Çok Çekirdekli Veri Toplama
+N worker process aynı UDP portunu SO_REUSEPORT ile dinler; paketleri çözer,
+çarpışma tespiti yapar ve ACK gönderir. CSV satırları tek bir yazıcı
+process'e kuyrukla aktarılır (dosyaya tek yazar).
+
+Paylaşım:
+    - Cihaz -> worker eşlemesi: Çekirdek, SO_REUSEPORT gruplarında datagramları
+      kaynak adres/port hash'ine göre dağıtır. Cihazlar sabit kaynak port
+      (5000 + device_id) kullandığı için bir cihazın paketleri hep aynı
+      worker'a gider (worker sayısı değişmediği sürece)
+    - Çarpışma tespiti: Farklı cihazlar farklı worker'lara düşebildiği için
+      son paket bilgisi paylaşılan bellekte tutulur (SharedCollisionState)
+"""
+
+import multiprocessing
+import queue
+import signal
+import socket
+from data_collector import DataCollector
+
+# Paylaşılan durumda cihaz kimliği tam sayı olarak tutulur
+EMPTY_DEVICE = -2    # Boş kayıt
+UNKNOWN_DEVICE = -1  # device_id alanı olmayan / sayısal olmayan paketler
+
+# Paylaşılan çarpışma halkasındaki kayıt sayısı (kayıt başına 16 byte)
+COLLISION_RING_SIZE = 1024
+
+
+class SharedCollisionState:
+    def __init__(self, ring_size=COLLISION_RING_SIZE):
+        """
+        Process'ler arası çarpışma durumu
+
+        Son ring_size paket (zaman, cihaz) paylaşılan bir halka tamponda
+        geliş sırasıyla saklanır. Kontrol yeniden eskiye okur, pencere dışına
+        çıkınca durur ve her cihazın en yeni kaydını bir kez raporlar; sonuç
+        tek process'teki last_packet_times taramasıyla aynıdır (yakından uzağa).
+        Maliyet pencere içindeki paket sayısı kadardır. Pencere içinde
+        ring_size'dan fazla paket gelirse en eski kayıtlar düşer (o cihazlar
+        listede görünmez).
+
+        Args:
+            ring_size: Halka tampondaki kayıt sayısı
+        """
+        self.lock = multiprocessing.Lock()
+        self.ring_size = ring_size
+        # [zaman0, cihaz0, zaman1, cihaz1, ...]
+        self.slots = multiprocessing.RawArray('q', 2 * ring_size)
+        for i in range(ring_size):
+            self.slots[2 * i + 1] = EMPTY_DEVICE
+        # Sonraki yazılacak kayıt
+        self.head = multiprocessing.RawValue('q', 0)
+
+    @staticmethod
+    def _device_key(device_id):
+        return device_id if isinstance(device_id, int) and device_id >= 0 else UNKNOWN_DEVICE
+
+    def check_and_update(self, device_id, server_timestamp, window_ms):
+        """
+        Çarpışma kontrolü yap ve paketi halka tampona ekle
+
+        Returns:
+            list: [(diğer cihaz, zaman farkı ms), ...] yakından uzağa;
+                çarpışma yoksa boş liste
+        """
+        key = self._device_key(device_id)
+        with self.lock:
+            slots = self.slots
+            ring_size = self.ring_size
+            head = self.head.value
+
+            collisions = []
+            seen = set()
+            index = head
+            for _ in range(ring_size):
+                index = (index - 1) % ring_size
+                other_key = slots[2 * index + 1]
+                if other_key == EMPTY_DEVICE:
+                    break
+                time_diff = server_timestamp - slots[2 * index]
+                if time_diff >= window_ms:
+                    break
+                if other_key == key or other_key in seen:
+                    continue
+                seen.add(other_key)
+                other_id = 'unknown' if other_key == UNKNOWN_DEVICE else other_key
+                collisions.append((other_id, abs(time_diff)))
+
+            slots[2 * head] = server_timestamp
+            slots[2 * head + 1] = key
+            self.head.value = (head + 1) % ring_size
+        return collisions
+
+
+class WorkerCollector(DataCollector):
+    def __init__(self, host, port, row_queue, collision_state, worker_index=0, **worker_options):
+        """
+        SO_REUSEPORT ile bind eden worker
+
+        Args:
+            row_queue: CSV satırları ve istatistiklerin gönderildiği kuyruk
+            collision_state: Paylaşılan SharedCollisionState
+            worker_index: Worker numarası (loglar ve metrik etiketi için)
+            worker_options: log_rate_limit, log_sample_every ve metrics_* ayarları
+                (her worker için ayrı uygulanır)
+        """
+        super().__init__(host=host, port=port, data_file=None, **worker_options)
+        self.row_queue = row_queue
+        self.collision_state = collision_state
+        self.worker_index = worker_index
+        self.metrics.labels['worker'] = str(worker_index)
+
+    def _create_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((self.host, self.port))
+        return sock
+
+    def _init_storage(self):
+        # Depolamayı yazıcı process açar
+        pass
+
+    def _detect_collision(self, device_id, server_timestamp):
+        return self.collision_state.check_and_update(
+            device_id, server_timestamp, self.collision_window_ms)
+
+    def _save_to_csv(self, row):
+        self.row_queue.put(('row', row))
+
+    def _print_stats(self):
+        # İstatistikler yazıcıda birleştirilip yazdırılır
+        self.row_queue.put(('stats', dict(self.stats), dict(self.device_stats),
+                            {stage: {'counts': counts, 'max_us': self.profile_max_us[stage]}
+                             for stage, counts in self.profile_counts.items()}))
+
+
+def _worker_main(worker_index, host, port, row_queue, collision_state, worker_options):
+    """Worker process giriş noktası"""
+    # Her worker kendi metrik portunu ve dosyasını kullanır
+    worker_options = dict(worker_options)
+    if worker_options.get('metrics_port') is not None:
+        worker_options['metrics_port'] += worker_index
+    if worker_options.get('metrics_snapshot_path'):
+        worker_options['metrics_snapshot_path'] += f'.w{worker_index}'
+    collector = WorkerCollector(host, port, row_queue, collision_state, worker_index,
+                                **worker_options)
+    collector.start()
+
+
+def _writer_main(data_file, row_queue, writer_options):
+    """
+    Tek yazıcı process: Satırları tamponlu yazıcıya (CSV veya sütunlu) aktarır, worker
+    istatistiklerini birleştirir. None mesajı ile durur.
+    """
+    # Ctrl+C worker'ları durdurur; yazıcı kuyruk boşalana kadar çalışır
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    writer = DataCollector(data_file=data_file, **writer_options)
+    writer._init_storage()
+
+    while True:
+        try:
+            message = row_queue.get(timeout=writer.csv_flush_interval_s)
+        except queue.Empty:
+            # Trafik yokken tamponda bekleyen satırları yaz
+            writer.row_writer.flush_if_due()
+            continue
+        if message is None:
+            break
+        if message[0] == 'row':
+            writer._save_to_csv(message[1])
+        elif message[0] == 'stats':
+            _, stats, device_stats, profile = message
+            for key, value in stats.items():
+                writer.stats[key] += value
+            writer._merge_profile(profile)
+            for device_id, counts in device_stats.items():
+                writer.device_stats[device_id]['received'] += counts['received']
+                writer.device_stats[device_id]['failed'] += counts['failed']
+
+    writer._close_storage()
+    writer.console.close()
+    writer._print_stats()
+
+
+def run_workers(workers, host='0.0.0.0', port=5000, data_file='data/collected_data.csv',
+                log_rate_limit=50, log_sample_every=1, metrics_host='127.0.0.1', metrics_port=None,
+                metrics_snapshot_path=None, metrics_snapshot_interval_s=10.0, **writer_options):
+    """
+    Çok çekirdekli sunucuyu başlat (Ctrl+C ile durdurulur)
+
+    Args:
+        workers: Worker process sayısı
+        host: Dinlenecek IP adresi
+        port: Port numarası
+        data_file: Veri kayıt dosyası
+        log_rate_limit: Worker başına saniyede en fazla paket/çarpışma satırı
+        log_sample_every: BASARILI satırlarından her N'de biri yazılır
+        metrics_host: Metrik HTTP uç noktalarının adresi
+        metrics_port: İlk worker'ın metrik portu (worker i: metrics_port + i, None: kapalı)
+        metrics_snapshot_path: Metrik dosyası öneki (worker i: <yol>.w<i>)
+        metrics_snapshot_interval_s: Metrik dosyası yazma aralığı
+        writer_options: Yazıcı DataCollector'a aktarılan depolama ayarları
+            (csv_buffer_rows, csv_flush_interval_s, csv_fsync, storage, storage_path)
+    """
+    if not hasattr(socket, 'SO_REUSEPORT'):
+        raise RuntimeError("SO_REUSEPORT bu platformda desteklenmiyor, --workers 1 kullanin")
+
+    row_queue = multiprocessing.Queue()
+    worker_options = {'log_rate_limit': log_rate_limit, 'log_sample_every': log_sample_every,
+                      'metrics_host': metrics_host, 'metrics_port': metrics_port,
+                      'metrics_snapshot_path': metrics_snapshot_path,
+                      'metrics_snapshot_interval_s': metrics_snapshot_interval_s}
+    collision_state = SharedCollisionState()
+
+    writer = multiprocessing.Process(target=_writer_main, args=(data_file, row_queue, writer_options),
+                                     name='collector-writer')
+    writer.start()
+
+    processes = []
+    for i in range(workers):
+        process = multiprocessing.Process(target=_worker_main,
+                                          args=(i, host, port, row_queue, collision_state,
+                                                worker_options),
+                                          name=f'collector-worker-{i}')
+        process.start()
+        processes.append(process)
+
+    print(f"{workers} worker baslatildi (SO_REUSEPORT): {host}:{port}")
+
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Worker'lar da SIGINT alır ve istatistiklerini gönderip çıkar
+        for process in processes:
+            process.join()
+    finally:
+        row_queue.put(None)
+        writer.join()
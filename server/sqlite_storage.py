@@ -0,0 +1,326 @@
+"""
+SQLite Depolama
+Toplanan verileri (csv_headers şeması) indeksli bir SQLite veritabanına
+yazar; cihaz bazında ve zaman aralığına göre geçmiş sorguları tüm CSV'yi
+taramadan yapılır, istatistikler sunucu yeniden başlasa da kaybolmaz.
+
+Yazma:
+    - WAL modu (okuyucular yazarı bloklamaz)
+    - Tampon dolunca veya süre dolunca tek transaction ile toplu INSERT
+      (sabit INSERT ifadesi sqlite3 modülünde hazırlanmış olarak önbelleklenir)
+
+Tablo: packets (timestamp epoch ms, diğer sütunlar csv_headers ile aynı)
+İndeksler: (device_id, timestamp), (timestamp), (collision_detected)
+
+Kullanım:
+    python sqlite_storage.py convert data/collected_data.csv data/collected_data.db
+    python sqlite_storage.py report data/collected_data.db
+"""
+
+import csv
+import os
+import sqlite3
+import time
+from datetime import datetime
+from columnar_storage import convert_row, SCHEMA
+from csv_writer import FSYNC_NEVER, FSYNC_FLUSH, FSYNC_CLOSE, FSYNC_POLICIES
+
+TABLE_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS packets (
+    timestamp INTEGER NOT NULL,
+    device_id INTEGER NOT NULL,
+    data_age INTEGER,
+    priority INTEGER,
+    rssi INTEGER,
+    channel_occupancy REAL,
+    collision_rate REAL,
+    neighbor_count INTEGER,
+    success INTEGER,
+    delay_used INTEGER,
+    collision_detected INTEGER
+)
+'''
+
+INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_packets_device_time ON packets (device_id, timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_packets_time ON packets (timestamp)',
+    'CREATE INDEX IF NOT EXISTS idx_packets_collision ON packets (collision_detected)',
+)
+
+COLUMNS = [name for name, _ in SCHEMA]
+INSERT_SQL = 'INSERT INTO packets VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+
+# fsync politikası -> PRAGMA synchronous
+SYNCHRONOUS = {
+    FSYNC_NEVER: 'OFF',
+    FSYNC_CLOSE: 'NORMAL',   # WAL'da sadece checkpoint'te senkronize eder
+    FSYNC_FLUSH: 'FULL',     # Her transaction commit'inde
+}
+
+
+def _to_ms(value):
+    """datetime, ISO metni veya epoch ms -> epoch ms"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+
+def connect(path, fsync=FSYNC_NEVER):
+    """
+    Veritabanını aç, WAL modunu ve tabloyu/indeksleri hazırla
+
+    Returns:
+        sqlite3.Connection
+    """
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute(f'PRAGMA synchronous={SYNCHRONOUS[fsync]}')
+    conn.execute(TABLE_SCHEMA)
+    for statement in INDEXES:
+        conn.execute(statement)
+    conn.commit()
+    return conn
+
+
+def _time_filter(start, end, device_id=None):
+    """WHERE koşulu ve parametreleri ([start, end) aralığı)"""
+    conditions = []
+    params = []
+    if device_id is not None:
+        conditions.append('device_id = ?')
+        params.append(device_id)
+    if start is not None:
+        conditions.append('timestamp >= ?')
+        params.append(_to_ms(start))
+    if end is not None:
+        conditions.append('timestamp < ?')
+        params.append(_to_ms(end))
+    where = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+    return where, params
+
+
+def device_success_rates(conn, start=None, end=None):
+    """
+    Cihaz bazında başarı oranı
+
+    Returns:
+        dict: device_id -> {'total', 'success', 'success_rate'}
+    """
+    where, params = _time_filter(start, end)
+    rows = conn.execute(
+        'SELECT device_id, COUNT(*), SUM(success) FROM packets' + where +
+        ' GROUP BY device_id ORDER BY device_id', params)
+    return {
+        device_id: {
+            'total': total,
+            'success': success,
+            'success_rate': success / total if total else 0.0,
+        }
+        for device_id, total, success in rows
+    }
+
+
+def collision_rate(conn, start=None, end=None, device_id=None):
+    """
+    Zaman aralığında (isteğe bağlı olarak tek cihaz için) çarpışma oranı
+
+    Returns:
+        dict: {'total', 'collisions', 'collision_rate'}
+    """
+    where, params = _time_filter(start, end, device_id)
+    total, collisions = conn.execute(
+        'SELECT COUNT(*), COALESCE(SUM(collision_detected), 0) FROM packets' + where,
+        params).fetchone()
+    return {
+        'total': total,
+        'collisions': collisions,
+        'collision_rate': collisions / total if total else 0.0,
+    }
+
+
+def delay_distribution(conn, start=None, end=None, device_id=None):
+    """
+    Kullanılan delay değerlerinin dağılımı ve her delay için başarı oranı
+
+    Returns:
+        list: [(delay_used, count, success_rate), ...] delay sırasıyla
+    """
+    where, params = _time_filter(start, end, device_id)
+    rows = conn.execute(
+        'SELECT delay_used, COUNT(*), SUM(success) FROM packets' + where +
+        ' GROUP BY delay_used ORDER BY delay_used', params)
+    return [(delay, count, success / count if count else 0.0)
+            for delay, count, success in rows]
+
+
+class SqliteWriter:
+    def __init__(self, path, headers=None, buffer_rows=256, flush_interval_s=1.0,
+                 fsync=FSYNC_NEVER):
+        """
+        SQLite yazıcı (BufferedCsvWriter ile aynı arayüz)
+
+        Args:
+            path: Veritabanı dosyası
+            headers: Satır sütun sırası (csv_headers ile aynı olmalı)
+            buffer_rows: Bu kadar satır birikince tek transaction ile yaz
+            flush_interval_s: En eski satır bu kadar beklediyse yaz
+            fsync: 'never' (synchronous=OFF), 'close' (NORMAL), 'flush' (FULL)
+        """
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"Gecersiz fsync politikasi: {fsync}")
+        if headers is not None and list(headers) != COLUMNS:
+            raise ValueError("Sutun sirasi SQLite semasi ile uyusmuyor")
+
+        self.path = path
+        self.buffer_rows = buffer_rows
+        self.flush_interval_s = flush_interval_s
+        self.fsync = fsync
+
+        self.conn = None
+        self.buffer = []
+        self.buffer_since = None
+
+        # İzleme için
+        self.rows_written = 0
+        self.rows_rejected = 0
+        self.flush_count = 0
+
+    def open(self):
+        """Veritabanını aç (tablo ve indeksler yoksa oluşturulur)"""
+        if self.conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.conn = connect(self.path, self.fsync)
+
+    def write_row(self, row):
+        """Satırı tampona ekle"""
+        self.write_rows((row,))
+
+    def write_rows(self, rows):
+        """
+        Satırları dönüştürüp tampona ekle, boyut veya süre dolduysa yaz
+
+        Raises:
+            ValueError: Dönüştürülemeyen satırlar atlandı (geçerli satırlar tampona
+                eklenir ve yazılır; DataCollector._write_rows uyarı olarak yazar)
+        """
+        if not self.buffer:
+            self.buffer_since = time.monotonic()
+        rejected = 0
+        error = None
+        for row in rows:
+            try:
+                self.buffer.append(convert_row(row))
+            except (TypeError, ValueError) as e:
+                rejected += 1
+                error = e
+        if not self.buffer:
+            self.buffer_since = None
+        elif len(self.buffer) >= self.buffer_rows:
+            self.flush()
+        else:
+            self.flush_if_due()
+        if rejected:
+            self.rows_rejected += rejected
+            raise ValueError(f"{rejected} satir atlandi: {error}")
+
+    def flush_if_due(self):
+        """En eski satır flush_interval_s kadar beklediyse yaz"""
+        if self.buffer and time.monotonic() - self.buffer_since >= self.flush_interval_s:
+            self.flush()
+
+    def flush(self):
+        """Tamponu tek transaction ile yaz"""
+        if not self.buffer:
+            return
+        self.open()
+        with self.conn:
+            self.conn.executemany(INSERT_SQL, self.buffer)
+
+        self.rows_written += len(self.buffer)
+        self.flush_count += 1
+        self.buffer = []
+        self.buffer_since = None
+
+    def close(self):
+        """Tamponu yaz ve bağlantıyı kapat"""
+        if self.conn is None:
+            return
+        try:
+            self.flush()
+        finally:
+            self.conn.close()
+            self.conn = None
+
+
+def convert_csv(csv_path, db_path, buffer_rows=10000):
+    """
+    Mevcut CSV dosyasını SQLite veritabanına aktar
+
+    Returns:
+        int: Aktarılan satır sayısı
+    """
+    writer = SqliteWriter(db_path, buffer_rows=buffer_rows, flush_interval_s=float('inf'))
+    writer.open()
+    try:
+        with open(csv_path, 'r', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return 0
+            index = [header.index(name) for name in COLUMNS]
+            for row in reader:
+                if not row:
+                    continue
+                try:
+                    writer.write_row([row[i] for i in index])
+                except ValueError:
+                    pass  # Geçersiz satır atlanır (rows_rejected'da sayılır)
+    finally:
+        writer.close()
+    if writer.rows_rejected:
+        print(f"UYARI: {writer.rows_rejected} gecersiz satir atlandi")
+    return writer.rows_written
+
+
+def print_report(db_path, start=None, end=None):
+    """Veritabanındaki geçmiş istatistikleri yazdır"""
+    conn = connect(db_path)
+    try:
+        overall = collision_rate(conn, start, end)
+        print("\n=== Kalici Istatistikler ===")
+        print(f"Toplam paket: {overall['total']}")
+        print(f"Carpisma orani: {overall['collision_rate'] * 100:.2f}%")
+        print("\nCihaz bazinda:")
+        for device_id, stats in device_success_rates(conn, start, end).items():
+            print(f"  Cihaz {device_id}: {stats['success']}/{stats['total']} basarili "
+                  f"({stats['success_rate'] * 100:.1f}% basari)")
+        print("\nDelay dagilimi:")
+        for delay, count, success_rate in delay_distribution(conn, start, end):
+            print(f"  {delay:>5}ms: {count} paket ({success_rate * 100:.1f}% basari)")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='SQLite veri depolama araçları')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    convert_parser = subparsers.add_parser('convert', help='CSV dosyasını SQLite veritabanına aktar')
+    convert_parser.add_argument('csv_path')
+    convert_parser.add_argument('db_path')
+    report_parser = subparsers.add_parser('report', help='Geçmiş istatistikleri yazdır')
+    report_parser.add_argument('db_path')
+    report_parser.add_argument('--start', default=None, help='Başlangıç (ISO zaman)')
+    report_parser.add_argument('--end', default=None, help='Bitiş (ISO zaman)')
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        count = convert_csv(args.csv_path, args.db_path)
+        print(f"{count} satir aktarildi: {args.csv_path} -> {args.db_path}")
+    else:
+        print_report(args.db_path, args.start, args.end)
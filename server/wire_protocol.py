@@ -0,0 +1,246 @@
+"""
+İkili Kablo Protokolü (sunucu tarafı)
+İkili veri ve toplu paketleri çözer, ikili ACK kodlar
+(cihaz tarafı: lopy4/wire_protocol/wire_protocol.py, format açıklaması orada)
+
+JSON paketler '{' ile başlar; ikili paketler WIRE_MAGIC ile başlar.
+"""
+
+import json
+import struct
+import binascii
+
+WIRE_MAGIC = 0xA7
+WIRE_VERSION = 1
+TYPE_DATA = 1
+TYPE_ACK = 2
+TYPE_BATCH = 3
+TYPE_BATCH_ACK = 4
+
+DATA_HEADER_FORMAT = '<BBBHHIIBHbHHB'
+DATA_HEADER_SIZE = struct.calcsize(DATA_HEADER_FORMAT)
+ACK_FORMAT = '<BBBHHB'
+
+BATCH_HEADER_FORMAT = '<BBBHHB'
+BATCH_HEADER_SIZE = struct.calcsize(BATCH_HEADER_FORMAT)
+RECORD_FORMAT = '<IIBHbHHB'
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+BATCH_ACK_FORMAT = '<BBBHHBI'
+MAX_BATCH_RECORDS = 32
+
+RATE_SCALE = 10000
+
+TLV_TEMPERATURE = 1
+TLV_HUMIDITY = 2
+TLV_SENSOR_ID = 3
+TLV_PROFILE = 4
+TLV_JSON = 255
+
+# Cihaz profil özeti (lopy4/profiler/profiler.py ile aynı sıra ve kovalar)
+PROFILE_STAGES = ('features', 'scan', 'predict', 'send', 'ack_wait')
+PROFILE_BUCKETS_US = (100, 300, 1000, 3000, 10000, 30000, 100000, 300000, 1000000)
+
+ACK_FLAG_SUCCESS = 0x01
+ACK_FLAG_COLLISION = 0x02
+
+
+class WireProtocolError(ValueError):
+    """Geçersiz ikili paket"""
+
+
+def is_binary(data):
+    """Datagram ikili protokolde mi (magic byte)"""
+    return len(data) > 0 and data[0] == WIRE_MAGIC
+
+
+def packet_type(data):
+    """İkili datagramın tipi (TYPE_DATA, TYPE_BATCH, ...) veya kısa ise None"""
+    if len(data) < 3:
+        return None
+    return data[2]
+
+
+def decode_sensor_data(data):
+    """
+    TLV uzantısını sensör sözlüğüne çöz (bilinmeyen tipler atlanır)
+
+    Returns:
+        dict: Sensör verisi
+    """
+    result = {}
+    offset = 0
+    while offset + 2 <= len(data):
+        tlv_type = data[offset]
+        length = data[offset + 1]
+        value = data[offset + 2:offset + 2 + length]
+        if len(value) != length:
+            raise WireProtocolError("TLV kaydi eksik")
+        offset += 2 + length
+
+        if tlv_type == TLV_TEMPERATURE and length == 2:
+            result['temperature'] = struct.unpack('<h', value)[0] / 100
+        elif tlv_type == TLV_HUMIDITY and length == 2:
+            result['humidity'] = struct.unpack('<H', value)[0] / 100
+        elif tlv_type == TLV_SENSOR_ID:
+            result['sensor_id'] = binascii.hexlify(value).decode()
+        elif tlv_type == TLV_PROFILE:
+            result['profile'] = decode_profile(value)
+        elif tlv_type == TLV_JSON:
+            result.update(json.loads(value.decode('utf-8')))
+    return result
+
+
+def decode_profile(value):
+    """
+    Cihaz profil özetini çöz
+
+    Returns:
+        dict: aşama adı -> {'counts': [kova sayaçları], 'max_us': en uzun süre}
+              (kovalar PROFILE_BUCKETS_US üst sınırlarına göre, son kova taşma)
+    """
+    if len(value) < 2:
+        raise WireProtocolError("Profil ozeti cok kisa")
+    n_stages, n_buckets = value[0], value[1]
+    expected = 2 + n_stages * n_buckets * 2 + n_stages * 4
+    if len(value) != expected or n_buckets != len(PROFILE_BUCKETS_US) + 1:
+        raise WireProtocolError(f"Gecersiz profil ozeti: {len(value)} byte")
+
+    counts = struct.unpack_from(f'<{n_stages * n_buckets}H', value, 2)
+    max_us = struct.unpack_from(f'<{n_stages}I', value, 2 + n_stages * n_buckets * 2)
+    return {
+        (PROFILE_STAGES[i] if i < len(PROFILE_STAGES) else f'stage{i}'): {
+            'counts': list(counts[i * n_buckets:(i + 1) * n_buckets]),
+            'max_us': max_us[i],
+        }
+        for i in range(n_stages)
+    }
+
+
+def decode_packet(data):
+    """
+    İkili veri paketini çöz
+
+    Returns:
+        dict: JSON paketle aynı anahtarlar
+
+    Raises:
+        WireProtocolError: Paket kısa, sürüm veya tip geçersiz
+    """
+    if len(data) < DATA_HEADER_SIZE:
+        raise WireProtocolError(f"Paket cok kisa: {len(data)} byte")
+
+    (magic, version, packet_type, device_id, seq, timestamp, data_age, priority,
+     delay_used, rssi, occupancy, collision_rate, neighbor_count) = struct.unpack(
+        DATA_HEADER_FORMAT, data[:DATA_HEADER_SIZE])
+
+    if magic != WIRE_MAGIC:
+        raise WireProtocolError("Gecersiz magic")
+    if version != WIRE_VERSION:
+        raise WireProtocolError(f"Desteklenmeyen surum: {version}")
+    if packet_type != TYPE_DATA:
+        raise WireProtocolError(f"Beklenmeyen paket tipi: {packet_type}")
+
+    return _fields_to_packet(device_id, seq, timestamp, data_age, priority, delay_used,
+                             rssi, occupancy, collision_rate, neighbor_count,
+                             data[DATA_HEADER_SIZE:])
+
+
+def _fields_to_packet(device_id, seq, timestamp, data_age, priority, delay_used,
+                      rssi, occupancy, collision_rate, neighbor_count, tlv):
+    data = decode_sensor_data(tlv)
+    packet = {
+        'device_id': device_id,
+        'seq': seq,
+        'timestamp': timestamp,
+        'data_age': data_age,
+        'priority': priority,
+        'delay_used': delay_used,
+        'rssi': rssi,
+        'channel_occupancy': occupancy / RATE_SCALE,
+        'collision_rate': collision_rate / RATE_SCALE,
+        'neighbor_count': neighbor_count,
+        'data': data
+    }
+    # Profil özeti sensör verisinden ayrı tutulur
+    profile = data.pop('profile', None)
+    if profile is not None:
+        packet['profile'] = profile
+    return packet
+
+
+def decode_batch(data):
+    """
+    Toplu paketi tek tek paketlere çöz
+    Kayıtların sıra numaraları base_seq'ten başlayarak ardışıktır
+
+    Returns:
+        tuple: (device_id, base_seq, [packet, ...])
+
+    Raises:
+        WireProtocolError: Başlık veya kayıtlar geçersiz
+    """
+    if len(data) < BATCH_HEADER_SIZE:
+        raise WireProtocolError(f"Toplu paket cok kisa: {len(data)} byte")
+
+    magic, version, batch_type, device_id, base_seq, count = struct.unpack(
+        BATCH_HEADER_FORMAT, data[:BATCH_HEADER_SIZE])
+    if magic != WIRE_MAGIC:
+        raise WireProtocolError("Gecersiz magic")
+    if version != WIRE_VERSION:
+        raise WireProtocolError(f"Desteklenmeyen surum: {version}")
+    if batch_type != TYPE_BATCH:
+        raise WireProtocolError(f"Beklenmeyen paket tipi: {batch_type}")
+    if count > MAX_BATCH_RECORDS:
+        raise WireProtocolError(f"Cok fazla kayit: {count}")
+
+    packets = []
+    offset = BATCH_HEADER_SIZE
+    for i in range(count):
+        end = offset + RECORD_SIZE + 1
+        if end > len(data):
+            raise WireProtocolError("Toplu paket kaydi eksik")
+        (timestamp, data_age, priority, delay_used, rssi, occupancy,
+         collision_rate, neighbor_count) = struct.unpack(RECORD_FORMAT, data[offset:offset + RECORD_SIZE])
+        tlv_length = data[offset + RECORD_SIZE]
+        tlv = data[end:end + tlv_length]
+        if len(tlv) != tlv_length:
+            raise WireProtocolError("Toplu paket TLV eksik")
+        packets.append(_fields_to_packet(device_id, (base_seq + i) & 0xFFFF, timestamp, data_age,
+                                         priority, delay_used, rssi, occupancy,
+                                         collision_rate, neighbor_count, tlv))
+        offset = end + tlv_length
+
+    return device_id, base_seq, packets
+
+
+def encode_ack(ack_packet):
+    """
+    ACK sözlüğünü ikili formata kodla
+
+    Args:
+        ack_packet: {'device_id', 'seq', 'success', 'collision_detected', ...}
+
+    Returns:
+        bytes: 8 byte ACK
+    """
+    flags = 0
+    if ack_packet.get('success'):
+        flags |= ACK_FLAG_SUCCESS
+    if ack_packet.get('collision_detected'):
+        flags |= ACK_FLAG_COLLISION
+    return struct.pack(ACK_FORMAT, WIRE_MAGIC, WIRE_VERSION, TYPE_ACK,
+                       ack_packet['device_id'], ack_packet.get('seq', 0), flags)
+
+
+def encode_batch_ack(device_id, base_seq, count, success_bitmap):
+    """
+    Toplu paket için tek ACK kodla
+
+    Args:
+        success_bitmap: i. bit, base_seq + i kaydı çarpışmasız alındıysa 1
+
+    Returns:
+        bytes: 12 byte ACK
+    """
+    return struct.pack(BATCH_ACK_FORMAT, WIRE_MAGIC, WIRE_VERSION, TYPE_BATCH_ACK,
+                       device_id, base_seq, count, success_bitmap)
@@ -0,0 +1,538 @@
+"""
+Sanal Cihaz Simülatörü ve Yük Üreteci
+Fiziksel LoPy4 kartı olmadan DataCollector'ı yük altında test etmek için tek
+bir asyncio event loop'ta çok sayıda (binlerce) sanal cihaz çalıştırır.
+
+Her sanal cihaz cihaz kodunun kendisini kullanır (host_shims üzerinden):
+    - ChannelMonitor + ScanCache: özellikler, sentetik WiFi taramasından
+      (cihaz başına RSSI ve doluluk dağılımı)
+    - MLScheduler: gecikme tahmini (model bir kez yüklenir, cihazlar paylaşır)
+    - DataSender: paket formatı (ikili / JSON), seq, ACK eşleme ve zaman aşımı
+
+Gönderim döngüsü main.send_loop ile aynıdır: rastgele aralık -> öncelik ->
+ML gecikmesi -> gönderim; ACK beklenmez. Sunucu ACK'yı 5000 + device_id
+portuna gönderdiği için her sanal cihaz, gerçek cihaz gibi bu portu bind eden
+kendi UDP soketini kullanır (cihaz sayısı kadar dosya tanıtıcısı gerekir).
+
+Rapor: gönderim / ACK hızı, ACK gecikme dağılımı (p50/p90/p99), çarpışma ve
+zaman aşımı oranı, event loop gecikmesi (simülatörün kendisi darboğaz mı).
+
+Kullanım:
+    python device_simulator.py --server 127.0.0.1:5000 --devices 1000 --duration 30
+"""
+
+import asyncio
+import json
+import os
+import random
+import time
+from array import array
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import host_shims
+
+# Cihaz modülleri MicroPython API'leri eklendikten sonra import edilir
+host_shims.install()
+
+import data_sender
+import logger
+from channel_monitor import ChannelMonitor
+from data_sender import DataSender
+from ml_scheduler import MLScheduler
+from scan_cache import ScanCache
+
+# Cihaz kaynak portu = SOURCE_PORT_BASE + device_id (DataSender._connect ile aynı)
+SOURCE_PORT_BASE = 5000
+
+# Arka plan tarama periyodu (main_async gibi, ChannelMonitor.scan_interval_ms)
+SCAN_INTERVAL_MS = 5000
+
+# Zaman aşımı kontrolü ve event loop gecikmesi ölçüm aralığı (ms)
+SWEEP_INTERVAL_MS = 50
+
+ARRIVAL_UNIFORM = 'uniform'  # [min_interval, max_interval] arası düzgün (main.send_loop)
+ARRIVAL_POISSON = 'poisson'  # Ortalaması aynı üstel aralıklar
+ARRIVAL_MODES = (ARRIVAL_UNIFORM, ARRIVAL_POISSON)
+
+
+class SyntheticWLAN:
+    def __init__(self, rng, rssi_mean=-70.0, rssi_std=6.0, occupancy=0.3):
+        """
+        Sentetik WiFi taraması üreten network.WLAN yerine geçen sınıf
+
+        Args:
+            rng: random.Random instance
+            rssi_mean: Bağlı ağın ortalama RSSI'si (dBm)
+            rssi_std: Tarama başına RSSI standart sapması
+            occupancy: Cihazın ortalama kanal doluluğu (0.0 - 1.0, ağ sayısı = x10)
+        """
+        self.rng = rng
+        self.rssi_mean = rssi_mean
+        self.rssi_std = rssi_std
+        self.occupancy = occupancy
+
+    def isconnected(self):
+        return True
+
+    def scan(self):
+        """Bağlı ağ + doluluğa göre komşu ağlar [(ssid, bssid, sec, channel, rssi), ...]"""
+        rng = self.rng
+        rssi = int(min(max(rng.gauss(self.rssi_mean, self.rssi_std), -99), -30))
+        networks = [(b'sim', b'\x00\x00\x00\x00\x00\x00', 3, 6, rssi)]
+        neighbors = int(round(rng.gauss(self.occupancy * 10, 1.0)))
+        for i in range(max(neighbors - 1, 0)):
+            networks.append((b'n%d' % i, bytes([0, 0, 0, 0, 0, i & 0xFF]), 3,
+                             rng.choice((1, 6, 11)), rssi - rng.randint(1, 30)))
+        return networks
+
+
+class VirtualDevice:
+    def __init__(self, simulator, device_id, wlan):
+        """
+        Tek sanal cihaz (ChannelMonitor + DataSender, paylaşılan MLScheduler)
+
+        Args:
+            simulator: DeviceSimulator (ayarlar, soketler, toplu sonuçlar)
+            device_id: Cihaz ID
+            wlan: Sentetik tarama kaynağı (SyntheticWLAN)
+        """
+        self.simulator = simulator
+        self.device_id = device_id
+        self.scan_cache = ScanCache(wlan=wlan, ttl_ms=SCAN_INTERVAL_MS)
+        self.monitor = ChannelMonitor(device_id, scan_cache=self.scan_cache)
+        self.sender = DataSender(device_id, self.monitor, simulator.server_host,
+                                 simulator.server_port, scan_cache=self.scan_cache,
+                                 on_result=self._on_result)
+        self.sender.ack_timeout_ms = simulator.ack_timeout_ms
+        # seq -> gönderim anı (perf_counter, ACK gecikmesi için)
+        self.sent_at = {}
+        self.transport = None
+
+    def _on_result(self, seq, success, delay_used):
+        # ACK veya zaman aşımı: DataSender sonucu channel_monitor'a kaydetti
+        self.sent_at.pop(seq, None)
+
+    def send(self, data_age, priority, delay_used):
+        """
+        DataSender paket formatıyla bir paket gönder (send_data_nowait ile aynı adımlar,
+        soket yerine paylaşılan asyncio transport kullanılır)
+
+        Returns:
+            bool: Paket gönderildiyse True
+        """
+        sender = self.sender
+        seq = sender._take_seq()
+        packet_bytes = sender._build_packet(data_age, priority, delay_used, seq=seq)
+        if packet_bytes is None:
+            return False
+        try:
+            self.transport.sendto(packet_bytes, (sender.server_ip, sender.server_port))
+        except OSError as e:
+            sender._record_send_error(e, delay_used)
+            return False
+        self.monitor.record_channel_activity()
+        self.sent_at[seq] = time.perf_counter()
+        sender._add_pending(seq, time.ticks_ms(), delay_used)
+        return True
+
+    def handle_ack(self, data):
+        """ACK'yı bekleyen pakete eşle, gecikmeyi ve çarpışmayı kaydet"""
+        sender = self.sender
+        result = sender._parse_ack(data)
+        if result is None:
+            self.simulator.bad_acks += 1
+            return
+        seq, success, collision_detected = result
+        if seq not in sender.pending_acks:
+            # Zaman aşımından sonra gelen veya tekrar eden ACK
+            sender.ack_stats['late'] += 1
+            return
+        sent_at = self.sent_at.get(seq)
+        if sent_at is not None:
+            self.simulator.ack_latencies.append(time.perf_counter() - sent_at)
+        if collision_detected:
+            self.simulator.collisions += 1
+        sender._resolve_ack(seq, success, collision_detected)
+
+    async def run(self, rng):
+        """main.send_loop ile aynı döngü (ilk gönderim rastgele kaydırılır)"""
+        simulator = self.simulator
+        scheduler = simulator.scheduler
+        last_data_time = time.ticks_ms()
+        await asyncio.sleep(rng.uniform(0, simulator.max_interval_ms) / 1000.0)
+
+        while simulator.running:
+            self.scan_cache.begin_cycle()
+            priority = rng.choices(simulator.priorities, simulator.priority_weights)[0]
+            data_age = 0
+
+            delay = 0
+            if scheduler is not None:
+                # Paylaşılan model: tahmin senkron olduğu için kanal izleyici
+                # çağrı süresince bu cihazınkine çevrilir
+                scheduler.channel_monitor = self.monitor
+                delay = scheduler.get_optimal_delay(data_age=data_age, priority=priority)
+                if simulator.max_delay_ms is not None:
+                    delay = min(delay, simulator.max_delay_ms)
+                simulator.delay_total_ms += delay
+                if delay > 0:
+                    await asyncio.sleep(delay / 1000.0)
+                if not simulator.running:
+                    break
+
+            now = time.ticks_ms()
+            actual_data_age = max(time.ticks_diff(now, last_data_time), 0)
+            if self.send(actual_data_age, priority, int(delay)):
+                simulator.sent += 1
+                simulator.priority_counts[priority] += 1
+            else:
+                simulator.send_errors += 1
+            last_data_time = time.ticks_ms()
+
+            await asyncio.sleep(simulator.next_interval_ms(rng) / 1000.0)
+
+
+class AckProtocol(asyncio.DatagramProtocol):
+    """Sanal cihazın soketi: gelen ACK'ları cihaza iletir"""
+
+    def __init__(self, device):
+        self.device = device
+
+    def datagram_received(self, data, addr):
+        self.device.handle_ack(data)
+
+    def error_received(self, exc):
+        self.device.simulator.socket_errors += 1
+
+
+class DeviceSimulator:
+    def __init__(self, server_host='127.0.0.1', server_port=5000, devices=100, device_id_base=1,
+                 min_interval_ms=200, max_interval_ms=800, arrival=ARRIVAL_UNIFORM,
+                 priority_weights=(1, 1, 1), rssi_mean=-70.0, rssi_std=6.0,
+                 occupancy_min=0.0, occupancy_max=0.6, use_scheduler=True, model_path=None,
+                 max_delay_ms=None, wire_format='bin', ack_timeout_ms=500,
+                 seed=None):
+        """
+        Sanal cihaz simülatörü
+
+        Args:
+            server_host: DataCollector adresi
+            server_port: DataCollector portu
+            devices: Sanal cihaz sayısı
+            device_id_base: İlk cihaz ID'si (ID'ler ardışık, uint16)
+            min_interval_ms, max_interval_ms: Gönderimler arası bekleme aralığı
+            arrival: 'uniform' (main.send_loop gibi) veya 'poisson' (üstel, ortalama aynı)
+            priority_weights: Öncelik 1, 2, 3 ağırlıkları (örn. (6, 3, 1))
+            rssi_mean, rssi_std: Sentetik RSSI dağılımı (dBm)
+            occupancy_min, occupancy_max: Cihaz başına ortalama doluluk aralığı (düzgün)
+            use_scheduler: False ise ML gecikmesi uygulanmaz (saf yük testi)
+            model_path: Model dosyası (None ise ml_scheduler.MODEL_PATHS varsayılanı)
+            max_delay_ms: ML gecikmesi üst sınırı (None: sınırsız)
+            wire_format: 'bin' veya 'json' (data_sender.WIRE_FORMAT)
+            ack_timeout_ms: ACK zaman aşımı
+            seed: Tekrarlanabilir çalıştırma için rastgelelik tohumu
+        """
+        if arrival not in ARRIVAL_MODES:
+            raise ValueError(f"Gecersiz varis modu: {arrival}")
+        last_port = SOURCE_PORT_BASE + device_id_base + devices - 1
+        if devices < 1 or device_id_base < 1 or last_port > 0xFFFF:
+            raise ValueError(f"Cihaz kaynak portlari gecersiz: {SOURCE_PORT_BASE + device_id_base}"
+                             f"-{last_port}")
+        if SOURCE_PORT_BASE + device_id_base <= server_port <= last_port:
+            raise ValueError(f"Sunucu portu {server_port} cihaz kaynak portlariyla cakisiyor")
+        if len(priority_weights) != 3:
+            raise ValueError(f"Oncelik 1, 2, 3 icin uc agirlik gerekli: {priority_weights}")
+        if min_interval_ms > max_interval_ms:
+            raise ValueError(f"Gecersiz aralik: {min_interval_ms} > {max_interval_ms}")
+
+        self.server_host = server_host
+        self.server_port = server_port
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max_interval_ms
+        self.arrival = arrival
+        self.priorities = (1, 2, 3)
+        self.priority_weights = tuple(priority_weights)
+        self.max_delay_ms = max_delay_ms
+        self.ack_timeout_ms = ack_timeout_ms
+        self.rng = random.Random(seed)
+
+        data_sender.WIRE_FORMAT = wire_format
+        # Paket başına konsol çıktısı simülatörü yavaşlatır
+        logger.set_level(logger.WARNING)
+
+        self.scheduler = self._create_scheduler(model_path) if use_scheduler else None
+
+        self.devices = {}
+        for device_id in range(device_id_base, device_id_base + devices):
+            wlan = SyntheticWLAN(self.rng, rssi_mean, rssi_std,
+                                 self.rng.uniform(occupancy_min, occupancy_max))
+            self.devices[device_id] = VirtualDevice(self, device_id, wlan)
+
+        # Toplu sonuçlar (tek event loop, kilit gerekmez)
+        self.running = False
+        self.sent = 0
+        self.send_errors = 0
+        self.collisions = 0
+        self.bad_acks = 0
+        self.socket_errors = 0
+        self.delay_total_ms = 0.0
+        self.priority_counts = {priority: 0 for priority in self.priorities}
+        self.ack_latencies = array('d')
+        self.max_loop_lag_ms = 0.0
+
+    @staticmethod
+    def _create_scheduler(model_path):
+        """Modeli bir kez yükle (cihaz kodu yolları /flash köküne göre açar, burada lopy4/)"""
+        if model_path is not None:
+            model_path = os.path.abspath(model_path)
+        cwd = os.getcwd()
+        os.chdir(host_shims.LOPY4_DIR)
+        try:
+            return MLScheduler(0, None, model_path)
+        finally:
+            os.chdir(cwd)
+
+    @staticmethod
+    def _raise_fd_limit(needed):
+        """Cihaz başına bir soket için dosya tanıtıcısı sınırını (izin verilen ölçüde) yükselt"""
+        if resource is None:
+            return
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft != resource.RLIM_INFINITY and soft < needed:
+            target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            if target < needed:
+                print(f"UYARI: Dosya tanitici siniri {target}, {needed} gerekli (ulimit -n)")
+
+    def next_interval_ms(self, rng):
+        """Sonraki gönderime kadar bekleme (arrival moduna göre)"""
+        if self.arrival == ARRIVAL_POISSON:
+            return rng.expovariate(2.0 / (self.min_interval_ms + self.max_interval_ms))
+        return rng.uniform(self.min_interval_ms, self.max_interval_ms)
+
+    def target_rate(self):
+        """ML gecikmesi hariç beklenen toplam paket hızı (paket/sn)"""
+        mean_interval_ms = (self.min_interval_ms + self.max_interval_ms) / 2.0
+        return len(self.devices) * 1000.0 / mean_interval_ms if mean_interval_ms else 0.0
+
+    def _ack_totals(self):
+        totals = {'acked': 0, 'timeouts': 0, 'late': 0}
+        for device in self.devices.values():
+            for key in totals:
+                totals[key] += device.sender.ack_stats[key]
+        return totals
+
+    async def _sweeper(self):
+        """Zaman aşımlarını uygula ve event loop gecikmesini ölç"""
+        interval_s = SWEEP_INTERVAL_MS / 1000.0
+        devices = list(self.devices.values())
+        while True:
+            expected = time.perf_counter() + interval_s
+            await asyncio.sleep(interval_s)
+            lag_ms = (time.perf_counter() - expected) * 1000
+            if lag_ms > self.max_loop_lag_ms:
+                self.max_loop_lag_ms = lag_ms
+            for device in devices:
+                if device.sender.pending_acks:
+                    device.sender.expire_pending_acks()
+
+    async def _progress(self, interval_s, started):
+        """Periyodik ilerleme satırı"""
+        last_sent = 0
+        last_time = started
+        while True:
+            await asyncio.sleep(interval_s)
+            now = time.perf_counter()
+            totals = self._ack_totals()
+            rate = (self.sent - last_sent) / (now - last_time)
+            print(f"[{now - started:6.1f}s] gonderilen: {self.sent} ({rate:.0f} paket/sn) | "
+                  f"ACK: {totals['acked']} | zaman asimi: {totals['timeouts']} | "
+                  f"carpisma: {self.collisions}")
+            last_sent = self.sent
+            last_time = now
+
+    async def run(self, duration_s, progress_interval_s=None):
+        """
+        Simülasyonu duration_s saniye çalıştır
+
+        Returns:
+            dict: Sonuçlar (bkz. results)
+        """
+        loop = asyncio.get_running_loop()
+        self._raise_fd_limit(len(self.devices) + 64)
+        transports = []
+        try:
+            for device in self.devices.values():
+                port = SOURCE_PORT_BASE + device.device_id
+                device.transport, _ = await loop.create_datagram_endpoint(
+                    lambda device=device: AckProtocol(device), local_addr=('0.0.0.0', port))
+                transports.append(device.transport)
+        except OSError:
+            for transport in transports:
+                transport.close()
+            raise
+
+        self.running = True
+        started = time.perf_counter()
+        tasks = []
+        for device in self.devices.values():
+            # main_async gibi: tarama ve RSSI arka planda, gönderim döngüsü ayrı
+            tasks.append(asyncio.create_task(device.monitor.run_background_scan(SCAN_INTERVAL_MS)))
+            tasks.append(asyncio.create_task(device.run(random.Random(self.rng.random()))))
+        tasks.append(asyncio.create_task(self._sweeper()))
+        if progress_interval_s:
+            tasks.append(asyncio.create_task(self._progress(progress_interval_s, started)))
+        try:
+            await asyncio.sleep(duration_s)
+            self.running = False
+            elapsed = time.perf_counter() - started
+            # Yoldaki ACK'lar için bir zaman aşımı süresi bekle
+            await asyncio.sleep(self.ack_timeout_ms / 1000.0)
+        finally:
+            self.running = False
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for transport in transports:
+                transport.close()
+        for device in self.devices.values():
+            device.sender.expire_pending_acks()
+            for seq in list(device.sender.pending_acks):
+                device.sender._resolve_ack(seq, None, None)
+        return self.results(elapsed)
+
+    def results(self, elapsed_s):
+        """
+        Toplu sonuçlar
+
+        Returns:
+            dict: Hızlar, ACK gecikme dağılımı (ms), çarpışma / zaman aşımı oranları
+        """
+        totals = self._ack_totals()
+        latencies = sorted(self.ack_latencies)
+
+        def percentile(fraction):
+            if not latencies:
+                return None
+            index = min(int(len(latencies) * fraction), len(latencies) - 1)
+            return latencies[index] * 1000
+
+        return {
+            'devices': len(self.devices),
+            'duration_s': elapsed_s,
+            'wire_format': data_sender.WIRE_FORMAT,
+            'arrival': self.arrival,
+            'scheduler': self.scheduler is not None,
+            'target_rate_pps': self.target_rate(),
+            'sent': self.sent,
+            'send_rate_pps': self.sent / elapsed_s if elapsed_s else 0.0,
+            'ack_rate_pps': totals['acked'] / elapsed_s if elapsed_s else 0.0,
+            'acked': totals['acked'],
+            'timeouts': totals['timeouts'],
+            'late_acks': totals['late'],
+            'collisions': self.collisions,
+            'collision_rate': self.collisions / totals['acked'] if totals['acked'] else 0.0,
+            'timeout_rate': totals['timeouts'] / self.sent if self.sent else 0.0,
+            'send_errors': self.send_errors,
+            'bad_acks': self.bad_acks,
+            'socket_errors': self.socket_errors,
+            'ack_latency_ms': {
+                'count': len(latencies),
+                'mean': sum(latencies) / len(latencies) * 1000 if latencies else None,
+                'p50': percentile(0.5),
+                'p90': percentile(0.9),
+                'p99': percentile(0.99),
+                'max': latencies[-1] * 1000 if latencies else None,
+            },
+            'mean_scheduler_delay_ms': self.delay_total_ms / self.sent if self.sent else 0.0,
+            'priority_counts': self.priority_counts,
+            'max_loop_lag_ms': self.max_loop_lag_ms,
+        }
+
+
+def print_report(results):
+    """Sonuçları okunur biçimde yazdır"""
+    latency = results['ack_latency_ms']
+
+    def ms(value):
+        return '-' if value is None else f"{value:.2f}"
+
+    print("\n=== Simulasyon Sonucu ===")
+    print(f"Cihaz: {results['devices']} | Sure: {results['duration_s']:.1f} s | "
+          f"Format: {results['wire_format']} | ML gecikmesi: {'acik' if results['scheduler'] else 'kapali'}")
+    print(f"Hedef hiz: {results['target_rate_pps']:.0f} paket/sn | "
+          f"Gonderim: {results['send_rate_pps']:.0f} paket/sn | ACK: {results['ack_rate_pps']:.0f} paket/sn")
+    print(f"Gonderilen: {results['sent']} | ACK: {results['acked']} | "
+          f"Zaman asimi: {results['timeouts']} ({results['timeout_rate'] * 100:.2f}%) | "
+          f"Gec ACK: {results['late_acks']}")
+    print(f"Carpisma orani: {results['collision_rate'] * 100:.2f}% ({results['collisions']})")
+    print(f"ACK gecikmesi (ms): p50 {ms(latency['p50'])} | p90 {ms(latency['p90'])} | "
+          f"p99 {ms(latency['p99'])} | max {ms(latency['max'])}")
+    print(f"Ortalama ML gecikmesi: {results['mean_scheduler_delay_ms']:.0f} ms | "
+          f"Oncelik dagilimi: {results['priority_counts']}")
+    print(f"En buyuk event loop gecikmesi: {results['max_loop_lag_ms']:.1f} ms")
+    if results['max_loop_lag_ms'] > SWEEP_INTERVAL_MS:
+        print("UYARI: Simulator event loop'u gecikiyor, olculen hiz simulatorle sinirli olabilir")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    def parse_range(text):
+        low, _, high = text.partition('-')
+        return float(low), float(high or low)
+
+    parser = argparse.ArgumentParser(description='LoPy4 sanal cihaz simulatoru / yuk ureteci')
+    parser.add_argument('--server', default='127.0.0.1:5000', help='DataCollector adresi (host:port)')
+    parser.add_argument('--devices', type=int, default=100, help='Sanal cihaz sayısı')
+    parser.add_argument('--device-id-base', type=int, default=1, help='İlk cihaz ID\'si')
+    parser.add_argument('--duration', type=float, default=30.0, help='Süre (saniye)')
+    parser.add_argument('--interval', type=parse_range, default=(200, 800),
+                        help='Gönderim aralığı ms, "min-max" veya sabit (varsayılan: 200-800)')
+    parser.add_argument('--arrival', default=ARRIVAL_UNIFORM, choices=ARRIVAL_MODES,
+                        help='Aralık dağılımı')
+    parser.add_argument('--priority-mix', default='1,1,1',
+                        help='Öncelik 1,2,3 ağırlıkları (örn. 6,3,1)')
+    parser.add_argument('--rssi', type=float, nargs=2, default=(-70.0, 6.0),
+                        metavar=('ORTALAMA', 'SAPMA'), help='Sentetik RSSI dağılımı (dBm)')
+    parser.add_argument('--occupancy', type=parse_range, default=(0.0, 0.6),
+                        help='Cihaz başına ortalama doluluk aralığı (örn. 0.1-0.8)')
+    parser.add_argument('--no-scheduler', action='store_true',
+                        help='ML gecikmesi uygulama (saf yük testi)')
+    parser.add_argument('--model', default=None, help='Model dosyası (varsayılan: lopy4/models)')
+    parser.add_argument('--max-delay', type=float, default=None, help='ML gecikmesi üst sınırı (ms)')
+    parser.add_argument('--wire-format', default='bin', choices=('bin', 'json'), help='Paket formatı')
+    parser.add_argument('--ack-timeout', type=int, default=500, help='ACK zaman aşımı (ms)')
+    parser.add_argument('--seed', type=int, default=None, help='Rastgelelik tohumu')
+    parser.add_argument('--progress', type=float, default=5.0,
+                        help='İlerleme satırı aralığı (saniye, 0: kapalı)')
+    parser.add_argument('--json-out', default=None, help='Sonuçları JSON dosyasına yaz')
+    args = parser.parse_args()
+
+    host, _, port = args.server.rpartition(':')
+    simulator = DeviceSimulator(
+        server_host=host or '127.0.0.1', server_port=int(port), devices=args.devices,
+        device_id_base=args.device_id_base, min_interval_ms=args.interval[0],
+        max_interval_ms=args.interval[1], arrival=args.arrival,
+        priority_weights=[float(w) for w in args.priority_mix.split(',')],
+        rssi_mean=args.rssi[0], rssi_std=args.rssi[1],
+        occupancy_min=args.occupancy[0], occupancy_max=args.occupancy[1],
+        use_scheduler=not args.no_scheduler, model_path=args.model, max_delay_ms=args.max_delay,
+        wire_format=args.wire_format, ack_timeout_ms=args.ack_timeout, seed=args.seed)
+
+    print(f"{args.devices} sanal cihaz -> {simulator.server_host}:{simulator.server_port}, "
+          f"{args.duration:.0f} s")
+    try:
+        results = asyncio.run(simulator.run(args.duration, args.progress or None))
+    except KeyboardInterrupt:
+        print("Simulasyon durduruldu")
+    else:
+        print_report(results)
+        if args.json_out:
+            with open(args.json_out, 'w') as f:
+                json.dump(results, f, indent=2)
+            print(f"Sonuclar yazildi: {args.json_out}")
@@ -0,0 +1,140 @@
+"""
+Host (CPython) Uyumluluk Katmanı
+LoPy4 modüllerinin (ChannelMonitor, MLScheduler, DataSender, ...) Linux'ta
+değiştirilmeden çalışması için MicroPython'a özgü API'leri sağlar:
+
+    - time.ticks_ms / ticks_us / ticks_diff / ticks_add / sleep_ms / sleep_us
+    - network: WLAN (bağlı görünür, tarama sonucu boş; simülatör cihaz başına
+      kendi WLAN nesnesini ScanCache'e verir)
+    - machine: unique_id, reset, idle, freq
+    - ubinascii -> binascii, sys.print_exception
+    - lopy4/<modül> dizinleri sys.path'e eklenir (cihazdaki düz /flash yerleşimi)
+
+Gerçek modül zaten varsa (örn. MicroPython unix portu) dokunulmaz.
+
+Kullanım:
+    import host_shims
+    host_shims.install()
+
+    from channel_monitor import ChannelMonitor
+"""
+
+import binascii
+import os
+import sys
+import time
+import traceback
+import types
+
+# Depo içindeki cihaz kodu dizini
+LOPY4_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'lopy4')
+
+# ticks_* değerleri install() anından itibaren sayılır (cihazdaki açılıştan beri geçen süre gibi)
+_ticks_origin = time.monotonic()
+
+
+def _ticks_ms():
+    return int((time.monotonic() - _ticks_origin) * 1000)
+
+
+def _ticks_us():
+    return int((time.monotonic() - _ticks_origin) * 1000000)
+
+
+def _ticks_diff(a, b):
+    return a - b
+
+
+def _ticks_add(ticks, delta):
+    return ticks + delta
+
+
+def _sleep_ms(ms):
+    time.sleep(ms / 1000.0)
+
+
+def _sleep_us(us):
+    time.sleep(us / 1000000.0)
+
+
+class WLAN:
+    """network.WLAN yerine geçen minimal arayüz"""
+    STA = 1
+    AP = 2
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def isconnected(self):
+        return True
+
+    def connect(self, *args, **kwargs):
+        pass
+
+    def disconnect(self):
+        pass
+
+    def ifconfig(self):
+        return ('127.0.0.1', '255.0.0.0', '127.0.0.1', '127.0.0.1')
+
+    def mac(self):
+        return b'\x00\x00\x00\x00\x00\x00'
+
+    def scan(self):
+        return []
+
+
+def _unique_id():
+    return b'\x00\x00\x00\x00\x00\x00'
+
+
+def _print_exception(e, file=None):
+    traceback.print_exception(type(e), e, e.__traceback__, file=file)
+
+
+def _module(name, **attrs):
+    module = types.ModuleType(name)
+    for key, value in attrs.items():
+        setattr(module, key, value)
+    return module
+
+
+def _importable(name):
+    try:
+        __import__(name)
+        return True
+    except ImportError:
+        return False
+
+
+def install(lopy4_dir=LOPY4_DIR):
+    """
+    MicroPython API'lerini ekle ve cihaz modüllerini import edilebilir yap
+
+    Args:
+        lopy4_dir: Cihaz kodu dizini (her alt dizin sys.path'e eklenir)
+    """
+    if not hasattr(time, 'ticks_ms'):
+        time.ticks_ms = _ticks_ms
+        time.ticks_us = _ticks_us
+        time.ticks_diff = _ticks_diff
+        time.ticks_add = _ticks_add
+        time.sleep_ms = _sleep_ms
+        time.sleep_us = _sleep_us
+
+    if not hasattr(sys, 'print_exception'):
+        sys.print_exception = _print_exception
+
+    if not _importable('network'):
+        sys.modules['network'] = _module('network', WLAN=WLAN, STA_IF=WLAN.STA, AP_IF=WLAN.AP)
+    if not _importable('machine'):
+        sys.modules['machine'] = _module('machine', unique_id=_unique_id,
+                                         reset=lambda: None, idle=lambda: None,
+                                         freq=lambda: 240000000)
+    if not _importable('ubinascii'):
+        sys.modules['ubinascii'] = binascii
+
+    for name in sorted(os.listdir(lopy4_dir)):
+        path = os.path.join(lopy4_dir, name)
+        if os.path.isdir(path) and path not in sys.path:
+            sys.path.append(path)
@@ -0,0 +1,73 @@
+"""
+Sütunlu depolama regresyon testleri
+Aralık dışı değerli tek satır yazıcıyı kilitlememeli: satır atlanır,
+geçerli satırlar yazılır ve sonraki yazmalar çalışmaya devam eder.
+
+Çalıştırma:
+    python -m pytest tests
+"""
+
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'server'))
+
+import pytest
+
+from columnar_storage import ColumnarWriter, SCHEMA, convert_row, read_columns
+
+HEADERS = [name for name, _ in SCHEMA]
+
+
+def _row(priority=2, rssi=-70, device_id=1):
+    return [datetime.now().isoformat(), device_id, 120, priority, rssi, 0.25, 0.1, 3,
+            1, 500, 0]
+
+
+def test_convert_row_rejects_out_of_range():
+    with pytest.raises(ValueError):
+        convert_row(_row(priority=300))
+    with pytest.raises(ValueError):
+        convert_row(_row(rssi=40000))
+
+
+def test_out_of_range_row_does_not_wedge_writer(tmp_path):
+    writer = ColumnarWriter(str(tmp_path), HEADERS, buffer_rows=3)
+    writer.open()
+
+    with pytest.raises(ValueError):
+        writer.write_rows([_row(), _row(), _row(priority=300)])
+    assert writer.rows_rejected == 1
+    assert len(writer.buffer) == 2
+
+    # Sonraki yazmalar tampon dolunca normal şekilde boşaltılır
+    writer.write_rows([_row(device_id=2)])
+    assert writer.rows_written == 3
+    assert writer.buffer == []
+
+    writer.write_rows([_row(device_id=3)])
+    writer.close()
+    assert writer.rows_written == 4
+
+    data = read_columns(str(tmp_path), ['device_id', 'priority'])
+    assert list(data['device_id']) == [1, 1, 2, 3]
+    assert list(data['priority']) == [2, 2, 2, 2]
+
+
+def test_flush_drops_unencodable_partition(tmp_path):
+    writer = ColumnarWriter(str(tmp_path), HEADERS, buffer_rows=100)
+    writer.write_rows([_row()])
+    # Doğrulamayı atlayan değer (örn. doğrudan tampona eklenmiş) flush'ı kilitlememeli
+    bad = list(convert_row(_row()))
+    bad[HEADERS.index('priority')] = 300
+    writer.buffer.append(tuple(bad))
+
+    with pytest.raises(ValueError):
+        writer.flush()
+    assert writer.buffer == []
+
+    writer.write_rows([_row(device_id=5)])
+    writer.close()
+    assert list(read_columns(str(tmp_path), ['device_id'])['device_id']) == [5]
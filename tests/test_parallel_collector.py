@@ -0,0 +1,39 @@
+"""
+Çok çekirdekli çarpışma durumu testleri
+SharedCollisionState, tek process'teki _detect_collision gibi pencere
+içindeki tüm diğer cihazları (her cihaz bir kez, yakından uzağa) döndürmeli.
+
+Çalıştırma:
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'server'))
+
+from parallel_collector import SharedCollisionState
+
+WINDOW_MS = 800
+
+
+def test_reports_every_device_in_window():
+    state = SharedCollisionState()
+    assert state.check_and_update(1, 1000, WINDOW_MS) == []
+    assert state.check_and_update(2, 1050, WINDOW_MS) == [(1, 50)]
+    assert state.check_and_update(1, 1100, WINDOW_MS) == [(2, 50)]
+    assert state.check_and_update(3, 1400, WINDOW_MS) == [(1, 300), (2, 350)]
+    # Cihaz 2'nin 1050'deki paketi pencere dışında
+    assert state.check_and_update(4, 1850, WINDOW_MS) == [(3, 450), (1, 750)]
+    # Cihaz 1'in 1100'deki paketi tam pencere sınırında (tek process'te de sayılmaz)
+    assert state.check_and_update('x', 1900, WINDOW_MS) == [(4, 50), (3, 500)]
+    assert state.check_and_update(5, 1910, WINDOW_MS) == [('unknown', 10), (4, 60), (3, 510)]
+
+
+def test_ring_wraps():
+    state = SharedCollisionState(ring_size=4)
+    for i in range(10):
+        state.check_and_update(i, 1000 + i, WINDOW_MS)
+    # Sadece son 4 kayıt kalır
+    assert state.check_and_update(99, 1010, WINDOW_MS) == [(9, 1), (8, 2), (7, 3), (6, 4)]
@@ -0,0 +1,64 @@
+"""
+SQLite depolama regresyon testleri
+Aralık dışı değerli tek satır aynı gruptaki diğer satırları düşürmemeli,
+CSV dönüştürme geçersiz satırda durmamalı.
+
+Çalıştırma:
+    python -m pytest tests
+"""
+
+import csv
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                'server'))
+
+import pytest
+
+from sqlite_storage import COLUMNS, SqliteWriter, connect, convert_csv
+
+
+def _row(device_id=1, priority=2):
+    return [datetime.now().isoformat(), device_id, 120, priority, -70, 0.25, 0.1, 3,
+            1, 500, 0]
+
+
+def _device_ids(db_path):
+    conn = connect(db_path)
+    try:
+        return [row[0] for row in conn.execute('SELECT device_id FROM packets ORDER BY rowid')]
+    finally:
+        conn.close()
+
+
+def test_out_of_range_row_keeps_rest_of_batch(tmp_path):
+    db_path = str(tmp_path / 'data.db')
+    writer = SqliteWriter(db_path, COLUMNS, buffer_rows=100)
+    writer.open()
+
+    with pytest.raises(ValueError):
+        writer.write_rows([_row(1), _row(2, priority=300), _row(3), _row(4)])
+    assert writer.rows_rejected == 1
+    assert len(writer.buffer) == 3
+
+    writer.write_rows([_row(5)])
+    writer.close()
+    assert writer.rows_written == 4
+    assert _device_ids(db_path) == [1, 3, 4, 5]
+
+
+def test_convert_csv_skips_invalid_rows(tmp_path):
+    csv_path = str(tmp_path / 'collected_data.csv')
+    db_path = str(tmp_path / 'data.db')
+    with open(csv_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(COLUMNS)
+        writer.writerow(_row(1))
+        writer.writerow(_row(2, priority=300))
+        writer.writerow(_row(3)[:3] + ['yuksek'] + _row(3)[4:])
+        writer.writerow(_row(4))
+
+    assert convert_csv(csv_path, db_path) == 2
+    assert _device_ids(db_path) == [1, 4]